@@ -0,0 +1,424 @@
+import os
+import gzip
+import lzma
+import time
+import zlib
+import tarfile
+import zipfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from copy_engine import CopyWorker, CopyCancelled
+
+try:
+    import zstandard
+except ImportError:  # 没有安装时不提供 .tar.zst
+    zstandard = None
+
+# 读取损坏、加密或使用不支持的压缩方法的压缩包时可能抛出的异常
+ARCHIVE_ERRORS = (OSError, EOFError, ValueError, RuntimeError, NotImplementedError,
+                  zipfile.BadZipFile, tarfile.TarError, lzma.LZMAError, zlib.error)
+if zstandard is not None:
+    ARCHIVE_ERRORS += (zstandard.ZstdError,)
+
+# 压缩格式: (显示文本, 格式, 扩展名)
+ARCHIVE_FORMATS = [
+    ('ZIP (.zip)', 'zip', '.zip'),
+    ('tar.gz (.tar.gz)', 'gz', '.tar.gz'),
+    ('tar.xz (.tar.xz)', 'xz', '.tar.xz'),
+    ('tar.zst (.tar.zst)', 'zst', '.tar.zst'),
+]
+# 可以解压的扩展名，较长的写在前面
+ARCHIVE_SUFFIXES = [
+    ('.tar.gz', 'gz'), ('.tgz', 'gz'), ('.tar.xz', 'xz'), ('.txz', 'xz'),
+    ('.tar.zst', 'zst'), ('.tzst', 'zst'), ('.tar', 'tar'), ('.zip', 'zip'),
+]
+# 压缩线程数，zlib、lzma 和 zstd 在压缩期间都会释放 GIL
+ARCHIVE_THREADS = os.cpu_count() or 1
+# 不超过该大小的 zip 条目在线程池中整体压缩，更大的条目流式写入
+ZIP_SMALL_FILE = 4 * 1024 * 1024
+# zip 已读入内存、等待写出的条目总字节数上限
+ZIP_INFLIGHT_BYTES = 256 * 1024 * 1024
+# tar 流切块并行压缩的块大小，每块是一个独立的 gzip 成员或 xz 流
+GZIP_BLOCK = 4 * 1024 * 1024
+XZ_BLOCK = 16 * 1024 * 1024
+# gzip.compress 默认级别为 9，速度只有级别 6 的十分之一，压缩率相差不多
+GZIP_LEVEL = 6
+# lzma 预设 3 的字典为 4 MiB，每个压缩线程约占 32 MiB 内存
+XZ_PRESET = 3
+ZSTD_LEVEL = 3
+# 读写文件内容的块大小
+IO_CHUNK = 1024 * 1024
+
+
+def available_formats():
+    return [f for f in ARCHIVE_FORMATS if f[1] != 'zst' or zstandard is not None]
+
+
+def archive_format(path):
+    """ 按扩展名识别压缩包格式，不是压缩包时返回 None """
+    name = path.lower()
+    for suffix, fmt in ARCHIVE_SUFFIXES:
+        if name.endswith(suffix):
+            return fmt
+    return None
+
+
+def archive_stem(path):
+    """ 去掉压缩包扩展名后的名称，用作解压目录名 """
+    name = os.path.basename(path)
+    for suffix, _ in ARCHIVE_SUFFIXES:
+        if name.lower().endswith(suffix):
+            return name[:-len(suffix)] or name
+    return name
+
+
+def plan_archive(sources):
+    """ 展开要压缩的源，返回 ([(路径, 包内名称, 是否目录, 大小), ...], 总字节数)
+
+    包内名称相对于源所在的目录，符号链接不跟随。
+    """
+    entries = []
+    total = 0
+    for src in sources:
+        src = os.path.abspath(src)
+        base = os.path.dirname(src)
+        stack = [src]
+        while stack:
+            path = stack.pop()
+            arcname = os.path.relpath(path, base).replace(os.sep, '/')
+            st = os.lstat(path)
+            if os.path.isdir(path) and not os.path.islink(path):
+                entries.append((path, arcname, True, 0))
+                with os.scandir(path) as it:
+                    stack.extend(sorted((entry.path for entry in it), reverse=True))
+            else:
+                size = st.st_size if not os.path.islink(path) else 0
+                entries.append((path, arcname, False, size))
+                total += size
+    return entries, total
+
+
+def _deflate_file(path):
+    """ 线程池任务：读入并压缩一个小文件，返回 (数据, CRC, 原始大小, 压缩方法) """
+    with open(path, 'rb') as f:
+        data = f.read()
+    crc = zlib.crc32(data)
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    compressed = compressor.compress(data) + compressor.flush()
+    # 压缩后反而变大的（如图片）直接存储
+    if len(compressed) >= len(data):
+        return data, crc, len(data), zipfile.ZIP_STORED
+    return compressed, crc, len(data), zipfile.ZIP_DEFLATED
+
+
+def open_tar_stream(fileobj, fmt):
+    """ 以流模式打开 tar，按顺序读取成员，不需要随机访问 """
+    if fmt == 'zst':
+        if zstandard is None:
+            raise OSError('需要安装 zstandard 才能读取 .tar.zst')
+        fileobj = zstandard.ZstdDecompressor().stream_reader(fileobj)
+    elif fmt == 'xz':
+        fileobj = lzma.LZMAFile(fileobj)
+    elif fmt == 'gz':
+        # GzipFile 能读取多成员的 gzip 文件
+        fileobj = gzip.GzipFile(fileobj=fileobj)
+    return tarfile.open(fileobj=fileobj, mode='r|')
+
+
+class ProgressReader:
+    """ 读取时报告进度并检查取消的文件包装 """
+
+    def __init__(self, f, progress, is_cancelled):
+        self.f = f
+        self.progress = progress
+        self.is_cancelled = is_cancelled
+
+    def read(self, size=-1):
+        if self.is_cancelled():
+            raise CopyCancelled()
+        data = self.f.read(size)
+        self.progress(len(data))
+        return data
+
+
+class ParallelCompressor:
+    """ 把写入的数据切块，在线程池中各自压缩后按顺序写出
+
+    gzip 的多个成员、xz 的多个流首尾相接仍是合法文件，gzip/xz/tar
+    等工具和 Python 都能直接读取。
+    """
+
+    def __init__(self, fileobj, compress, block_size):
+        self.fileobj = fileobj
+        self.compress = compress
+        self.block_size = block_size
+        self.buffer = bytearray()
+        self.pending = deque()
+        self.pool = ThreadPoolExecutor(max_workers=ARCHIVE_THREADS)
+
+    def write(self, data):
+        self.buffer += data
+        while len(self.buffer) >= self.block_size:
+            self.submit(bytes(self.buffer[:self.block_size]))
+            del self.buffer[:self.block_size]
+        return len(data)
+
+    def submit(self, block):
+        self.pending.append(self.pool.submit(self.compress, block))
+        # 最多领先写出两轮，限制内存占用
+        while len(self.pending) > ARCHIVE_THREADS * 2:
+            self.fileobj.write(self.pending.popleft().result())
+
+    def close(self):
+        try:
+            if self.buffer:
+                self.submit(bytes(self.buffer))
+                self.buffer.clear()
+            while self.pending:
+                self.fileobj.write(self.pending.popleft().result())
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+
+
+class CompressWorker(CopyWorker):
+    """ 把 sources 压缩为 archive_path，进度和结果信号与复制任务相同 """
+
+    def __init__(self, sources, archive_path, fmt, parent=None):
+        super().__init__(sources, os.path.dirname(archive_path), parent)
+        self.archive_path = archive_path
+        self.fmt = fmt
+        self.errors = []
+
+    def file_done(self):
+        with self.lock:
+            self.files_done += 1
+        self.emit_progress()
+
+    def write_zip(self, f, entries):
+        pool = ThreadPoolExecutor(max_workers=ARCHIVE_THREADS)
+        # 按包内顺序排队的 (条目, 压缩任务)
+        pending = deque()
+        inflight = 0
+        with zipfile.ZipFile(f, 'w', zipfile.ZIP_DEFLATED) as zf:
+            def write_next():
+                nonlocal inflight
+                (path, arcname, is_dir, size), future = pending.popleft()
+                if is_dir:
+                    zf.write(path, arcname)
+                    return
+                if future is None:
+                    self.write_zip_stream(zf, path, arcname)
+                    return
+                inflight -= size
+                try:
+                    data, crc, file_size, method = future.result()
+                except OSError as e:
+                    self.errors.append((path, str(e)))
+                    return
+                # 数据已在线程池中压缩好，直接写入本地文件头和数据，
+                # 中央目录仍由 ZipFile.close() 生成
+                zinfo = zipfile.ZipInfo.from_file(path, arcname, strict_timestamps=False)
+                zinfo.compress_type = method
+                zinfo.CRC = crc
+                zinfo.file_size = file_size
+                zinfo.compress_size = len(data)
+                zinfo.header_offset = zf.fp.tell()
+                zf.fp.write(zinfo.FileHeader(False))
+                zf.fp.write(data)
+                zf.filelist.append(zinfo)
+                zf.NameToInfo[zinfo.filename] = zinfo
+                zf.start_dir = zf.fp.tell()
+                self.add_bytes(file_size)
+                self.file_done()
+
+            try:
+                for entry in entries:
+                    if self._cancelled:
+                        raise CopyCancelled()
+                    path, arcname, is_dir, size = entry
+                    if not is_dir and os.path.islink(path) and not os.path.isfile(path):
+                        continue  # zip 中不保存指向文件夹或无效的链接
+                    if is_dir or size > ZIP_SMALL_FILE:
+                        # 目录和大文件轮到时在当前线程中写入
+                        pending.append((entry, None))
+                    else:
+                        pending.append((entry, pool.submit(_deflate_file, path)))
+                        inflight += size
+                    while inflight > ZIP_INFLIGHT_BYTES or len(pending) > ARCHIVE_THREADS * 4:
+                        write_next()
+                while pending:
+                    if self._cancelled:
+                        raise CopyCancelled()
+                    write_next()
+            finally:
+                pool.shutdown(cancel_futures=True)
+
+    def write_zip_stream(self, zf, path, arcname):
+        """ 大文件边读边压缩写入，不整体读入内存 """
+        try:
+            src = open(path, 'rb')
+        except OSError as e:
+            self.errors.append((path, str(e)))
+            return
+        with src:
+            zinfo = zipfile.ZipInfo.from_file(path, arcname, strict_timestamps=False)
+            zinfo.compress_type = zipfile.ZIP_DEFLATED
+            reader = ProgressReader(src, self.add_bytes, self.is_cancelled)
+            with zf.open(zinfo, 'w', force_zip64=zinfo.file_size > zipfile.ZIP64_LIMIT // 2) as dst:
+                while True:
+                    data = reader.read(IO_CHUNK)
+                    if not data:
+                        break
+                    dst.write(data)
+                    self.emit_progress()
+        self.file_done()
+
+    def write_tar(self, f, entries):
+        if self.fmt == 'zst':
+            compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, threads=-1)
+            stream = compressor.stream_writer(f, closefd=False)
+        elif self.fmt == 'xz':
+            stream = ParallelCompressor(f, lambda block: lzma.compress(block, preset=XZ_PRESET),
+                                        XZ_BLOCK)
+        else:
+            stream = ParallelCompressor(f, lambda block: gzip.compress(block, GZIP_LEVEL, mtime=0),
+                                        GZIP_BLOCK)
+        try:
+            with tarfile.open(fileobj=stream, mode='w|', format=tarfile.PAX_FORMAT) as tar:
+                tar.copybufsize = IO_CHUNK
+                for path, arcname, is_dir, size in entries:
+                    if self._cancelled:
+                        raise CopyCancelled()
+                    try:
+                        tarinfo = tar.gettarinfo(path, arcname)
+                        src = open(path, 'rb') if tarinfo.isreg() else None
+                    except OSError as e:
+                        self.errors.append((path, str(e)))
+                        continue
+                    if src is None:
+                        tar.addfile(tarinfo)
+                    else:
+                        with src:
+                            tar.addfile(tarinfo, ProgressReader(src, self.add_bytes,
+                                                                self.is_cancelled))
+                    if not is_dir:
+                        self.file_done()
+        finally:
+            stream.close()
+
+    def run(self):
+        self.started_at = self.last_progress = time.monotonic()
+        try:
+            entries, self.bytes_total = plan_archive(self.sources)
+        except OSError as e:
+            self.job_finished.emit(0, [(self.archive_path, str(e))], False, 0.0)
+            return
+        self.files_total = sum(1 for entry in entries if not entry[2])
+        try:
+            with open(self.archive_path, 'xb') as f:
+                if self.fmt == 'zip':
+                    self.write_zip(f, entries)
+                else:
+                    self.write_tar(f, entries)
+        except BaseException as e:
+            if not isinstance(e, CopyCancelled):
+                self.errors.append((self.archive_path, str(e)))
+            # 删除不完整的压缩包
+            try:
+                os.remove(self.archive_path)
+            except OSError:
+                pass
+        self.emit_progress(force=True)
+        self.job_finished.emit(self.files_done, self.errors, self._cancelled,
+                               time.monotonic() - self.started_at)
+
+
+class ExtractWorker(CopyWorker):
+    """ 把压缩包解压到 dest_dir，zip 的条目在多个线程中并行解压 """
+
+    def __init__(self, archive_path, dest_dir, parent=None):
+        super().__init__([archive_path], dest_dir, parent)
+        self.archive_path = archive_path
+        self.fmt = archive_format(archive_path)
+
+    def extract_zip(self):
+        local = threading.local()
+        handles = []
+        handles_lock = threading.Lock()
+
+        def extract(info):
+            if self._cancelled:
+                raise CopyCancelled()
+            # 每个线程使用自己的文件句柄，互不等待
+            zf = getattr(local, 'zf', None)
+            if zf is None:
+                zf = local.zf = zipfile.ZipFile(self.archive_path)
+                with handles_lock:
+                    handles.append(zf)
+            # extract 会去掉绝对路径和 ..，不会写到目标目录之外
+            try:
+                zf.extract(info, self.dest_dir)
+            except FileExistsError:
+                # 其他线程同时创建了同一个父目录，重试一次
+                zf.extract(info, self.dest_dir)
+            self.add_bytes(info.file_size)
+
+        with zipfile.ZipFile(self.archive_path) as zf:
+            infos = zf.infolist()
+        self.files_total = sum(1 for info in infos if not info.is_dir())
+        self.bytes_total = sum(info.file_size for info in infos)
+        errors = []
+        try:
+            with ThreadPoolExecutor(max_workers=ARCHIVE_THREADS) as pool:
+                futures = [(info, pool.submit(extract, info)) for info in infos]
+                for info, future in futures:
+                    try:
+                        future.result()
+                    except CopyCancelled:
+                        continue
+                    except ARCHIVE_ERRORS as e:
+                        errors.append((info.filename, str(e)))
+                        continue
+                    if not info.is_dir():
+                        self.files_done += 1
+                    self.emit_progress()
+        finally:
+            for zf in handles:
+                zf.close()
+        return errors
+
+    def extract_tar(self):
+        """ tar 只能顺序读取，进度按已读取的压缩数据计算 """
+        self.bytes_total = os.path.getsize(self.archive_path)
+        errors = []
+        with open(self.archive_path, 'rb') as raw:
+            reader = ProgressReader(raw, self.add_bytes, self.is_cancelled)
+            with open_tar_stream(reader, self.fmt) as tar:
+                for member in tar:
+                    try:
+                        # data 过滤器拒绝绝对路径、.. 和指向目录外的链接
+                        tar.extract(member, self.dest_dir, filter='data')
+                    except (OSError, tarfile.TarError) as e:
+                        errors.append((member.name, str(e)))
+                        continue
+                    if member.isreg():
+                        self.files_done += 1
+                    self.emit_progress()
+        return errors
+
+    def run(self):
+        self.started_at = self.last_progress = time.monotonic()
+        try:
+            os.makedirs(self.dest_dir, exist_ok=True)
+            if self.fmt == 'zip':
+                errors = self.extract_zip()
+            else:
+                errors = self.extract_tar()
+        except CopyCancelled:
+            errors = []
+        except ARCHIVE_ERRORS as e:
+            errors = [(self.archive_path, str(e))]
+        self.emit_progress(force=True)
+        self.job_finished.emit(self.files_done, errors, self._cancelled,
+                               time.monotonic() - self.started_at)
@@ -0,0 +1,622 @@
+import os
+import json
+import time
+import hashlib
+import zipfile
+import tarfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QThread, QFileInfo, pyqtSignal
+from archive import ARCHIVE_ERRORS, archive_format, open_tar_stream
+from copy_engine import CopyWorker, CopyCancelled, unique_name
+from dir_model import natural_key, suffix_of
+from utils import cache_dir, format_size
+
+# 内存中保留的压缩包索引数
+INDEX_CACHE_SIZE = 8
+# 复制成员时每次读写的字节数
+MEMBER_CHUNK = 1024 * 1024
+# 磁盘缓存的索引格式版本，成员键的含义改变时递增
+INDEX_VERSION = 2
+# tar 成员键第二项的特殊值: 符号链接和不支持的成员类型没有数据
+SYMLINK = 'symlink'
+UNSUPPORTED = 'unsupported'
+
+_index_cache = OrderedDict()
+_index_lock = threading.Lock()
+
+
+def split_archive_path(path):
+    """ 把虚拟路径拆成 (压缩包路径, 包内路径)，不在压缩包内时返回 None
+
+    虚拟路径是压缩包路径后接包内路径，包内路径用 '/' 分隔，压缩包本身为 ''。
+    """
+    inner = []
+    probe = path
+    while probe:
+        if archive_format(probe) and os.path.isfile(probe):
+            return probe, '/'.join(reversed(inner))
+        if os.path.exists(probe):
+            return None
+        parent, name = os.path.split(probe)
+        if parent == probe:
+            break
+        inner.append(name)
+        probe = parent
+    return None
+
+
+def virtual_path(archive, inner):
+    return os.path.join(archive, *inner.split('/')) if inner else archive
+
+
+class ArchiveIndex:
+    """ 压缩包的目录结构，由 zip 的中央目录或 tar 的成员头部建立
+
+    每个包内目录保存 {名称: (是否目录, 大小, 修改时间, 成员键)}。zip 的成员键
+    是成员名；tar 的是 (成员名, 数据偏移)，未压缩的 tar 可直接定位读取。
+    tar 的硬链接使用目标成员的键；符号链接的键是 (成员名, SYMLINK, 链接目标)，
+    设备文件等其他类型是 (成员名, UNSUPPORTED, '')。
+    """
+
+    def __init__(self, path, fmt):
+        self.path = path
+        self.fmt = fmt
+        self.dirs = {'': {}}
+        self.records = []
+
+    def add(self, name, is_dir, size, mtime, key):
+        parts = [p for p in name.split('/') if p and p != '.']
+        if not parts or '..' in parts:
+            return
+        self.records.append((name, is_dir, size, mtime, key))
+        # 很多压缩包不单独保存目录条目，从成员路径补出上级目录；
+        # 追加过的 tar 里同一个名称可能先是文件、后是目录，这时改为目录
+        for depth in range(len(parts) - 1):
+            listing = self.dirs['/'.join(parts[:depth])]
+            existing = listing.get(parts[depth])
+            if existing is None or not existing[0]:
+                listing[parts[depth]] = (True, 0, mtime, None)
+                self.dirs.setdefault('/'.join(parts[:depth + 1]), {})
+        listing = self.dirs['/'.join(parts[:-1])]
+        existing = listing.get(parts[-1])
+        if is_dir:
+            listing[parts[-1]] = (True, 0, mtime, key)
+            self.dirs.setdefault('/'.join(parts), {})
+        elif existing is None or not existing[0]:
+            listing[parts[-1]] = (False, size, mtime, key)
+        # 已经是目录的名称上再出现的同名文件忽略，保持目录结构完整
+
+    def listing(self, inner):
+        return self.dirs.get(inner)
+
+    def entry(self, inner):
+        parent, _, name = inner.rpartition('/')
+        listing = self.dirs.get(parent)
+        return listing.get(name) if listing is not None else None
+
+    def walk(self, inner):
+        """ 列出 inner 及其下所有条目: [(包内路径, 是否目录, 大小, 成员键), ...] """
+        entry = self.entry(inner)
+        if entry is None:
+            return []
+        items = [(inner, entry[0], entry[1], entry[3])]
+        if entry[0]:
+            stack = [inner]
+            while stack:
+                current = stack.pop()
+                for name, (is_dir, size, _, key) in self.dirs.get(current, {}).items():
+                    path = f'{current}/{name}'
+                    items.append((path, is_dir, size, key))
+                    if is_dir:
+                        stack.append(path)
+        return items
+
+
+def _cache_file(path, st):
+    key = f'{path}|{st.st_size}|{st.st_mtime_ns}|{INDEX_VERSION}'
+    return os.path.join(cache_dir('archives'), hashlib.sha1(key.encode()).hexdigest() + '.json')
+
+
+def _add_tar_member(index, member, regular, seekable):
+    """ 把 tar 成员加入索引，regular 记录已出现的普通文件供后面的硬链接查找 """
+    if member.isdir():
+        index.add(member.name, True, 0, member.mtime, (member.name, None))
+    elif member.isreg():
+        offset = member.offset_data if seekable and not member.issparse() else None
+        regular[member.name] = (member.size, offset)
+        index.add(member.name, False, member.size, member.mtime, (member.name, offset))
+    elif member.islnk() and member.linkname in regular:
+        # 硬链接没有自己的数据，读取时使用它指向的成员
+        size, offset = regular[member.linkname]
+        index.add(member.name, False, size, member.mtime, (member.linkname, offset))
+    elif member.issym():
+        index.add(member.name, False, 0, member.mtime, (member.name, SYMLINK, member.linkname))
+    else:
+        index.add(member.name, False, 0, member.mtime, (member.name, UNSUPPORTED, ''))
+
+
+def is_special(key):
+    """ 成员键是否为没有数据的 tar 符号链接或不支持的类型 """
+    return isinstance(key, tuple) and len(key) > 2
+
+
+def _read_index(path, fmt, is_cancelled):
+    """ 读取压缩包的目录，取消时返回 None """
+    index = ArchiveIndex(path, fmt)
+    if fmt == 'zip':
+        # ZipFile 只读取文件末尾的中央目录
+        with zipfile.ZipFile(path) as zf:
+            for info in zf.infolist():
+                mtime = time.mktime(info.date_time + (0, 0, -1))
+                index.add(info.filename, info.is_dir(), info.file_size, mtime, info.filename)
+    elif fmt == 'tar':
+        # 未压缩的 tar 读取成员头部时直接跳过数据
+        regular = {}
+        with tarfile.open(path, 'r:') as tar:
+            for member in tar:
+                if is_cancelled():
+                    return None
+                _add_tar_member(index, member, regular, True)
+    else:
+        # 压缩的 tar 没有目录，只能完整解压一遍，结果缓存到磁盘
+        regular = {}
+        with open(path, 'rb') as raw, open_tar_stream(raw, fmt) as tar:
+            for member in tar:
+                if is_cancelled():
+                    return None
+                _add_tar_member(index, member, regular, False)
+    return index
+
+
+def load_index(path, is_cancelled=lambda: False):
+    """ 读取压缩包索引，按 (路径, 大小, 修改时间) 缓存在内存和磁盘中 """
+    st = os.stat(path)
+    key = (path, st.st_size, st.st_mtime_ns)
+    with _index_lock:
+        index = _index_cache.get(key)
+        if index is not None:
+            _index_cache.move_to_end(key)
+            return index
+    fmt = archive_format(path)
+    cache_path = _cache_file(path, st)
+    index = None
+    if fmt not in ('zip', 'tar'):
+        try:
+            with open(cache_path, encoding='utf-8') as f:
+                index = ArchiveIndex(path, fmt)
+                for name, is_dir, size, mtime, member_key in json.load(f):
+                    index.add(name, is_dir, size, mtime, tuple(member_key))
+        except (OSError, ValueError, TypeError):
+            index = None
+    if index is None:
+        index = _read_index(path, fmt, is_cancelled)
+        if index is None:
+            return None
+        if fmt not in ('zip', 'tar'):
+            tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(index.records, f)
+                os.replace(tmp_path, cache_path)
+            except OSError:
+                pass
+    with _index_lock:
+        _index_cache[key] = index
+        while len(_index_cache) > INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    return index
+
+
+class LimitedReader:
+    """ 从 offset 开始最多读取 size 字节 """
+
+    def __init__(self, f, offset, size):
+        self.f = f
+        self.f.seek(offset)
+        self.remaining = size
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.f.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@contextmanager
+def open_member(index, key):
+    """ 以流的形式打开单个成员，zip 和未压缩的 tar 直接定位，不读取其他成员 """
+    if is_special(key):
+        raise OSError(f'{key[0]} 不是普通文件')
+    with open(index.path, 'rb') as f:
+        if index.fmt in ('zip', 'tar'):
+            with member_reader(index, f) as read_member, read_member(key) as stream:
+                yield stream
+            return
+        # 压缩的 tar 只能从头解压到该成员
+        with open_tar_stream(f, index.fmt) as tar:
+            for member in tar:
+                if member.name == key[0] and member.isreg():
+                    yield tar.extractfile(member)
+                    return
+    raise OSError(f'压缩包中找不到 {key[0]}')
+
+
+@contextmanager
+def member_reader(index, f):
+    """ 返回按成员键打开成员的函数，同一个压缩包的多个成员共用一个文件句柄
+
+    压缩的 tar 不支持定位，由调用方顺序读取。
+    """
+    if index.fmt == 'zip':
+        with zipfile.ZipFile(f) as zf:
+            yield zf.open
+        return
+    if index.fmt != 'tar':
+        raise OSError('压缩的 tar 只能顺序读取')
+    sizes = {record[0]: record[2] for record in index.records}
+
+    def read_member(key):
+        if is_special(key):
+            raise OSError(f'{key[0]} 不是普通文件')
+        name, offset = key
+        if offset is None:
+            # 稀疏文件需要 tarfile 还原空洞
+            f.seek(0)
+            tar = tarfile.open(fileobj=f, mode='r:')
+            return tar.extractfile(name)
+        return LimitedReader(f, offset, sizes.get(name, 0))
+    yield read_member
+
+
+class ArchiveIndexWorker(QThread):
+    # 压缩包路径, 索引（失败时为 None）, 错误信息, 耗时
+    index_loaded = pyqtSignal(str, object, str, float)
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        start = time.monotonic()
+        try:
+            index = load_index(self.path, self.is_cancelled)
+            error = ''
+        except ARCHIVE_ERRORS as e:
+            index, error = None, str(e)
+        if self._cancelled:
+            return
+        self.index_loaded.emit(self.path, index, error, time.monotonic() - start)
+
+
+class ArchiveModel(QAbstractTableModel):
+    """ 把压缩包中的一个目录显示为只读的扁平列表 """
+
+    HEADERS = ['名称', '大小', '类型', '修改日期']
+
+    # 虚拟目录路径, 条目数, 耗时
+    load_finished = pyqtSignal(str, int, float)
+    # 压缩包路径, 错误信息
+    load_failed = pyqtSignal(str, str)
+
+    def __init__(self, icon_provider=None, parent=None):
+        super().__init__(parent)
+        self.icon_provider = icon_provider
+        self.archive_path = ''
+        self.inner = ''
+        self.archive_index = None
+        self.worker = None
+        self.file_filter = None
+        self.sort_column = 0
+        self.sort_order = Qt.AscendingOrder
+        # [(名称, 是否目录, 大小, 修改时间), ...]
+        self.rows = []
+
+    def rootPath(self):
+        return virtual_path(self.archive_path, self.inner)
+
+    def open(self, archive_path, inner):
+        """ 显示 archive_path 中的 inner 目录，索引不在缓存中时在后台读取 """
+        self.beginResetModel()
+        self.rows = []
+        self.endResetModel()
+        if self.archive_index is not None and self.archive_index.path == archive_path and self.worker is None:
+            self.inner = inner
+            self.show_listing(0.0)
+            return
+        self.stop()
+        self.archive_path = archive_path
+        self.inner = inner
+        self.archive_index = None
+        worker = ArchiveIndexWorker(archive_path, self)
+        worker.index_loaded.connect(self.on_index_loaded)
+        worker.finished.connect(worker.deleteLater)
+        self.worker = worker
+        worker.start()
+
+    def reload(self):
+        # 压缩包改变后大小或修改时间不同，缓存自然失效
+        self.archive_index = None
+        self.open(self.archive_path, self.inner)
+
+    def stop(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+            self.worker = None
+
+    def on_index_loaded(self, path, index, error, elapsed):
+        if self.sender() is not self.worker:
+            return
+        self.worker = None
+        if index is None:
+            self.load_failed.emit(path, error)
+            return
+        self.archive_index = index
+        self.show_listing(elapsed)
+
+    def show_listing(self, elapsed):
+        listing = self.archive_index.listing(self.inner)
+        if listing is None:
+            self.load_failed.emit(self.archive_path, f'压缩包中没有 {self.inner}')
+            return
+        f = self.file_filter
+        rows = []
+        for name, (is_dir, size, mtime, _) in listing.items():
+            hidden = name.startswith('.')
+            if f is None:
+                if hidden:
+                    continue
+            elif not f.accepts(name, is_dir, size, mtime, hidden):
+                continue
+            rows.append((name, is_dir, size, mtime))
+        self.beginResetModel()
+        self.rows = rows
+        self.sort_rows()
+        self.endResetModel()
+        self.load_finished.emit(self.rootPath(), len(rows), elapsed)
+
+    def set_file_filter(self, file_filter):
+        self.file_filter = file_filter
+        if self.archive_index is not None:
+            self.show_listing(0.0)
+
+    def sort_rows(self):
+        column = self.sort_column
+        if column == 1:
+            key = lambda row: row[2]
+        elif column == 2:
+            key = lambda row: suffix_of(row[0])
+        elif column == 3:
+            key = lambda row: row[3]
+        else:
+            key = lambda row: natural_key(row[0])
+        self.rows.sort(key=key, reverse=self.sort_order == Qt.DescendingOrder)
+        # 文件夹始终在前
+        self.rows.sort(key=lambda row: not row[1])
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if column < 0 or column >= len(self.HEADERS):
+            return
+        self.sort_column = column
+        self.sort_order = order
+        self.layoutAboutToBeChanged.emit()
+        self.sort_rows()
+        self.layoutChanged.emit()
+
+    def inner_path(self, index):
+        name = self.rows[index.row()][0]
+        return f'{self.inner}/{name}' if self.inner else name
+
+    def filePath(self, index):
+        if not index.isValid():
+            return self.rootPath()
+        return virtual_path(self.archive_path, self.inner_path(index))
+
+    def isDir(self, index):
+        return self.rows[index.row()][1]
+
+    def path_indexes(self, paths):
+        root = self.rootPath()
+        names = {os.path.basename(path) for path in paths if os.path.dirname(path) == root}
+        return [self.index(row, 0) for row, entry in enumerate(self.rows) if entry[0] in names]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    # 只读，不支持拖动
+    ENTRY_FLAGS = Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemNeverHasChildren
+
+    def flags(self, index):
+        return self.ENTRY_FLAGS
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        name, is_dir, size, mtime = self.rows[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return name
+            if column == 1:
+                return '' if is_dir else format_size(size)
+            if column == 2:
+                if is_dir:
+                    return '文件夹'
+                suffix = suffix_of(name)
+                return f'{suffix.upper()} 文件' if suffix else '文件'
+            if column == 3:
+                return time.strftime('%Y/%m/%d %H:%M', time.localtime(mtime))
+        elif role == Qt.DecorationRole and column == 0 and self.icon_provider is not None:
+            # 成员不在磁盘上，按类型取图标；文件夹用压缩包所在目录解析
+            if is_dir:
+                return self.icon_provider.lookup('dir:', QFileInfo(os.path.dirname(self.archive_path)))
+            key = self.icon_provider.type_key(suffix_of(name))
+            return self.icon_provider.lookup(key, QFileInfo(name))
+        elif role == Qt.TextAlignmentRole and column == 1:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+
+class ArchiveCopyWorker(CopyWorker):
+    """ 把压缩包中的成员复制到 dest_dir，只读取所需的成员 """
+
+    def __init__(self, sources, dest_dir, parent=None):
+        super().__init__(sources, dest_dir, parent)
+        # 复制出的顶层路径，与 sources 一一对应
+        self.targets = []
+
+    def plan(self):
+        """ 按压缩包分组: {压缩包: (索引, [(成员键, 目标路径, 大小), ...])}
+
+        同时返回要创建的目录，以及没有数据的 tar 符号链接和特殊成员 [(成员键, 目标路径), ...]。
+        """
+        groups = {}
+        dirs = []
+        specials = []
+        taken = set()
+        for source in self.sources:
+            location = split_archive_path(source)
+            if location is None or not location[1]:
+                raise OSError(f'不是压缩包中的项目: {source}')
+            archive, inner = location
+            index = load_index(archive)
+            name = unique_name(self.dest_dir, inner.rpartition('/')[2], taken)
+            taken.add(name)
+            top = os.path.join(self.dest_dir, name)
+            self.targets.append(top)
+            _, files = groups.setdefault(archive, (index, []))
+            prefix = len(inner)
+            for path, is_dir, size, key in index.walk(inner):
+                target = top + path[prefix:].replace('/', os.sep)
+                if is_dir:
+                    dirs.append(target)
+                elif is_special(key):
+                    specials.append((key, target))
+                    self.files_total += 1
+                elif key is not None:
+                    files.append((key, target, size))
+                    self.files_total += 1
+                    self.bytes_total += size
+        return groups, dirs, specials
+
+    def copy_stream(self, src, dst):
+        try:
+            with open(dst, 'wb') as out:
+                while True:
+                    if self._cancelled:
+                        raise CopyCancelled()
+                    data = src.read(MEMBER_CHUNK)
+                    if not data:
+                        break
+                    out.write(data)
+                    self.add_bytes(len(data))
+                    self.emit_progress()
+        except BaseException:
+            try:
+                os.remove(dst)
+            except OSError:
+                pass
+            raise
+        self.files_done += 1
+
+    def copy_group(self, index, files):
+        errors = []
+        if index.fmt in ('zip', 'tar'):
+            with open(index.path, 'rb') as f, member_reader(index, f) as read_member:
+                for key, target, _ in files:
+                    if self._cancelled:
+                        break
+                    try:
+                        with read_member(key) as src:
+                            self.copy_stream(src, target)
+                    except CopyCancelled:
+                        break
+                    except ARCHIVE_ERRORS + (KeyError,) as e:
+                        errors.append((target, str(e)))
+            return errors
+        # 压缩的 tar 只能顺序读取，一遍读取取出所有需要的成员；
+        # 硬链接和它指向的成员共用一个键，取出一次后复制到其余位置
+        wanted = {}
+        for key, target, _ in files:
+            wanted.setdefault(key[0], []).append(target)
+        try:
+            with open(index.path, 'rb') as raw, open_tar_stream(raw, index.fmt) as tar:
+                for member in tar:
+                    if self._cancelled or not wanted:
+                        break
+                    targets = wanted.pop(member.name, None)
+                    if targets is None or not member.isreg():
+                        continue
+                    try:
+                        self.copy_stream(tar.extractfile(member), targets[0])
+                        for target in targets[1:]:
+                            with open(targets[0], 'rb') as src:
+                                self.copy_stream(src, target)
+                    except CopyCancelled:
+                        break
+        except ARCHIVE_ERRORS as e:
+            # 数据流损坏时后面的成员都无法读取
+            errors.append((index.path, str(e)))
+            return errors
+        if not self._cancelled:
+            errors.extend((target, '压缩包中找不到该成员')
+                          for targets in wanted.values() for target in targets)
+        return errors
+
+    def copy_specials(self, specials):
+        """ 符号链接按原样创建，其他没有数据的成员作为错误报告，不生成空文件 """
+        errors = []
+        for key, target in specials:
+            if self._cancelled:
+                break
+            if key[1] != SYMLINK:
+                errors.append((target, '不支持的成员类型'))
+                continue
+            try:
+                os.symlink(key[2], target)
+                self.files_done += 1
+            except OSError as e:
+                errors.append((target, str(e)))
+        return errors
+
+    def run(self):
+        self.started_at = self.last_progress = time.monotonic()
+        errors = []
+        try:
+            groups, dirs, specials = self.plan()
+            for path in dirs:
+                os.makedirs(path, exist_ok=True)
+            for index, files in groups.values():
+                errors += self.copy_group(index, files)
+            errors += self.copy_specials(specials)
+        except CopyCancelled:
+            pass
+        except ARCHIVE_ERRORS as e:
+            errors.append((self.dest_dir, str(e)))
+        self.emit_progress(force=True)
+        self.job_finished.emit(self.files_done, errors, self._cancelled,
+                               time.monotonic() - self.started_at)
@@ -0,0 +1,158 @@
+import os
+import time
+from PyQt5.QtWidgets import QProgressDialog
+from PyQt5.QtCore import QThread, pyqtSignal
+
+PROGRESS_INTERVAL = 0.1
+
+
+def group_by_location(paths):
+    """ 按 (设备, 所在目录) 分组，同组的元数据操作可以共享查找结果 """
+    groups = {}
+    for path in paths:
+        try:
+            dev = os.lstat(path).st_dev
+        except OSError:
+            dev = -1
+        groups.setdefault((dev, os.path.dirname(path)), []).append(path)
+    return groups
+
+
+def ordered_by_location(paths):
+    """ 把路径按设备和目录排好，相邻操作落在同一目录上 """
+    ordered = []
+    for _, group in sorted(group_by_location(paths).items()):
+        ordered.extend(sorted(group))
+    return ordered
+
+
+def order_renames(pending, taken):
+    """ 把同一目录内的 {旧名: 新名} 排成可以依次执行的 [(旧名, 新名), ...]
+
+    新名称还被另一个待改名的项目占用时，先改那个项目；互相占用形成环时
+    先把其中一个改成临时名称。taken 是目录中已占用的名称，用于选临时名称。
+    """
+    ordered = []
+    pending = dict(pending)
+    for first in list(pending):
+        if first not in pending:
+            continue
+        # 新名称互不相同，沿着占用关系只会走到空闲的名称，或回到起点形成环
+        chain = [first]
+        while pending[chain[-1]] in pending and pending[chain[-1]] != first:
+            chain.append(pending[chain[-1]])
+        if pending[chain[-1]] == first and len(chain) > 1:
+            number = 0
+            temp = f'.{first}.renaming'
+            while temp in taken:
+                number += 1
+                temp = f'.{first}.renaming{number}'
+            taken.add(temp)
+            ordered.append((first, temp))
+            ordered.extend((old, pending[old]) for old in reversed(chain[1:]))
+            ordered.append((temp, pending[first]))
+        else:
+            ordered.extend((old, pending[old]) for old in reversed(chain))
+        for old in chain:
+            del pending[old]
+    return ordered
+
+
+def plan_batch_rename(paths, template, start=1):
+    """ 按模板生成批量重命名计划，{n} 替换为序号，文件保留扩展名
+
+    每个目录只 listdir 一次用于检查重名。选中的项目之间可以互换名称，
+    计划按执行顺序排列。返回 ([(旧路径, 新路径), ...], [(路径, 原因), ...])。
+    """
+    if '{n}' not in template:
+        template += '_{n}'
+    width = len(str(start + len(paths) - 1))
+    number = start
+    renames = []
+    errors = []
+    for (_, directory), group in sorted(group_by_location(paths).items()):
+        try:
+            names = set(os.listdir(directory))
+        except OSError as e:
+            errors.extend((path, str(e)) for path in group)
+            continue
+        targets = {}
+        for path in sorted(group):
+            name = os.path.basename(path)
+            ext = '' if os.path.isdir(path) else os.path.splitext(name)[1]
+            targets[name] = template.replace('{n}', str(number).zfill(width)) + ext
+            number += 1
+        # 选中的项目都会改名，它们的旧名称不算冲突；但新名称被未选中的项目
+        # 占用而无法改名的项目会保留旧名称，这又可能挡住别的项目，直到不再变化
+        staying = {name for name, new_name in targets.items() if new_name == name}
+        failed = {}
+        while True:
+            occupied = (names - set(targets)) | staying | set(failed)
+            blocked = {name: new_name for name, new_name in targets.items()
+                       if name not in staying and name not in failed and new_name in occupied}
+            if not blocked:
+                break
+            failed.update(blocked)
+        for name, new_name in failed.items():
+            errors.append((os.path.join(directory, name), f'已存在同名项目 {new_name}'))
+        pending = {name: new_name for name, new_name in targets.items()
+                   if name not in staying and name not in failed}
+        taken = names | set(targets.values())
+        renames.extend((os.path.join(directory, old), os.path.join(directory, new))
+                       for old, new in order_renames(pending, taken))
+    return renames, errors
+
+
+class BatchWorker(QThread):
+    # 已完成数, 总数
+    progress = pyqtSignal(int, int)
+    # 成功数, 错误列表 [(项目, 原因), ...], 是否取消
+    batch_finished = pyqtSignal(int, list, bool)
+
+    def __init__(self, items, action, parent=None):
+        """ 对 items 中的每一项调用 action，出错时记录并继续 """
+        super().__init__(parent)
+        self.items = list(items)
+        self.action = action
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        done = 0
+        errors = []
+        last_progress = time.monotonic()
+        for number, item in enumerate(self.items, 1):
+            if self._cancelled:
+                break
+            try:
+                self.action(item)
+                done += 1
+            except Exception as e:
+                errors.append((item, str(e)))
+            now = time.monotonic()
+            if now - last_progress >= PROGRESS_INTERVAL:
+                self.progress.emit(number, len(self.items))
+                last_progress = now
+        self.batch_finished.emit(done, errors, self._cancelled)
+
+
+class BatchProgressDialog(QProgressDialog):
+    def __init__(self, worker, title, parent=None):
+        super().__init__(f'{title}...', '取消', 0, len(worker.items), parent)
+        self.setWindowTitle(title)
+        self.setMinimumDuration(500)
+        self.setAutoClose(False)
+        self.setAutoReset(False)
+        self.setValue(0)
+        self.title = title
+        self.canceled.connect(worker.cancel)
+        worker.progress.connect(self.update_progress)
+
+    def update_progress(self, done, total):
+        self.setValue(done)
+        self.setLabelText(f'{self.title}: {done} / {total}')
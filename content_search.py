@@ -0,0 +1,223 @@
+import os
+import re
+import mmap
+import time
+import fnmatch
+from concurrent.futures import wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from search_engine import SearchResultsModel
+from utils import process_pool
+
+# 判断二进制文件时读取的字节数
+SNIFF_SIZE = 8192
+# 每个文件最多报告的匹配行数
+MAX_HITS_PER_FILE = 100
+# 片段最大长度（字节）
+SNIPPET_SIZE = 200
+# 每个进程任务包含的文件数和字节数上限
+TASK_FILES = 64
+TASK_BYTES = 64 * 1024 * 1024
+# 统计行号时每次切片的大小
+COUNT_CHUNK = 1024 * 1024
+
+
+def compile_pattern(text, mode='substring', case_sensitive=False):
+    """ 生成在字节上匹配的正则（忽略大小写只对 ASCII 生效）
+
+    在整个文件上查找，^ 和 $ 按行匹配；通配符可以出现在行内任意位置，
+    * 和 ? 不跨行。
+    """
+    flags = re.MULTILINE if case_sensitive else re.MULTILINE | re.IGNORECASE
+    if mode == 'regex':
+        pattern = text
+    elif mode == 'glob':
+        # 去掉 fnmatch 加上的整串锚定和 DOTALL
+        pattern = fnmatch.translate(text)
+        if pattern.startswith('(?s:') and pattern.endswith(r')\Z'):
+            pattern = pattern[4:-3]
+    else:
+        pattern = re.escape(text)
+    return re.compile(pattern.encode('utf-8'), flags)
+
+
+def _count_newlines(mm, start, end):
+    count = 0
+    while start < end:
+        stop = min(start + COUNT_CHUNK, end)
+        count += mm[start:stop].count(b'\n')
+        start = stop
+    return count
+
+
+def scan_file(path, pattern):
+    """ 用 mmap 在文件中查找，返回 [(行号, 片段), ...] """
+    hits = []
+    try:
+        with open(path, 'rb') as f:
+            if b'\0' in f.read(SNIFF_SIZE):
+                return hits  # 二进制文件
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return hits
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                line_no = 1
+                counted_to = 0
+                pos = 0
+                while len(hits) < MAX_HITS_PER_FILE:
+                    match = pattern.search(mm, pos)
+                    if match is None:
+                        break
+                    start = match.start()
+                    line_start = mm.rfind(b'\n', 0, start) + 1
+                    line_end = mm.find(b'\n', start)
+                    if line_end < 0:
+                        line_end = size
+                    line_no += _count_newlines(mm, counted_to, line_start)
+                    counted_to = line_start
+                    # 片段以匹配位置为中心截取，避免超长行
+                    snippet_start = max(line_start, start - SNIPPET_SIZE // 2)
+                    snippet_end = min(line_end, snippet_start + SNIPPET_SIZE)
+                    snippet = mm[snippet_start:snippet_end].decode('utf-8', 'replace')
+                    hits.append((line_no, snippet.strip()))
+                    # 每行只报告一次
+                    pos = line_end + 1
+                    if pos >= size:
+                        break
+    except (OSError, ValueError):
+        pass
+    return hits
+
+
+def scan_files(paths, pattern):
+    """ 进程池任务：扫描一组文件，返回 [(路径, 行号, 片段), ...] """
+    results = []
+    for path in paths:
+        for line_no, snippet in scan_file(path, pattern):
+            results.append((path, line_no, snippet))
+    return results
+
+
+class ContentSearchWorker(QThread):
+    # 一批匹配结果: [(路径, 行号, 片段), ...]
+    results_found = pyqtSignal(list)
+    # 已扫描文件数, 每秒扫描字节数
+    progress = pyqtSignal(int, float)
+    # 匹配数, 扫描文件数, 耗时
+    search_finished = pyqtSignal(int, int, float)
+    # 后台进程意外退出等导致搜索中断时的错误信息
+    search_failed = pyqtSignal(str)
+
+    def __init__(self, root, text, mode='substring', recursive=True,
+                 case_sensitive=False, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.recursive = recursive
+        self.pattern = compile_pattern(text, mode, case_sensitive)
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def iter_tasks(self):
+        # 把文件按数量和大小分组，减少进程间通信次数
+        paths, task_bytes = [], 0
+        stack = [self.root]
+        while stack and not self._cancelled:
+            try:
+                it = os.scandir(stack.pop())
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if self.recursive:
+                                stack.append(entry.path)
+                            continue
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+                        size = entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+                    paths.append(entry.path)
+                    task_bytes += size
+                    if len(paths) >= TASK_FILES or task_bytes >= TASK_BYTES:
+                        yield paths, task_bytes
+                        paths, task_bytes = [], 0
+        if paths:
+            yield paths, task_bytes
+
+    def run(self):
+        pool = process_pool()
+        max_pending = (os.cpu_count() or 1) * 4
+        pending = {}
+        matched = scanned = scanned_bytes = 0
+        start = last_progress = time.monotonic()
+
+        def collect(done):
+            nonlocal matched, scanned, scanned_bytes
+            for future in done:
+                count, size = pending.pop(future)
+                scanned += count
+                scanned_bytes += size
+                if future.cancelled():
+                    continue
+                error = future.exception()
+                if isinstance(error, BrokenProcessPool):
+                    raise error
+                if error is not None:
+                    continue
+                results = future.result()
+                if results:
+                    matched += len(results)
+                    self.results_found.emit(results)
+
+        try:
+            for paths, size in self.iter_tasks():
+                pending[pool.submit(scan_files, paths, self.pattern)] = (len(paths), size)
+                # 限制排队任务数量，避免遍历远快于扫描时占满内存
+                while len(pending) >= max_pending and not self._cancelled:
+                    done, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                    collect(done)
+                now = time.monotonic()
+                if now - last_progress >= 0.25:
+                    self.progress.emit(scanned, scanned_bytes / (now - start))
+                    last_progress = now
+                if self._cancelled:
+                    break
+
+            while pending:
+                if self._cancelled:
+                    for future in pending:
+                        future.cancel()
+                done, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                collect(done)
+                now = time.monotonic()
+                if now - last_progress >= 0.25:
+                    self.progress.emit(scanned, scanned_bytes / (now - start))
+                    last_progress = now
+        except BrokenProcessPool as e:
+            # 进程池已损坏，剩下的任务不会再完成；下次搜索时会换新的进程池
+            for future in pending:
+                future.cancel()
+            self.search_failed.emit(str(e) or '后台进程意外退出')
+        finally:
+            self.search_finished.emit(matched, scanned, time.monotonic() - start)
+
+
+class ContentResultsModel(SearchResultsModel):
+    HEADERS = ['文件', '行号', '内容']
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        path, line_no, snippet = self.results[index.row()]
+        if role == Qt.ToolTipRole:
+            return path
+        if role != Qt.DisplayRole:
+            return None
+        return [path, str(line_no), snippet][index.column()]
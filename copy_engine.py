@@ -0,0 +1,657 @@
+import os
+import sys
+import time
+import queue
+import errno
+import shutil
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from PyQt5.QtWidgets import (QProgressDialog, QDialog, QVBoxLayout, QHBoxLayout, QLabel,
+                             QPushButton, QTableWidget, QTableWidgetItem, QAbstractItemView,
+                             QHeaderView, QFileDialog, QMessageBox)
+from PyQt5.QtCore import QThread, pyqtSignal
+from utils import format_size
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# 小于该大小的文件整体复制，不报告中间进度
+SMALL_FILE_LIMIT = 8 * 1024 * 1024
+# 每次交给内核复制的字节数，决定进度和取消的响应粒度
+KERNEL_CHUNK = 16 * 1024 * 1024
+# 用户态复制的缓冲区大小范围，按实际速度自动调整
+MIN_BUFFER = 1024 * 1024
+MAX_BUFFER = 16 * 1024 * 1024
+# Linux 的 FICLONE ioctl，btrfs/XFS 等文件系统上共享数据块
+FICLONE = 0x40049409
+# 内核复制方法不可用时的错误码，遇到后退回下一种方法
+FALLBACK_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EBADF,
+                   errno.EOPNOTSUPP, errno.ENOTSUP, errno.ETXTBSY}
+# 复制线程数，读写在系统调用期间会释放 GIL
+COPY_THREADS = 16
+PROGRESS_INTERVAL = 0.2
+# 校验复制时每次读取的块大小，以及读取线程最多领先写入的块数
+VERIFY_BUFFER = 4 * 1024 * 1024
+PIPELINE_DEPTH = 4
+
+
+class CopyCancelled(Exception):
+    pass
+
+
+def unique_name(dest_dir, name, taken=()):
+    """ 目标已存在时生成 "名称 - 副本" 形式的新名称
+
+    taken 是同一批操作中已经分配出去、但还没有写到磁盘上的名称。
+    """
+    def exists(candidate):
+        return candidate in taken or os.path.lexists(os.path.join(dest_dir, candidate))
+
+    if not exists(name):
+        return name
+    stem, ext = os.path.splitext(name)
+    candidate = f'{stem} - 副本{ext}'
+    counter = 2
+    while exists(candidate):
+        candidate = f'{stem} - 副本 ({counter}){ext}'
+        counter += 1
+    return candidate
+
+
+def plan_copy(sources, dest_dir, rename_conflicts=True, errors=None):
+    """ 展开要复制的源，返回 (目录列表, 文件列表, 总字节数)
+
+    目录列表为 [(源, 目标), ...]，父目录总在子目录之前；
+    文件列表为 [(源, 目标, 大小), ...]。
+    rename_conflicts 为 False 时目标已存在直接报错。
+    给出 errors 列表时，读不了的项目记入其中并跳过，否则直接报错。
+    """
+    def failed(path, error):
+        if errors is None:
+            raise error
+        errors.append((path, str(error)))
+
+    dirs = []
+    files = []
+    total = 0
+    # 本批已分配的目标名称，同名的源不会复制到同一个目标
+    taken = set()
+    for src in sources:
+        src = os.path.abspath(src)
+        name = os.path.basename(src)
+        if rename_conflicts:
+            name = unique_name(dest_dir, name, taken)
+        elif name in taken or os.path.lexists(os.path.join(dest_dir, name)):
+            failed(src, OSError(f'目标位置已存在同名项目: {name}'))
+            continue
+        target = os.path.join(dest_dir, name)
+        try:
+            is_dir = os.path.isdir(src) and not os.path.islink(src)
+            size = 0 if is_dir else os.lstat(src).st_size
+        except OSError as e:
+            failed(src, e)
+            continue
+        if is_dir:
+            dest = os.path.abspath(dest_dir)
+            if dest == src or dest.startswith(src.rstrip(os.sep) + os.sep):
+                failed(src, OSError(f'不能把文件夹复制到它自身内部: {src}'))
+                continue
+            taken.add(name)
+            dirs.append((src, target))
+            stack = [(src, target)]
+            while stack:
+                src_dir, dst_dir = stack.pop()
+                try:
+                    with os.scandir(src_dir) as it:
+                        for entry in it:
+                            dst = os.path.join(dst_dir, entry.name)
+                            try:
+                                if entry.is_dir(follow_symlinks=False):
+                                    dirs.append((entry.path, dst))
+                                    stack.append((entry.path, dst))
+                                    continue
+                                size = entry.stat(follow_symlinks=False).st_size
+                            except OSError as e:
+                                failed(entry.path, e)
+                                continue
+                            files.append((entry.path, dst, size))
+                            total += size
+                except OSError as e:
+                    failed(src_dir, e)
+        else:
+            taken.add(name)
+            files.append((src, target, size))
+            total += size
+    return dirs, files, total
+
+
+def _try_reflink(src_fd, dst_fd):
+    if fcntl is None or not sys.platform.startswith('linux'):
+        return False
+    try:
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+        return True
+    except OSError:
+        return False
+
+
+def _data_segments(fd, size):
+    """ 用 SEEK_DATA/SEEK_HOLE 找出稀疏文件中有数据的区间 """
+    pos = 0
+    while pos < size:
+        try:
+            start = os.lseek(fd, pos, os.SEEK_DATA)
+        except OSError as e:
+            if e.errno == errno.ENXIO:  # 后面全是空洞
+                return
+            # 文件系统不支持时按整个文件复制
+            yield pos, size
+            return
+        end = min(os.lseek(fd, start, os.SEEK_HOLE), size)
+        yield start, end
+        pos = end
+
+
+def _copy_methods():
+    methods = []
+    if hasattr(os, 'copy_file_range'):
+        methods.append('copy_file_range')
+    if sys.platform.startswith('linux'):
+        methods.append('sendfile')
+    methods.append('readwrite')
+    return methods
+
+
+def _copy_segment(src_fd, dst_fd, start, end, methods, progress, is_cancelled):
+    """ 复制 [start, end) 区间，methods 中不可用的方法会被移除 """
+    pos = start
+    buffer_size = MIN_BUFFER
+    seek_to = start
+    while pos < end:
+        if is_cancelled and is_cancelled():
+            raise CopyCancelled()
+        method = methods[0]
+        try:
+            if method == 'copy_file_range':
+                copied = os.copy_file_range(src_fd, dst_fd, min(KERNEL_CHUNK, end - pos), pos, pos)
+            elif method == 'sendfile':
+                os.lseek(dst_fd, pos, os.SEEK_SET)
+                copied = os.sendfile(dst_fd, src_fd, pos, min(KERNEL_CHUNK, end - pos))
+            else:
+                if seek_to is not None:
+                    os.lseek(src_fd, pos, os.SEEK_SET)
+                    os.lseek(dst_fd, pos, os.SEEK_SET)
+                    seek_to = None
+                began = time.monotonic()
+                data = os.read(src_fd, min(buffer_size, end - pos))
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(dst_fd, view):]
+                copied = len(data)
+                # 一块很快写完说明介质够快，加大缓冲区减少系统调用
+                if time.monotonic() - began < 0.05 and buffer_size < MAX_BUFFER:
+                    buffer_size *= 2
+        except OSError as e:
+            if method != 'readwrite' and e.errno in FALLBACK_ERRNOS:
+                methods.pop(0)
+                continue
+            raise
+        if copied == 0:
+            if method != 'readwrite':
+                # 部分文件系统上内核复制返回 0，退回下一种方法
+                methods.pop(0)
+                continue
+            break  # 源文件在复制过程中变短
+        pos += copied
+        if progress:
+            progress(copied)
+
+
+def fast_copy_file(src, dst, progress=None, is_cancelled=None):
+    """ 复制大文件，依次尝试 reflink、copy_file_range/sendfile 和用户态复制
+
+    稀疏文件只复制有数据的区间，空洞在目标中保留。
+    返回实际使用的复制方法。
+    """
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+        st = os.fstat(src_fd)
+        size = st.st_size
+        if size and _try_reflink(src_fd, dst_fd):
+            if progress:
+                progress(size)
+            return 'reflink'
+
+        blocks = getattr(st, 'st_blocks', None)
+        sparse = blocks is not None and hasattr(os, 'SEEK_DATA') and blocks * 512 < size
+        segments = _data_segments(src_fd, size) if sparse else [(0, size)]
+        methods = _copy_methods()
+        done = 0
+        for start, end in segments:
+            if progress and start > done:
+                progress(start - done)  # 空洞计入进度
+            _copy_segment(src_fd, dst_fd, start, end, methods, progress, is_cancelled)
+            done = end
+        if sparse:
+            os.ftruncate(dst_fd, size)
+            if progress and size > done:
+                progress(size - done)
+        return 'sparse' if sparse else methods[0]
+
+
+def new_verify_hash():
+    # 有 SHA 指令扩展的 CPU 上 SHA-256 比 BLAKE2 更快
+    return hashlib.sha256()
+
+
+def _drop_cache(fd):
+    """ 丢弃文件的页缓存，之后的读取来自磁盘而不是内存 """
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        except OSError:
+            pass
+
+
+def _write_all(fd, data):
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def _pipelined_copy(fsrc, dst_fd, src_hash, progress, is_cancelled):
+    """ 读取线程读块并计算哈希，当前线程同时写入上一块 """
+    blocks = queue.Queue(maxsize=PIPELINE_DEPTH)
+    stop = threading.Event()
+
+    def reader():
+        try:
+            while not stop.is_set():
+                data = fsrc.read(VERIFY_BUFFER)
+                blocks.put(data)
+                if not data:
+                    return
+                # hashlib 处理大块数据时释放 GIL，与写入并行
+                src_hash.update(data)
+        except BaseException as e:
+            blocks.put(e)
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    try:
+        while True:
+            if is_cancelled and is_cancelled():
+                raise CopyCancelled()
+            data = blocks.get()
+            if isinstance(data, BaseException):
+                raise data
+            if not data:
+                break
+            _write_all(dst_fd, data)
+            if progress:
+                progress(len(data))
+    finally:
+        stop.set()
+        # 让读取线程从阻塞的 put 中退出
+        while thread.is_alive():
+            try:
+                blocks.get(timeout=0.05)
+            except queue.Empty:
+                pass
+        thread.join()
+
+
+def verified_copy_file(src, dst, progress=None, is_cancelled=None):
+    """ 复制文件并校验，返回 (源哈希, 目标哈希)
+
+    源数据只读一次，在读取的同时计算哈希。写完后 fsync 并丢弃目标的
+    页缓存，再从磁盘读回目标计算哈希，能发现写入介质上的损坏。
+    """
+    src_hash = new_verify_hash()
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        dst_fd = fdst.fileno()
+        if os.fstat(fsrc.fileno()).st_size <= SMALL_FILE_LIMIT:
+            if is_cancelled and is_cancelled():
+                raise CopyCancelled()
+            data = fsrc.read()
+            src_hash.update(data)
+            _write_all(dst_fd, data)
+            if progress:
+                progress(len(data))
+        else:
+            _pipelined_copy(fsrc, dst_fd, src_hash, progress, is_cancelled)
+        os.fsync(dst_fd)
+        _drop_cache(dst_fd)
+    with open(dst, 'rb') as f:
+        _drop_cache(f.fileno())
+        dst_digest = hashlib.file_digest(f, new_verify_hash).hexdigest()
+    return src_hash.hexdigest(), dst_digest
+
+
+class CopyWorker(QThread):
+    # 已完成文件数, 总文件数, 已复制字节, 总字节, 每秒字节数
+    progress = pyqtSignal(int, int, object, object, float)
+    # 复制的文件数, 错误列表 [(路径, 原因), ...], 是否取消, 耗时
+    job_finished = pyqtSignal(int, list, bool, float)
+
+    def __init__(self, sources, dest_dir, parent=None, verify_contents=False):
+        super().__init__(parent)
+        self.sources = list(sources)
+        self.dest_dir = dest_dir
+        self.verify_contents = verify_contents
+        # 校验报告: [(源, 目标, 大小, 源哈希, 目标哈希, 结果), ...]
+        self.report = []
+        self._cancelled = False
+        self.lock = threading.Lock()
+        self.files_done = self.files_total = 0
+        self.bytes_done = self.bytes_total = 0
+        self.started_at = self.last_progress = time.monotonic()
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def add_bytes(self, count):
+        with self.lock:
+            self.bytes_done += count
+
+    def add_report(self, *row):
+        with self.lock:
+            self.report.append(row)
+
+    def copy_verified(self, src, dst, size):
+        """ 校验模式下不能用内核复制，数据必须经过用户态计算哈希 """
+        try:
+            src_digest, dst_digest = verified_copy_file(src, dst, self.add_bytes, self.is_cancelled)
+        except CopyCancelled:
+            raise
+        except OSError as e:
+            self.add_report(src, dst, size, '', '', f'失败: {str(e)}')
+            raise
+        if src_digest != dst_digest:
+            self.add_report(src, dst, size, src_digest, dst_digest, '不一致')
+            raise OSError('校验失败: 目标内容与源不一致')
+        self.add_report(src, dst, size, src_digest, dst_digest, '一致')
+        shutil.copystat(src, dst)
+
+    def copy_one(self, src, dst, size):
+        try:
+            if os.path.islink(src):
+                os.symlink(os.readlink(src), dst)
+            elif self.verify_contents:
+                self.copy_verified(src, dst, size)
+            elif size <= SMALL_FILE_LIMIT:
+                if self._cancelled:
+                    raise CopyCancelled()
+                shutil.copyfile(src, dst)
+                shutil.copystat(src, dst)
+                self.add_bytes(size)
+            else:
+                fast_copy_file(src, dst, self.add_bytes, self.is_cancelled)
+                shutil.copystat(src, dst)
+        except BaseException:
+            # 删除写了一半的目标文件
+            try:
+                if os.path.lexists(dst):
+                    os.remove(dst)
+            except OSError:
+                pass
+            raise
+
+    def emit_progress(self, force=False):
+        now = time.monotonic()
+        if force or now - self.last_progress >= PROGRESS_INTERVAL:
+            rate = self.bytes_done / max(now - self.started_at, 1e-6)
+            self.progress.emit(self.files_done, self.files_total, self.bytes_done,
+                               self.bytes_total, rate)
+            self.last_progress = now
+
+    def copy_tree(self, dirs, files):
+        """ 复制 plan_copy 展开的目录和文件，返回错误列表 """
+        errors = []
+        # 先一次性建好所有目录，复制线程不再互相竞争创建父目录
+        failed_dirs = set()
+        for src, dst in dirs:
+            try:
+                os.makedirs(dst, exist_ok=True)
+            except OSError as e:
+                failed_dirs.add(dst)
+                errors.append((src, str(e)))
+
+        with ThreadPoolExecutor(max_workers=COPY_THREADS) as pool:
+            pending = {}
+            queue = iter(files)
+            while not self._cancelled:
+                # 限制排队任务，取消时能尽快停下
+                for src, dst, size in queue:
+                    if os.path.dirname(dst) in failed_dirs:
+                        continue
+                    pending[pool.submit(self.copy_one, src, dst, size)] = src
+                    if len(pending) >= COPY_THREADS * 4:
+                        break
+                if not pending:
+                    break
+                done, _ = wait(pending, timeout=PROGRESS_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    src = pending.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        self.files_done += 1
+                    elif not isinstance(error, CopyCancelled):
+                        errors.append((src, str(error)))
+                self.emit_progress()
+            # 取消时等待进行中的文件自行清理
+            wait(pending)
+
+        # 目录的时间戳在文件写完后再恢复，从最深的目录开始
+        for src, dst in reversed(dirs):
+            if dst not in failed_dirs and os.path.isdir(dst):
+                try:
+                    shutil.copystat(src, dst)
+                except OSError:
+                    pass
+        return errors
+
+    def run(self):
+        self.started_at = self.last_progress = time.monotonic()
+        plan_errors = []
+        try:
+            dirs, files, self.bytes_total = plan_copy(self.sources, self.dest_dir,
+                                                      errors=plan_errors)
+        except OSError as e:
+            self.job_finished.emit(0, [(self.dest_dir, str(e))], False, 0.0)
+            return
+        self.files_total = len(files)
+        errors = plan_errors + self.copy_tree(dirs, files)
+        self.job_finished.emit(self.files_done, errors, self._cancelled,
+                               time.monotonic() - self.started_at)
+
+
+class MoveWorker(CopyWorker):
+    """ 移动文件：同一设备上直接 rename，跨设备时逐项复制、校验后删除源 """
+
+    def move_plan(self):
+        renames = []
+        copies = []
+        errors = []
+        dest_dev = os.stat(self.dest_dir).st_dev
+        dest = os.path.abspath(self.dest_dir)
+        # 本批已占用的目标名称，同名的源不会互相覆盖
+        taken = set()
+        for src in self.sources:
+            src = os.path.abspath(src)
+            if os.path.dirname(src) == dest:
+                continue  # 已经在目标目录中
+            if dest == src or dest.startswith(src.rstrip(os.sep) + os.sep):
+                errors.append((src, '不能把文件夹移动到它自身内部'))
+                continue
+            target = os.path.join(dest, os.path.basename(src))
+            try:
+                if os.path.basename(src) in taken or os.path.lexists(target):
+                    raise OSError(f'目标位置已存在同名项目: {os.path.basename(src)}')
+                taken.add(os.path.basename(src))
+                if os.lstat(src).st_dev == dest_dev:
+                    renames.append((src, target))
+                else:
+                    copies.append((src, plan_copy([src], dest, rename_conflicts=False)))
+            except OSError as e:
+                errors.append((src, str(e)))
+        return renames, copies, errors
+
+    def run(self):
+        self.started_at = self.last_progress = time.monotonic()
+        try:
+            renames, copies, errors = self.move_plan()
+        except OSError as e:
+            self.job_finished.emit(0, [(self.dest_dir, str(e))], False, 0.0)
+            return
+        self.files_total = len(renames) + sum(len(files) for _, (_, files, _) in copies)
+        self.bytes_total = sum(total for _, (_, _, total) in copies)
+
+        for src, target in renames:
+            if self._cancelled:
+                break
+            try:
+                # 同一文件系统内移动不复制任何数据
+                os.rename(src, target)
+                self.files_done += 1
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    errors.append((src, str(e)))
+                    continue
+                # 同一设备号但跨挂载点（如 bind mount）时退回复制
+                try:
+                    plan = plan_copy([src], os.path.dirname(target), rename_conflicts=False)
+                except OSError as e:
+                    errors.append((src, str(e)))
+                    continue
+                copies.append((src, plan))
+                # 原先按一次重命名计数
+                self.files_total += len(plan[1]) - 1
+                self.bytes_total += plan[2]
+        self.emit_progress(force=True)
+
+        # 跨设备移动在删除源之前必须确认副本内容一致：复制时总是计算源的
+        # 哈希并读回目标比较，不一致的项目保留源
+        show_report = self.verify_contents
+        self.verify_contents = True
+        for src, (dirs, files, _) in copies:
+            if self._cancelled:
+                break
+            target = dirs[0][1] if dirs and dirs[0][0] == src else files[0][1]
+            item_errors = self.copy_tree(dirs, files)
+            if item_errors or self._cancelled:
+                # 源保持不动，删除不完整的副本
+                errors.extend(item_errors)
+                self.remove(target)
+                continue
+            try:
+                self.remove(src)
+            except OSError as e:
+                errors.append((src, f'已复制但无法删除源: {str(e)}'))
+        self.verify_contents = show_report
+        if not show_report:
+            # 用户没有要求校验时不显示校验报告
+            self.report = []
+        self.job_finished.emit(self.files_done, errors, self._cancelled,
+                               time.monotonic() - self.started_at)
+
+    @staticmethod
+    def remove(path):
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        elif os.path.lexists(path):
+            os.remove(path)
+
+
+class CopyProgressDialog(QProgressDialog):
+    def __init__(self, worker, title='复制文件', parent=None):
+        super().__init__('正在统计文件...', '取消', 0, 1000, parent)
+        self.setWindowTitle(title)
+        self.setMinimumDuration(300)
+        self.setAutoClose(False)
+        self.setAutoReset(False)
+        self.setValue(0)
+        self.worker = worker
+        self.canceled.connect(worker.cancel)
+        worker.progress.connect(self.update_progress)
+
+    def update_progress(self, files_done, files_total, bytes_done, bytes_total, rate):
+        if bytes_total:
+            self.setValue(int(bytes_done * 1000 / bytes_total))
+        elif files_total:
+            self.setValue(int(files_done * 1000 / files_total))
+        eta = (bytes_total - bytes_done) / rate if rate > 0 else 0
+        self.setLabelText(
+            f'文件: {files_done} / {files_total}\n'
+            f'大小: {format_size(bytes_done)} / {format_size(bytes_total)}\n'
+            f'速度: {format_size(rate)}/秒  剩余时间: {format_eta(eta)}')
+
+
+class VerifyReportDialog(QDialog):
+    """ 校验复制的逐文件报告 """
+
+    HEADERS = ['源文件', '大小', '哈希 (SHA-256)', '结果']
+
+    def __init__(self, report, parent=None):
+        super().__init__(parent)
+        self.report = sorted(report, key=lambda row: (row[5] == '一致', row[0]))
+        self.setWindowTitle('复制校验报告')
+        self.resize(850, 450)
+
+        layout = QVBoxLayout(self)
+        failed = sum(1 for row in self.report if row[5] != '一致')
+        total = sum(row[2] for row in self.report)
+        summary = f'共校验 {len(self.report)} 个文件（{format_size(total)}）'
+        summary += f'，{failed} 个失败' if failed else '，全部一致'
+        layout.addWidget(QLabel(summary))
+
+        table = QTableWidget(len(self.report), len(self.HEADERS))
+        table.setHorizontalHeaderLabels(self.HEADERS)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        for row, (src, dst, size, src_digest, dst_digest, result) in enumerate(self.report):
+            digest = src_digest if src_digest == dst_digest else f'{src_digest} / {dst_digest}'
+            for column, value in enumerate([src, format_size(size), digest, result]):
+                item = QTableWidgetItem(value)
+                item.setToolTip(f'{src} -> {dst}')
+                table.setItem(row, column, item)
+        layout.addWidget(table)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        save_button = QPushButton('保存报告')
+        save_button.clicked.connect(self.save_report)
+        close_button = QPushButton('关闭')
+        close_button.clicked.connect(self.accept)
+        button_layout.addWidget(save_button)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+    def save_report(self):
+        path, _ = QFileDialog.getSaveFileName(self, '保存报告', 'verify_report.tsv',
+                                              '制表符分隔文件 (*.tsv)')
+        if not path:
+            return
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('源文件\t目标文件\t大小\t源哈希\t目标哈希\t结果\n')
+                for row in self.report:
+                    f.write('\t'.join(str(value) for value in row) + '\n')
+        except OSError as e:
+            QMessageBox.warning(self, '错误', f'无法保存报告: {str(e)}')
+
+
+def format_eta(seconds):
+    seconds = int(seconds)
+    if seconds < 60:
+        return f'{seconds} 秒'
+    if seconds < 3600:
+        return f'{seconds // 60} 分 {seconds % 60} 秒'
+    return f'{seconds // 3600} 小时 {seconds % 3600 // 60} 分'
@@ -0,0 +1,768 @@
+import os
+import re
+import stat
+import time
+import heapq
+import locale
+from array import array
+from collections import OrderedDict
+from PyQt5.QtCore import (Qt, QAbstractTableModel, QModelIndex, QThread, QFileInfo,
+                          QMimeData, QUrl, pyqtSignal)
+from utils import format_size
+
+# 超过该条目数的目录自动使用 DirModel
+LARGE_DIR_THRESHOLD = 50000
+# 第一批尽快送出，保证首屏很快出现
+FIRST_CHUNK = 256
+# 之后每批的条数和间隔逐次翻倍：QTreeView 每次插入都会重新布局全部行，
+# 批次数保持在对数级别
+MAX_CHUNK = 200000
+CHUNK_INTERVAL = 0.1
+MAX_CHUNK_INTERVAL = 1.0
+
+# 排序时每段的长度：分段排序再归并，避免一次排序长时间占住 GIL
+SORT_RUN = 1 << 16
+# 多列排序最多保留的列数
+MAX_SORT_COLUMNS = 3
+
+# 目录快照缓存的总条目数上限（每个条目连同排序键约占 200 字节）
+SNAPSHOT_ENTRIES = 300000
+# 目录快照缓存最多保存的目录数
+MAX_SNAPSHOTS = 256
+
+FLAG_DIR = 1
+FLAG_LINK = 2
+FLAG_EXEC = 4
+FLAG_HIDDEN = 8
+# 监视到已删除的条目只做标记，记录号保持不变
+FLAG_REMOVED = 16
+
+
+def count_entries(path, limit=LARGE_DIR_THRESHOLD):
+    """ 统计目录条目数，数到 limit 为止 """
+    count = 0
+    try:
+        with os.scandir(path) as it:
+            for _ in it:
+                count += 1
+                if count >= limit:
+                    break
+    except OSError:
+        pass
+    return count
+
+
+def is_hidden(name, st):
+    if name.startswith('.'):
+        return True
+    attributes = getattr(st, 'st_file_attributes', 0)
+    return bool(attributes & getattr(stat, 'FILE_ATTRIBUTE_HIDDEN', 0))
+
+
+def entry_flags(name, st, target_is_dir):
+    """ 由 lstat 结果计算条目标志，target_is_dir 只对符号链接调用 """
+    flag = 0
+    if stat.S_ISLNK(st.st_mode):
+        flag |= FLAG_LINK
+        try:
+            if target_is_dir():
+                flag |= FLAG_DIR
+        except OSError:
+            pass
+    elif stat.S_ISDIR(st.st_mode):
+        flag |= FLAG_DIR
+    elif st.st_mode & 0o111:
+        flag |= FLAG_EXEC
+    if is_hidden(name, st):
+        flag |= FLAG_HIDDEN
+    return flag
+
+
+_DIGITS = re.compile(r'\d+')
+
+
+def _pad_digits(match):
+    digits = match.group().lstrip('0') or '0'
+    # 先比较位数再比较数字本身，"file2" 排在 "file10" 之前
+    return f'{len(digits):03d}{digits}'
+
+
+def natural_key(name):
+    """ 自然排序键：数字按数值比较，其余部分按当前区域设置的排序规则 """
+    return locale.strxfrm(_DIGITS.sub(_pad_digits, name.casefold()))
+
+
+def suffix_of(name):
+    base, ext = os.path.splitext(name)
+    return ext[1:].lower() if base else ''
+
+
+def list_records(path):
+    """ 列出目录: {名称: (大小, 修改时间, 标志)} """
+    records = {}
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            records[entry.name] = (st.st_size, st.st_mtime, entry_flags(entry.name, st, entry.is_dir))
+    return records
+
+
+def sort_runs(records, key, reverse, is_cancelled):
+    """ 分段稳定排序后归并；heapq.merge 对相等元素保持输入顺序 """
+    runs = []
+    for start in range(0, len(records), SORT_RUN):
+        if is_cancelled():
+            return None
+        run = records[start:start + SORT_RUN]
+        run.sort(key=key, reverse=reverse)
+        runs.append(run)
+    if len(runs) <= 1:
+        return runs[0] if runs else []
+    return list(heapq.merge(*runs, key=key, reverse=reverse))
+
+
+class DirEntries:
+    """ 目录条目的列式存储，每个条目只占几个数组元素而不是一个对象 """
+
+    __slots__ = ('names', 'sizes', 'mtimes', 'flags')
+
+    def __init__(self):
+        self.names = []
+        self.sizes = array('q')
+        self.mtimes = array('d')
+        self.flags = array('B')
+
+    def __len__(self):
+        return len(self.names)
+
+    def extend(self, names, sizes, mtimes, flags):
+        self.names.extend(names)
+        self.sizes.extend(sizes)
+        self.mtimes.extend(mtimes)
+        self.flags.extend(flags)
+
+
+class CountWorker(QThread):
+    """ 在后台统计目录条目数，决定是否改用大目录模式 """
+
+    # 路径, 条目数（最多数到 LARGE_DIR_THRESHOLD）
+    count_finished = pyqtSignal(str, int)
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.path = path
+
+    def run(self):
+        self.count_finished.emit(self.path, count_entries(self.path))
+
+
+class DirSnapshot:
+    """ 离开目录时保存的状态
+
+    view 是视图状态（排序、滚动位置、选择），所有目录都有；大目录模式下
+    还保存完整的列表和排序结果，返回时不必重新列目录。
+    """
+
+    __slots__ = ('path', 'view', 'large', 'entries', 'order', 'sorted_all', 'name_keys',
+                 'sort_specs', 'file_filter', 'dir_mtime')
+
+    def __init__(self, path, view, large=False):
+        self.path = path
+        self.view = view
+        self.large = large
+        self.entries = None
+        self.order = None
+        self.sorted_all = None
+        self.name_keys = None
+        self.sort_specs = None
+        self.file_filter = None
+        self.dir_mtime = 0
+
+    def weight(self):
+        return 1 + (len(self.entries) if self.entries is not None else 0)
+
+
+class SnapshotCache:
+    """ 按路径保存最近离开的目录快照，超过条目数或目录数上限时淘汰最久未用的 """
+
+    def __init__(self, max_entries=SNAPSHOT_ENTRIES, max_count=MAX_SNAPSHOTS):
+        self.max_entries = max_entries
+        self.max_count = max_count
+        self.snapshots = OrderedDict()
+        # 放入时的条目数；快照之后仍可能被修改，淘汰时按放入时的值扣除
+        self.weights = {}
+        self.total = 0
+
+    def get(self, path):
+        snapshot = self.snapshots.get(path)
+        if snapshot is not None:
+            self.snapshots.move_to_end(path)
+        return snapshot
+
+    def put(self, snapshot):
+        self.discard(snapshot.path)
+        self.snapshots[snapshot.path] = snapshot
+        self.weights[snapshot.path] = snapshot.weight()
+        self.total += self.weights[snapshot.path]
+        while len(self.snapshots) > 1 and (self.total > self.max_entries or
+                                           len(self.snapshots) > self.max_count):
+            path, _ = self.snapshots.popitem(last=False)
+            self.total -= self.weights.pop(path)
+
+    def discard(self, path):
+        if self.snapshots.pop(path, None) is not None:
+            self.total -= self.weights.pop(path)
+
+
+class DirListWorker(QThread):
+    # 名称, 大小, 修改时间, 标志（四个等长列表）
+    chunk_loaded = pyqtSignal(object, object, object, object)
+    # 条目数, 耗时
+    list_finished = pyqtSignal(int, float)
+    list_error = pyqtSignal(str)
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.path = path
+        # 开始列目录前目录的修改时间，用于之后判断快照是否过期
+        self.dir_mtime = 0
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        start = last_emit = time.monotonic()
+        names, sizes, mtimes, flags = [], [], [], []
+        limit = FIRST_CHUNK
+        interval = CHUNK_INTERVAL
+        total = 0
+        try:
+            self.dir_mtime = os.stat(self.path).st_mtime_ns
+            with os.scandir(self.path) as it:
+                for entry in it:
+                    if self._cancelled:
+                        break
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    names.append(entry.name)
+                    sizes.append(st.st_size)
+                    mtimes.append(st.st_mtime)
+                    flags.append(entry_flags(entry.name, st, entry.is_dir))
+
+                    now = time.monotonic()
+                    if len(names) >= limit or now - last_emit >= interval:
+                        total += len(names)
+                        self.chunk_loaded.emit(names, sizes, mtimes, flags)
+                        names, sizes, mtimes, flags = [], [], [], []
+                        limit = min(max(limit, total) * 2, MAX_CHUNK)
+                        interval = min(interval * 2, MAX_CHUNK_INTERVAL)
+                        last_emit = now
+        except OSError as e:
+            self.list_error.emit(str(e))
+        if names:
+            total += len(names)
+            self.chunk_loaded.emit(names, sizes, mtimes, flags)
+        self.list_finished.emit(total, time.monotonic() - start)
+
+
+class RevalidateWorker(QThread):
+    """ 目录修改时间与快照不同时重新列出目录，送出与快照的差异 """
+
+    # [(名称, (大小, 修改时间, 标志) 或 None), ...], 目录修改时间
+    changes_found = pyqtSignal(object, object)
+
+    def __init__(self, path, entries, dir_mtime, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.entries = entries
+        self.dir_mtime = dir_mtime
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        try:
+            dir_mtime = os.stat(self.path).st_mtime_ns
+            records = list_records(self.path) if dir_mtime != self.dir_mtime else None
+        except OSError:
+            dir_mtime, records = self.dir_mtime, None
+        if records is None:
+            self.changes_found.emit([], dir_mtime)
+            return
+        entries = self.entries
+        changes = []
+        known = set()
+        for i, name in enumerate(entries.names):
+            if entries.flags[i] & FLAG_REMOVED:
+                continue
+            known.add(name)
+            record = records.get(name)
+            if record is None:
+                changes.append((name, None))
+            elif record != (entries.sizes[i], entries.mtimes[i], entries.flags[i]):
+                changes.append((name, record))
+        changes += [(name, record) for name, record in records.items() if name not in known]
+        if not self._cancelled:
+            self.changes_found.emit(changes, dir_mtime)
+
+
+class SortWorker(QThread):
+    # 排好序的全部记录号, 名称排序键
+    sort_finished = pyqtSignal(object, object)
+
+    def __init__(self, entries, specs, name_keys, parent=None):
+        """ specs 为 [(列, 顺序), ...]，第一项是主排序列 """
+        super().__init__(parent)
+        self.entries = entries
+        self.specs = list(specs)
+        self.name_keys = list(name_keys)
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        entries = self.entries
+        names = entries.names
+        count = len(names)
+        keys = self.name_keys
+        # 名称排序键按记录缓存，只为新增的条目计算
+        for start in range(len(keys), count, SORT_RUN):
+            if self._cancelled:
+                return
+            keys.extend(natural_key(name) for name in names[start:min(start + SORT_RUN, count)])
+
+        columns = {
+            0: keys.__getitem__,
+            1: entries.sizes.__getitem__,
+            2: lambda i: (suffix_of(names[i]), keys[i]),
+            3: entries.mtimes.__getitem__,
+        }
+        records = list(range(count))
+        # 从次要列到主要列依次稳定排序，得到多列排序结果
+        for column, order in reversed(self.specs):
+            records = sort_runs(records, columns[column], order == Qt.DescendingOrder,
+                                self.is_cancelled)
+            if records is None:
+                return
+        # 与 QFileSystemModel 一样文件夹排在前面
+        flags = entries.flags
+        records = ([i for i in records if flags[i] & FLAG_DIR] +
+                   [i for i in records if not flags[i] & FLAG_DIR])
+        if not self._cancelled:
+            self.sort_finished.emit(array('L', records), keys)
+
+
+class DirModel(QAbstractTableModel):
+    """ 面向超大目录的扁平模型
+
+    条目由 DirListWorker 分批送来并增量插入；视图的行通过 order 数组
+    映射到 DirEntries 中的记录，排序只需重排 order。
+    """
+
+    HEADERS = ['名称', '大小', '类型', '修改日期']
+
+    # 目录加载完成: 路径, 条目数, 耗时
+    load_finished = pyqtSignal(str, int, float)
+    sort_started = pyqtSignal()
+    # 排序耗时
+    sort_done = pyqtSignal(float)
+
+    def __init__(self, icon_provider=None, parent=None):
+        super().__init__(parent)
+        self.icon_provider = icon_provider
+        self.root_path = ''
+        self.entries = DirEntries()
+        self.order = array('L')
+        # 当前筛选器；为 None 时只隐藏隐藏文件
+        self.file_filter = None
+        # 排序列，最近点击的在前: [(列, 顺序), ...]
+        self.sort_specs = []
+        # 按当前排序排好的全部记录，放宽筛选时直接从中筛出
+        self.sorted_all = None
+        self.name_keys = []
+        self.sort_worker = None
+        self.sort_started_at = 0
+        self.worker = None
+        # 名称到记录号，收到第一批监视变化时才建立
+        self.records_by_name = None
+        # 加载期间收到的监视变化，加载完成后再应用
+        self.pending_changes = []
+        # 列目录时目录的修改时间
+        self.dir_mtime = 0
+        self.revalidate_worker = None
+
+    def rootPath(self):
+        return self.root_path
+
+    def load(self, path):
+        self.stop()
+        self.beginResetModel()
+        self.root_path = path
+        self.entries = DirEntries()
+        self.order = array('L')
+        self.sorted_all = None
+        self.name_keys = []
+        self.records_by_name = None
+        self.pending_changes = []
+        self.endResetModel()
+
+        worker = DirListWorker(path)
+        worker.chunk_loaded.connect(self.on_chunk_loaded)
+        worker.list_finished.connect(self.on_list_finished)
+        worker.finished.connect(worker.deleteLater)
+        self.worker = worker
+        worker.start()
+
+    def reload(self):
+        self.load(self.root_path)
+
+    def snapshot(self, view):
+        """ 保存当前列表和排序结果，条目数组不复制，重新加载时会换成新的 """
+        snapshot = DirSnapshot(self.root_path, view, large=True)
+        if self.worker is None:
+            snapshot.entries = self.entries
+            snapshot.order = self.order
+            snapshot.sorted_all = self.sorted_all
+            snapshot.name_keys = self.name_keys
+            snapshot.sort_specs = list(self.sort_specs)
+            snapshot.file_filter = self.file_filter
+            snapshot.dir_mtime = self.dir_mtime
+        return snapshot
+
+    def restore(self, snapshot, file_filter):
+        """ 立即显示快照，然后在后台按目录修改时间检查是否过期 """
+        self.stop()
+        self.beginResetModel()
+        self.root_path = snapshot.path
+        self.entries = snapshot.entries
+        self.order = snapshot.order
+        self.sorted_all = snapshot.sorted_all
+        self.name_keys = snapshot.name_keys
+        self.sort_specs = list(snapshot.sort_specs)
+        self.file_filter = snapshot.file_filter
+        self.dir_mtime = snapshot.dir_mtime
+        self.records_by_name = None
+        self.pending_changes = []
+        self.endResetModel()
+        if file_filter is not self.file_filter:
+            self.set_file_filter(file_filter)
+
+        worker = RevalidateWorker(self.root_path, self.entries, self.dir_mtime, self)
+        worker.changes_found.connect(self.on_revalidated)
+        worker.finished.connect(worker.deleteLater)
+        self.revalidate_worker = worker
+        worker.start()
+
+    def on_revalidated(self, changes, dir_mtime):
+        if self.sender() is not self.revalidate_worker:
+            return
+        self.revalidate_worker = None
+        self.dir_mtime = dir_mtime
+        if changes:
+            self.apply_changes(changes)
+
+    def stop(self):
+        for worker in (self.worker, self.sort_worker, self.revalidate_worker):
+            if worker is not None:
+                worker.cancel()
+                worker.wait()
+        self.worker = None
+        self.sort_worker = None
+        self.revalidate_worker = None
+
+    def is_loading(self):
+        return self.worker is not None
+
+    def on_chunk_loaded(self, names, sizes, mtimes, flags):
+        if self.sender() is not self.worker:
+            return
+        first = len(self.entries)
+        self.entries.extend(names, sizes, mtimes, flags)
+        rows = self.filter_records(range(first, len(self.entries)))
+        if not rows:
+            return
+        self.beginInsertRows(QModelIndex(), len(self.order), len(self.order) + len(rows) - 1)
+        self.order.extend(rows)
+        self.endInsertRows()
+
+    def on_list_finished(self, count, elapsed):
+        if self.sender() is not self.worker:
+            return
+        self.dir_mtime = self.worker.dir_mtime
+        self.worker = None
+        changes, self.pending_changes = self.pending_changes, []
+        if changes:
+            self.apply_changes(changes)
+        self.start_sort()
+        self.load_finished.emit(self.root_path, count, elapsed)
+
+    def apply_changes(self, changes):
+        """ 按行应用监视到的变化: [(名称, (大小, 修改时间, 标志) 或 None), ...]
+
+        删除的条目从 order 中按连续区间移除，修改的条目只刷新所在行，
+        新条目追加到末尾，再在后台按当前排序重排。
+        """
+        if self.worker is not None:
+            self.pending_changes.extend(changes)
+            return
+        entries = self.entries
+        if self.records_by_name is None:
+            flags = entries.flags
+            self.records_by_name = {name: i for i, name in enumerate(entries.names)
+                                    if not flags[i] & FLAG_REMOVED}
+        records_by_name = self.records_by_name
+        removed = set()
+        updated = set()
+        added = []
+        resort = False
+        sort_columns = {column for column, _ in self.sort_specs}
+        for name, record in changes:
+            i = records_by_name.get(name)
+            if i is not None and (record is None or
+                                  (record[2] ^ entries.flags[i]) & FLAG_DIR):
+                # 删除，或者文件和文件夹互换（按新条目重新插入）
+                del records_by_name[name]
+                entries.flags[i] |= FLAG_REMOVED
+                removed.add(i)
+                i = None
+            if record is None:
+                continue
+            size, mtime, flag = record
+            if i is None:
+                records_by_name[name] = len(entries) + len(added)
+                added.append((name, size, mtime, flag))
+            elif (entries.sizes[i], entries.mtimes[i], entries.flags[i]) != record:
+                resort = resort or (1 in sort_columns and entries.sizes[i] != size or
+                                    3 in sort_columns and entries.mtimes[i] != mtime)
+                entries.sizes[i] = size
+                entries.mtimes[i] = mtime
+                entries.flags[i] = flag
+                updated.add(i)
+
+        if removed:
+            self.remove_rows([row for row, i in enumerate(self.order) if i in removed])
+        if updated:
+            last_column = len(self.HEADERS) - 1
+            for row, i in enumerate(self.order):
+                if i in updated:
+                    self.dataChanged.emit(self.index(row, 0), self.index(row, last_column))
+        if self.sorted_all is not None and removed:
+            self.sorted_all = array('L', (i for i in self.sorted_all if i not in removed))
+        if added:
+            first = len(entries)
+            entries.extend(*zip(*added))
+            rows = self.filter_records(range(first, len(entries)))
+            if rows:
+                self.beginInsertRows(QModelIndex(), len(self.order), len(self.order) + len(rows) - 1)
+                self.order.extend(rows)
+                self.endInsertRows()
+            resort = True
+        if resort:
+            self.start_sort()
+
+    def remove_rows(self, rows):
+        """ 从大到小按连续区间删除行，rows 须为升序 """
+        end = len(rows)
+        while end:
+            start = end - 1
+            while start and rows[start - 1] == rows[start] - 1:
+                start -= 1
+            first, last = rows[start], rows[end - 1]
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self.order[first:last + 1]
+            self.endRemoveRows()
+            end = start
+
+    def filter_records(self, candidates):
+        """ 返回 candidates 中通过筛选的记录号
+
+        最常见的按名称筛选写成内联的列表推导，避免每条记录一次方法调用。
+        """
+        f = self.file_filter
+        names = self.entries.names
+        flags = self.entries.flags
+        hidden = (0 if f is not None and f.show_hidden else FLAG_HIDDEN) | FLAG_REMOVED
+        if f is None or f.name_only():
+            if f is None or f.matcher is None:
+                return [i for i in candidates if not flags[i] & hidden]
+            if f.mode == 'substring':
+                needle = f.pattern.lower()
+                return [i for i in candidates
+                        if needle in names[i].lower() and not flags[i] & hidden]
+            match = f.matcher
+            return [i for i in candidates if match(names[i]) and not flags[i] & hidden]
+        sizes = self.entries.sizes
+        mtimes = self.entries.mtimes
+        accepts = f.accepts
+        return [i for i in candidates if not flags[i] & FLAG_REMOVED and
+                accepts(names[i], flags[i] & FLAG_DIR, sizes[i], mtimes[i], flags[i] & FLAG_HIDDEN)]
+
+    def set_file_filter(self, file_filter):
+        """ 应用筛选器；新条件比原来更严格时只在当前显示的行里筛选 """
+        previous = self.file_filter
+        self.file_filter = file_filter
+        if file_filter is not None and file_filter.narrows(previous):
+            # 在已排好序的行里筛选，顺序保持不变
+            self.apply_order(array('L', self.filter_records(self.order)))
+            return
+        if self.sorted_all is not None:
+            self.apply_order(array('L', self.filter_records(self.sorted_all)))
+            return
+        self.apply_order(array('L', self.filter_records(range(len(self.entries)))))
+        self.start_sort()
+
+    def path_indexes(self, paths):
+        """ 一次遍历找出当前目录下 paths 所在的行 """
+        names = {os.path.basename(path) for path in paths
+                 if os.path.dirname(path) == self.root_path}
+        entry_names = self.entries.names
+        return [self.index(row, 0) for row, i in enumerate(self.order) if entry_names[i] in names]
+
+    def record(self, index):
+        return self.order[index.row()]
+
+    def filePath(self, index):
+        if not index.isValid():
+            return self.root_path
+        return os.path.join(self.root_path, self.entries.names[self.record(index)])
+
+    def isDir(self, index):
+        return bool(self.entries.flags[self.record(index)] & FLAG_DIR)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.order)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    # 视图布局时会对每一行调用 flags()，直接返回常量
+    ENTRY_FLAGS = (Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsDragEnabled |
+                   Qt.ItemNeverHasChildren)
+
+    def flags(self, index):
+        return self.ENTRY_FLAGS
+
+    def type_name(self, i):
+        if self.entries.flags[i] & FLAG_DIR:
+            return '文件夹'
+        suffix = suffix_of(self.entries.names[i])
+        return f'{suffix.upper()} 文件' if suffix else '文件'
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        i = self.record(index)
+        column = index.column()
+        entries = self.entries
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return entries.names[i]
+            if column == 1:
+                return '' if entries.flags[i] & FLAG_DIR else format_size(entries.sizes[i])
+            if column == 2:
+                return self.type_name(i)
+            if column == 3:
+                return time.strftime('%Y/%m/%d %H:%M', time.localtime(entries.mtimes[i]))
+        elif role == Qt.DecorationRole and column == 0 and self.icon_provider is not None:
+            return self.icon(i)
+        elif role == Qt.TextAlignmentRole and column == 1:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def icon(self, i):
+        flags = self.entries.flags[i]
+        name = self.entries.names[i]
+        path = os.path.join(self.root_path, name)
+        if flags & FLAG_DIR and not flags & FLAG_LINK:
+            key = 'dir:'
+        elif flags & (FLAG_LINK | FLAG_EXEC):
+            key = None
+        else:
+            key = self.icon_provider.type_key(suffix_of(name))
+        return self.icon_provider.lookup(key, QFileInfo(path))
+
+    def mimeTypes(self):
+        return ['text/uri-list']
+
+    def mimeData(self, indexes):
+        mime = QMimeData()
+        paths = sorted({self.filePath(index) for index in indexes if index.isValid()})
+        mime.setUrls([QUrl.fromLocalFile(path) for path in paths])
+        return mime
+
+    def supportedDragActions(self):
+        return Qt.CopyAction | Qt.MoveAction
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """ 在后台线程排序，完成后一次性换入新顺序 """
+        if column < 0 or column >= len(self.HEADERS):
+            return
+        specs = [(column, order)] + [spec for spec in self.sort_specs if spec[0] != column]
+        self.sort_specs = specs[:MAX_SORT_COLUMNS]
+        self.start_sort()
+
+    def start_sort(self):
+        if not self.sort_specs or self.worker is not None:
+            return
+        if self.sort_worker is not None:
+            # 旧的排序结果会被 on_sort_finished 忽略
+            self.sort_worker.cancel()
+        worker = SortWorker(self.entries, self.sort_specs, self.name_keys, self)
+        worker.sort_finished.connect(self.on_sort_finished)
+        worker.finished.connect(worker.deleteLater)
+        self.sort_worker = worker
+        self.sort_started_at = time.monotonic()
+        worker.start()
+        self.sort_started.emit()
+
+    def is_sorting(self):
+        return self.sort_worker is not None
+
+    def on_sort_finished(self, records, name_keys):
+        if self.sender() is not self.sort_worker:
+            return
+        self.sort_worker = None
+        self.name_keys = name_keys
+        self.sorted_all = records
+        self.apply_order(array('L', self.filter_records(records)))
+        self.sort_done.emit(time.monotonic() - self.sort_started_at)
+
+    def apply_order(self, new_order):
+        """ 换入新的行顺序，并更新选择等持久索引 """
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        records = [self.order[index.row()] for index in persistent]
+        self.order = new_order
+        positions = {}
+        if persistent:
+            needed = set(records)
+            for row, record in enumerate(new_order):
+                if record in needed:
+                    positions[record] = row
+        self.changePersistentIndexList(
+            persistent,
+            [self.index(positions[record], index.column()) if record in positions
+             else QModelIndex() for record, index in zip(records, persistent)])
+        self.layoutChanged.emit()
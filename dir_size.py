@@ -0,0 +1,120 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from PyQt5.QtCore import QThread, pyqtSignal
+
+# 缓存的目录数量上限
+CACHE_MAX_DIRS = 500000
+PROGRESS_INTERVAL = 0.1
+
+
+class DirSizeCache:
+    """ 以 (路径, 目录 mtime) 为键缓存每个目录的直接内容统计
+
+    目录的 mtime 在其直接条目增删改名时变化，mtime 未变的目录可以
+    跳过 scandir 和逐个 stat，只需一次 stat 校验。
+    """
+
+    def __init__(self, max_dirs=CACHE_MAX_DIRS):
+        self.max_dirs = max_dirs
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path, mtime_ns):
+        with self.lock:
+            cached = self.entries.get(path)
+            if cached is None or cached[0] != mtime_ns:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(path)
+            self.hits += 1
+            return cached[1:]
+
+    def put(self, path, mtime_ns, size, files, subdirs):
+        with self.lock:
+            self.entries[path] = (mtime_ns, size, files, subdirs)
+            self.entries.move_to_end(path)
+            while len(self.entries) > self.max_dirs:
+                self.entries.popitem(last=False)
+
+
+# 所有属性对话框共享的缓存
+dir_size_cache = DirSizeCache()
+
+
+def scan_dir(path, cache=dir_size_cache):
+    """ 返回目录自身的 (文件总大小, 文件数, 子目录名元组) """
+    mtime_ns = os.stat(path, follow_symlinks=False).st_mtime_ns
+    cached = cache.get(path, mtime_ns)
+    if cached is not None:
+        return cached
+
+    size = files = 0
+    subdirs = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                # 使用 lstat 结果，失效的符号链接也能正常统计
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                    continue
+                size += entry.stat(follow_symlinks=False).st_size
+                files += 1
+            except OSError:
+                continue
+    subdirs = tuple(subdirs)
+    cache.put(path, mtime_ns, size, files, subdirs)
+    return size, files, subdirs
+
+
+class DirSizeWorker(QThread):
+    # 总大小, 文件数, 文件夹数（大小可能超过 int32，用 object 传递）
+    progress = pyqtSignal(object, int, int)
+    # 总大小, 文件数, 文件夹数, 耗时
+    size_finished = pyqtSignal(object, int, int, float)
+
+    def __init__(self, paths, parent=None):
+        super().__init__(parent)
+        self.paths = list(paths)
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        total = files = dirs = 0
+        start = last_progress = time.monotonic()
+        stack = []
+        for path in self.paths:
+            try:
+                if os.path.isdir(path) and not os.path.islink(path):
+                    stack.append(path)
+                else:
+                    total += os.lstat(path).st_size
+                    files += 1
+            except OSError:
+                continue
+
+        while stack and not self._cancelled:
+            path = stack.pop()
+            try:
+                size, count, subdirs = scan_dir(path)
+            except OSError:
+                continue
+            total += size
+            files += count
+            dirs += len(subdirs)
+            stack.extend(os.path.join(path, name) for name in subdirs)
+
+            now = time.monotonic()
+            if now - last_progress >= PROGRESS_INTERVAL:
+                self.progress.emit(total, files, dirs)
+                last_progress = now
+
+        self.size_finished.emit(total, files, dirs, time.monotonic() - start)
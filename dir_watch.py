@@ -0,0 +1,214 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+from PyQt5.QtCore import QThread, pyqtSignal
+from dir_model import entry_flags, list_records
+
+# 收到第一个事件后，安静这么久才送出一批变化
+DEBOUNCE = 0.2
+# 持续有事件时，最多积攒这么久就送出
+MAX_DELAY = 1.0
+# 没有事件时检查取消标志的间隔
+IDLE_TIMEOUT = 0.5
+# 无法使用 inotify 时轮询目录修改时间的间隔
+POLL_INTERVAL = 2.0
+
+IN_MODIFY = 0x2
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, 'O_CLOEXEC', 0)
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+# 需要整个目录重新加载的事件
+RESCAN_MASK = IN_Q_OVERFLOW | IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED
+
+EVENT_HEADER = struct.Struct('iIII')
+
+_libc = None
+
+
+def _inotify_libc():
+    global _libc
+    if _libc is None:
+        _libc = False
+        if sys.platform.startswith('linux'):
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+                libc.inotify_init1
+                libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+                _libc = libc
+            except (OSError, AttributeError):
+                pass
+    return _libc or None
+
+
+def open_inotify(path):
+    """ 为 path 建立 inotify 监视，返回文件描述符；不支持时返回 None """
+    libc = _inotify_libc()
+    if libc is None:
+        return None
+    fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+    if fd < 0:
+        error = ctypes.get_errno()
+        if error in (errno.ENOSYS, errno.EMFILE, errno.ENFILE):
+            return None
+        raise OSError(error, os.strerror(error))
+    if libc.inotify_add_watch(fd, os.fsencode(path), WATCH_MASK) < 0:
+        error = ctypes.get_errno()
+        os.close(fd)
+        # 监视数达到上限时改用轮询
+        if error == errno.ENOSPC:
+            return None
+        raise OSError(error, os.strerror(error), path)
+    return fd
+
+
+def parse_events(data):
+    """ 解析 inotify 事件: 返回 (变化的名称集合, 是否需要重新加载) """
+    names = set()
+    rescan = False
+    offset = 0
+    while offset + EVENT_HEADER.size <= len(data):
+        _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+        offset += EVENT_HEADER.size
+        if mask & RESCAN_MASK:
+            rescan = True
+        elif length:
+            name = data[offset:offset + length].rstrip(b'\0')
+            names.add(os.fsdecode(name))
+        offset += length
+    return names, rescan
+
+
+def stat_entry(path, name):
+    """ 返回 (大小, 修改时间, 标志)，条目已不存在时返回 None """
+    full_path = os.path.join(path, name)
+    try:
+        st = os.lstat(full_path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime, entry_flags(name, st, lambda: os.path.isdir(full_path))
+
+
+class DirWatcher(QThread):
+    """ 监视单个目录，把一段时间内的事件合并成一批条目变化送出
+
+    Linux 上使用 inotify，事件在本线程中读取、去重并 lstat，界面线程
+    只处理合并后的结果；其他平台按目录修改时间轮询并比较快照。
+    """
+
+    # [(名称, (大小, 修改时间, 标志) 或 None), ...]
+    changes_found = pyqtSignal(object)
+    # 事件队列溢出或目录本身被删除/移走，需要重新加载
+    rescan_needed = pyqtSignal()
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        try:
+            fd = open_inotify(self.path)
+        except OSError:
+            return
+        if fd is None:
+            self.run_polling()
+            return
+        try:
+            self.run_inotify(fd)
+        finally:
+            os.close(fd)
+
+    def run_inotify(self, fd):
+        pending = set()
+        rescan = False
+        first = last = 0.0
+        while not self._cancelled:
+            now = time.monotonic()
+            if pending or rescan:
+                deadline = min(last + DEBOUNCE, first + MAX_DELAY)
+                if now >= deadline:
+                    if rescan:
+                        self.rescan_needed.emit()
+                        return
+                    self.emit_changes(pending)
+                    pending = set()
+                    continue
+                timeout = deadline - now
+            else:
+                timeout = IDLE_TIMEOUT
+            ready, _, _ = select.select([fd], [], [], timeout)
+            if not ready:
+                continue
+            try:
+                data = os.read(fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            names, overflow = parse_events(data)
+            now = time.monotonic()
+            if not pending and not rescan:
+                first = now
+            last = now
+            pending |= names
+            rescan = rescan or overflow
+
+    def emit_changes(self, names):
+        changes = [(name, stat_entry(self.path, name)) for name in names]
+        if changes and not self._cancelled:
+            self.changes_found.emit(changes)
+
+    def run_polling(self):
+        """ 目录修改时间变化时重新列出目录并与上次的快照比较
+
+        文件内容的修改不改变目录的修改时间，轮询模式只反映增删和重命名。
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            entries = list_records(self.path)
+        except OSError:
+            return
+        while not self._cancelled:
+            waited = 0.0
+            while waited < POLL_INTERVAL and not self._cancelled:
+                self.msleep(int(IDLE_TIMEOUT * 1000))
+                waited += IDLE_TIMEOUT
+            if self._cancelled:
+                return
+            try:
+                current = os.stat(self.path).st_mtime_ns
+                if current == mtime:
+                    continue
+                mtime = current
+                latest = list_records(self.path)
+            except OSError:
+                self.rescan_needed.emit()
+                return
+            changes = [(name, record) for name, record in latest.items()
+                       if entries.get(name) != record]
+            changes += [(name, None) for name in entries if name not in latest]
+            entries = latest
+            if changes:
+                self.changes_found.emit(changes)
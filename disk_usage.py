@@ -0,0 +1,421 @@
+import os
+import time
+import heapq
+from array import array
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from PyQt5.QtWidgets import (QDialog, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+                             QPushButton, QTabWidget, QTableWidget,
+                             QTableWidgetItem, QAbstractItemView, QHeaderView,
+                             QSplitter)
+from PyQt5.QtCore import Qt, QThread, QRectF, pyqtSignal
+from PyQt5.QtGui import QPainter, QColor
+from utils import format_size
+
+# 扫描线程数，scandir 和 stat 在系统调用期间会释放 GIL
+SCAN_THREADS = min(32, (os.cpu_count() or 1) * 4)
+PROGRESS_INTERVAL = 0.25
+# 列表显示的条目数
+TOP_COUNT = 200
+# 树图最多绘制的子项数
+TREEMAP_MAX_ITEMS = 300
+
+
+class ScanTree:
+    """ 用数组保存扫描结果的紧凑树
+
+    每个节点只占数组中的几个槽位（父节点、大小、名称偏移等），
+    不为节点创建 Python 对象。节点 0 为根目录，子节点的下标总是
+    大于父节点，因此自底向上汇总只需倒序遍历一次。
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.parent = array('i')
+        self.size = array('q')
+        self.is_dir = bytearray()
+        self.name_offset = array('I')
+        self.names = bytearray()
+        self.add(-1, root, True, 0)
+
+    def __len__(self):
+        return len(self.parent)
+
+    def add(self, parent, name, is_dir, size):
+        index = len(self.parent)
+        self.parent.append(parent)
+        self.size.append(size)
+        self.is_dir.append(1 if is_dir else 0)
+        self.name_offset.append(len(self.names))
+        self.names += os.fsencode(name)
+        return index
+
+    def name(self, index):
+        start = self.name_offset[index]
+        end = self.name_offset[index + 1] if index + 1 < len(self.parent) else len(self.names)
+        return os.fsdecode(bytes(self.names[start:end]))
+
+    def path(self, index):
+        parts = []
+        while index > 0:
+            parts.append(self.name(index))
+            index = self.parent[index]
+        return os.path.join(self.root, *reversed(parts))
+
+    def finalize(self):
+        """ 汇总目录大小并建立子节点链表和先序遍历下标 """
+        count = len(self.parent)
+        parent, size = self.parent, self.size
+        self.count = array('i', [1]) * count
+        self.first_child = array('i', [-1]) * count
+        self.next_sibling = array('i', [-1]) * count
+        for index in range(count - 1, 0, -1):
+            p = parent[index]
+            size[p] += size[index]
+            self.count[p] += self.count[index]
+            self.next_sibling[index] = self.first_child[p]
+            self.first_child[p] = index
+
+        # 先序遍历后每个子树在 order 中是连续区间 [pos, pos + count)
+        self.order = array('i')
+        self.pos = array('i', [0]) * count
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            self.pos[node] = len(self.order)
+            self.order.append(node)
+            child = self.first_child[node]
+            while child >= 0:
+                stack.append(child)
+                child = self.next_sibling[child]
+
+    def children(self, index):
+        child = self.first_child[index]
+        while child >= 0:
+            yield child
+            child = self.next_sibling[child]
+
+    def largest(self, index, dirs, n=TOP_COUNT):
+        """ 子树中最大的 n 个文件夹或文件 """
+        start = self.pos[index] + 1
+        end = self.pos[index] + self.count[index]
+        flag = 1 if dirs else 0
+        is_dir, size = self.is_dir, self.size
+        candidates = (node for node in self.order[start:end] if is_dir[node] == flag)
+        return heapq.nlargest(n, candidates, key=size.__getitem__)
+
+    def memory_usage(self):
+        arrays = [self.parent, self.size, self.name_offset, self.count,
+                  self.first_child, self.next_sibling, self.order, self.pos]
+        return (sum(a.itemsize * len(a) for a in arrays)
+                + len(self.is_dir) + len(self.names))
+
+
+def _list_dir(path, root_dev):
+    """ 扫描线程任务：列出目录，返回 [(名称, 是否目录, 占用空间, inode 键), ...] """
+    entries = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                # 不跨越文件系统
+                if is_dir and st.st_dev != root_dev:
+                    continue
+                blocks = getattr(st, 'st_blocks', None)
+                used = blocks * 512 if blocks is not None else st.st_size
+                # 硬链接只统计一次
+                key = (st.st_dev, st.st_ino) if st.st_nlink > 1 and not is_dir else None
+                entries.append((entry.name, is_dir, used, key))
+    except OSError:
+        pass
+    return entries
+
+
+class DiskUsageWorker(QThread):
+    # 已扫描条目数, 每秒条目数
+    progress = pyqtSignal(int, float)
+    # ScanTree, 耗时
+    scan_finished = pyqtSignal(object, float)
+
+    def __init__(self, root, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        start = last_progress = time.monotonic()
+        tree = ScanTree(self.root)
+        try:
+            root_dev = os.stat(self.root).st_dev
+        except OSError:
+            self.scan_finished.emit(None, 0.0)
+            return
+
+        seen_links = set()
+        # 多个线程并行 scandir，结果只在本线程中写入数组
+        with ThreadPoolExecutor(max_workers=SCAN_THREADS) as pool:
+            pending = {pool.submit(_list_dir, self.root, root_dev): (0, self.root)}
+            while pending and not self._cancelled:
+                done, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in done:
+                    parent, base = pending.pop(future)
+                    for name, is_dir, used, key in future.result():
+                        if key is not None:
+                            if key in seen_links:
+                                used = 0
+                            seen_links.add(key)
+                        index = tree.add(parent, name, is_dir, used)
+                        if is_dir:
+                            path = os.path.join(base, name)
+                            pending[pool.submit(_list_dir, path, root_dev)] = (index, path)
+                now = time.monotonic()
+                if now - last_progress >= PROGRESS_INTERVAL:
+                    self.progress.emit(len(tree), len(tree) / (now - start))
+                    last_progress = now
+            for future in pending:
+                future.cancel()
+
+        if self._cancelled:
+            self.scan_finished.emit(None, time.monotonic() - start)
+            return
+        tree.finalize()
+        self.scan_finished.emit(tree, time.monotonic() - start)
+
+
+def _worst(row, length):
+    total = sum(row)
+    return max(length * length * max(row) / (total * total),
+               total * total / (length * length * min(row)))
+
+
+def squarify(areas, x, y, w, h):
+    """ 方形化树图布局，areas 需按从大到小排列且总和等于 w * h """
+    rects = []
+    i = 0
+    while i < len(areas) and w > 0 and h > 0:
+        length = min(w, h)
+        row = [areas[i]]
+        i += 1
+        while i < len(areas) and _worst(row + [areas[i]], length) <= _worst(row, length):
+            row.append(areas[i])
+            i += 1
+        total = sum(row)
+        if w >= h:
+            column_width = total / h
+            top = y
+            for area in row:
+                rects.append((x, top, column_width, area / column_width))
+                top += area / column_width
+            x += column_width
+            w -= column_width
+        else:
+            row_height = total / w
+            left = x
+            for area in row:
+                rects.append((left, y, area / row_height, row_height))
+                left += area / row_height
+            y += row_height
+            h -= row_height
+    return rects
+
+
+class TreemapWidget(QWidget):
+    # 点击了文件夹节点
+    node_activated = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tree = None
+        self.node = 0
+        self.rects = []
+        self.setMinimumHeight(200)
+        self.setMouseTracking(True)
+
+    def set_node(self, tree, node):
+        self.tree = tree
+        self.node = node
+        self.layout_rects()
+        self.update()
+
+    def layout_rects(self):
+        self.rects = []
+        if self.tree is None:
+            return
+        children = [c for c in self.tree.children(self.node) if self.tree.size[c] > 0]
+        children = heapq.nlargest(TREEMAP_MAX_ITEMS, children, key=self.tree.size.__getitem__)
+        total = sum(self.tree.size[c] for c in children)
+        if not total:
+            return
+        scale = self.width() * self.height() / total
+        areas = [self.tree.size[c] * scale for c in children]
+        for child, rect in zip(children, squarify(areas, 0, 0, self.width(), self.height())):
+            self.rects.append((QRectF(*rect), child))
+
+    def resizeEvent(self, event):
+        self.layout_rects()
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor('#f5f5f5'))
+        for rect, child in self.rects:
+            if self.tree.is_dir[child]:
+                color = QColor('#64b5f6')
+            else:
+                # 同一扩展名使用相同颜色
+                ext = os.path.splitext(self.tree.name(child))[1].lower()
+                color = QColor.fromHsv(hash(ext) % 360, 90, 230)
+            painter.fillRect(rect, color)
+            painter.setPen(QColor('#ffffff'))
+            painter.drawRect(rect)
+            if rect.width() > 60 and rect.height() > 18:
+                painter.setPen(QColor('#212121'))
+                label = f'{self.tree.name(child)}\n{format_size(self.tree.size[child])}'
+                painter.drawText(rect.adjusted(3, 2, -3, -2),
+                                 Qt.AlignLeft | Qt.AlignTop | Qt.TextWordWrap, label)
+
+    def child_at(self, pos):
+        for rect, child in self.rects:
+            if rect.contains(pos):
+                return child
+        return None
+
+    def mouseMoveEvent(self, event):
+        child = self.child_at(event.pos())
+        if child is not None:
+            self.setToolTip(f'{self.tree.path(child)}\n{format_size(self.tree.size[child])}')
+        super().mouseMoveEvent(event)
+
+    def mouseDoubleClickEvent(self, event):
+        child = self.child_at(event.pos())
+        if child is not None and self.tree.is_dir[child]:
+            self.node_activated.emit(child)
+
+
+class SizeItem(QTableWidgetItem):
+    """ 按字节数而不是显示文本排序的表格项 """
+
+    def __init__(self, size):
+        super().__init__(format_size(size))
+        self.bytes = size
+
+    def __lt__(self, other):
+        if isinstance(other, SizeItem):
+            return self.bytes < other.bytes
+        return super().__lt__(other)
+
+
+class DiskUsageDialog(QDialog):
+    def __init__(self, root, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.tree = None
+        self.node = 0
+        # 每个节点的最大文件/文件夹列表，钻取时不必重新计算
+        self.largest_cache = {}
+        self.setWindowTitle('磁盘占用分析')
+        self.resize(900, 650)
+
+        layout = QVBoxLayout(self)
+        nav_layout = QHBoxLayout()
+        self.up_button = QPushButton('上一级')
+        self.up_button.setEnabled(False)
+        self.up_button.clicked.connect(self.go_up)
+        self.path_label = QLabel(root)
+        nav_layout.addWidget(self.up_button)
+        nav_layout.addWidget(self.path_label, 1)
+        layout.addLayout(nav_layout)
+
+        splitter = QSplitter(Qt.Vertical)
+        self.treemap = TreemapWidget()
+        self.treemap.node_activated.connect(self.set_node)
+        splitter.addWidget(self.treemap)
+
+        self.tabs = QTabWidget()
+        self.dirs_table = self.create_table()
+        self.files_table = self.create_table()
+        self.tabs.addTab(self.dirs_table, '最大的文件夹')
+        self.tabs.addTab(self.files_table, '最大的文件')
+        splitter.addWidget(self.tabs)
+        layout.addWidget(splitter, 1)
+
+        self.status_label = QLabel('正在扫描...')
+        layout.addWidget(self.status_label)
+
+        self.worker = DiskUsageWorker(root, self)
+        self.worker.progress.connect(self.on_progress)
+        self.worker.scan_finished.connect(self.on_scan_finished)
+        self.worker.start()
+
+    def create_table(self):
+        table = QTableWidget(0, 3)
+        table.setHorizontalHeaderLabels(['名称', '大小', '位置'])
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        table.setColumnWidth(0, 220)
+        table.setSortingEnabled(True)
+        table.cellDoubleClicked.connect(lambda row, column, t=table: self.on_row_activated(t, row))
+        return table
+
+    def on_progress(self, count, rate):
+        self.status_label.setText(f'正在扫描... 已扫描 {count} 项 ({rate:.0f} 项/秒)')
+
+    def on_scan_finished(self, tree, elapsed):
+        self.worker = None
+        if tree is None:
+            self.status_label.setText('扫描失败或已取消')
+            return
+        self.tree = tree
+        self.status_label.setText(
+            f'扫描完成: {len(tree)} 项，共 {format_size(tree.size[0])}，'
+            f'用时 {elapsed:.1f} 秒，结果占用内存 {format_size(tree.memory_usage())}')
+        self.set_node(0)
+
+    def set_node(self, node):
+        self.node = node
+        self.path_label.setText(self.tree.path(node))
+        self.up_button.setEnabled(node != 0)
+        self.treemap.set_node(self.tree, node)
+        if node not in self.largest_cache:
+            self.largest_cache[node] = (self.tree.largest(node, True),
+                                        self.tree.largest(node, False))
+        dirs, files = self.largest_cache[node]
+        self.fill_table(self.dirs_table, dirs)
+        self.fill_table(self.files_table, files)
+
+    def fill_table(self, table, nodes):
+        table.setSortingEnabled(False)
+        table.setRowCount(len(nodes))
+        for row, node in enumerate(nodes):
+            name_item = QTableWidgetItem(self.tree.name(node))
+            name_item.setData(Qt.UserRole, node)
+            table.setItem(row, 0, name_item)
+            table.setItem(row, 1, SizeItem(self.tree.size[node]))
+            table.setItem(row, 2, QTableWidgetItem(os.path.dirname(self.tree.path(node))))
+        table.setSortingEnabled(True)
+        table.sortItems(1, Qt.DescendingOrder)
+
+    def on_row_activated(self, table, row):
+        node = table.item(row, 0).data(Qt.UserRole)
+        if self.tree.is_dir[node]:
+            self.set_node(node)
+
+    def go_up(self):
+        if self.tree is not None and self.node != 0:
+            self.set_node(self.tree.parent[self.node])
+
+    def done(self, result):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+        super().done(result)
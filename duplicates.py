@@ -0,0 +1,502 @@
+import os
+import stat
+import time
+import sqlite3
+import hashlib
+from concurrent.futures import wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+                             QTreeWidget, QTreeWidgetItem, QHeaderView, QMessageBox)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from utils import cache_dir, format_size, process_pool
+from trash import move_to_trash
+
+# 部分哈希读取文件开头和结尾各 PARTIAL_SIZE 字节
+PARTIAL_SIZE = 64 * 1024
+# 不超过这个大小的文件，部分哈希已经覆盖全部内容
+SMALL_FILE = 2 * PARTIAL_SIZE
+# 每个进程任务包含的文件数和字节数上限
+TASK_FILES = 256
+TASK_BYTES = 256 * 1024 * 1024
+PROGRESS_INTERVAL = 0.25
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS hashes (
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    partial BLOB,
+    full BLOB,
+    PRIMARY KEY (dev, ino)
+);
+'''
+
+
+def new_hash():
+    return hashlib.blake2b(digest_size=20)
+
+
+def partial_hash(path, size):
+    """ 文件开头和结尾各 64 KiB 的哈希，小文件直接哈希全部内容 """
+    h = new_hash()
+    with open(path, 'rb') as f:
+        h.update(f.read(PARTIAL_SIZE))
+        if size > PARTIAL_SIZE:
+            f.seek(max(PARTIAL_SIZE, size - PARTIAL_SIZE))
+            h.update(f.read(PARTIAL_SIZE))
+    return h.digest()
+
+
+def full_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, new_hash).digest()
+
+
+def hash_files(files, partial):
+    """ 进程池任务：计算一组 (路径, 大小) 的哈希，返回 [(路径, 哈希或 None), ...] """
+    results = []
+    for path, size in files:
+        try:
+            digest = partial_hash(path, size) if partial else full_hash(path)
+        except OSError:
+            digest = None
+        results.append((path, digest))
+    return results
+
+
+def check_unchanged(path, size, mtime_ns, message='文件在扫描后已被修改'):
+    """ 文件的大小或修改时间与扫描时不同时抛出 OSError """
+    st = os.stat(path)
+    if st.st_size != size or st.st_mtime_ns != mtime_ns:
+        raise OSError(message)
+    return st
+
+
+def trash_unchanged(path, size, mtime_ns, trash_cache):
+    check_unchanged(path, size, mtime_ns)
+    move_to_trash(path, trash_cache)
+
+
+def replace_with_link(keep, path, size, mtime_ns, keep_mtime_ns):
+    """ 用指向 keep 的硬链接替换 path，先建临时链接再原子替换
+
+    两个文件都必须与扫描时相同；替换后 path 会带上 keep 的所有者和权限，
+    两者不同时不替换。
+    """
+    keep_st = check_unchanged(keep, size, keep_mtime_ns, '保留的文件在扫描后已被修改')
+    st = check_unchanged(path, size, mtime_ns)
+    if ((st.st_uid, st.st_gid, stat.S_IMODE(st.st_mode)) !=
+            (keep_st.st_uid, keep_st.st_gid, stat.S_IMODE(keep_st.st_mode))):
+        raise OSError('与保留的文件所有者或权限不同')
+    tmp_path = f'{path}.{os.getpid()}.link'
+    os.link(keep, tmp_path)
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        os.unlink(tmp_path)
+        raise
+
+
+class HashCache:
+    """ 按 (设备, inode) 保存文件哈希，大小和修改时间都未变时才复用 """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.path.join(cache_dir(), 'hashes.db')
+        self.conn = sqlite3.connect(self.db_path, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def lookup(self, entry, column):
+        _, dev, ino, size, mtime_ns = entry
+        row = self.conn.execute(
+            f'SELECT {column} FROM hashes WHERE dev = ? AND ino = ? AND size = ? AND mtime_ns = ?',
+            (dev, ino, size, mtime_ns)).fetchone()
+        return row[0] if row else None
+
+    def store(self, entries, column, digests):
+        """ 保存一批哈希；文件已变化时丢弃该 inode 的旧记录 """
+        with self.conn:
+            for entry in entries:
+                _, dev, ino, size, mtime_ns = entry
+                digest = digests[entry]
+                row = self.conn.execute(
+                    'SELECT size, mtime_ns FROM hashes WHERE dev = ? AND ino = ?',
+                    (dev, ino)).fetchone()
+                if row != (size, mtime_ns):
+                    self.conn.execute(
+                        'INSERT OR REPLACE INTO hashes(dev, ino, size, mtime_ns) '
+                        'VALUES (?, ?, ?, ?)', (dev, ino, size, mtime_ns))
+                self.conn.execute(f'UPDATE hashes SET {column} = ? WHERE dev = ? AND ino = ?',
+                                  (digest, dev, ino))
+                if column == 'partial' and size <= SMALL_FILE:
+                    self.conn.execute('UPDATE hashes SET full = ? WHERE dev = ? AND ino = ?',
+                                      (digest, dev, ino))
+
+
+def group_by(entries, key):
+    """ 分组并丢弃只有一个成员的组 """
+    groups = {}
+    for entry in entries:
+        groups.setdefault(key(entry), []).append(entry)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+class DuplicateWorker(QThread):
+    # 阶段说明, 已完成数, 总数
+    progress = pyqtSignal(str, int, int)
+    # 重复组 [(大小, [(路径, mtime_ns), ...]), ...], 可释放字节数, 错误信息, 耗时
+    dup_finished = pyqtSignal(list, object, str, float)
+
+    def __init__(self, roots, parent=None):
+        super().__init__(parent)
+        self.roots = roots
+        self._cancelled = False
+        self.cache_hits = 0
+        self.hashed = 0
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def scan(self):
+        """ 列出所有普通文件: [(路径, dev, ino, 大小, mtime_ns), ...]
+
+        跳过符号链接和空文件，同一 inode 的多个硬链接只保留一个。
+        """
+        entries = []
+        seen = set()
+        stack = []
+        last_progress = time.monotonic()
+        for root in self.roots:
+            if os.path.isdir(root) and not os.path.islink(root):
+                stack.append(root)
+                continue
+            try:
+                st = os.lstat(root)
+            except OSError:
+                continue
+            if os.path.isfile(root) and not os.path.islink(root) and st.st_size:
+                if (st.st_dev, st.st_ino) not in seen:
+                    seen.add((st.st_dev, st.st_ino))
+                    entries.append((root, st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns))
+        while stack and not self._cancelled:
+            try:
+                it = os.scandir(stack.pop())
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                            continue
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    key = (st.st_dev, st.st_ino)
+                    if not st.st_size or key in seen:
+                        continue
+                    seen.add(key)
+                    entries.append((entry.path, st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns))
+            now = time.monotonic()
+            if now - last_progress >= PROGRESS_INTERVAL:
+                self.progress.emit('正在扫描文件', len(entries), 0)
+                last_progress = now
+        return entries
+
+    def iter_tasks(self, entries):
+        files, task_bytes = [], 0
+        for entry in entries:
+            files.append(entry)
+            task_bytes += entry[3]
+            if len(files) >= TASK_FILES or task_bytes >= TASK_BYTES:
+                yield files
+                files, task_bytes = [], 0
+        if files:
+            yield files
+
+    def compute(self, entries, cache, column, stage):
+        """ 取得 entries 的哈希：先查缓存，其余交给进程池，返回 {entry: 哈希} """
+        digests = {}
+        missing = []
+        for entry in entries:
+            digest = cache.lookup(entry, column)
+            if digest is None:
+                missing.append(entry)
+            else:
+                digests[entry] = digest
+        self.cache_hits += len(digests)
+        self.hashed += len(missing)
+
+        pool = process_pool()
+        max_pending = (os.cpu_count() or 1) * 2
+        pending = {}
+        total = len(entries)
+        done_count = len(digests)
+        last_progress = 0.0
+
+        def collect(done):
+            nonlocal done_count
+            for future in done:
+                task = pending.pop(future)
+                done_count += len(task)
+                if future.cancelled():
+                    continue
+                error = future.exception()
+                if isinstance(error, BrokenProcessPool):
+                    raise error
+                if error is not None:
+                    continue
+                by_path = dict(future.result())
+                hashed = []
+                for entry in task:
+                    digest = by_path.get(entry[0])
+                    if digest is not None:
+                        digests[entry] = digest
+                        hashed.append(entry)
+                cache.store(hashed, column, digests)
+
+        try:
+            for task in self.iter_tasks(missing):
+                if self._cancelled:
+                    break
+                files = [(entry[0], entry[3]) for entry in task]
+                pending[pool.submit(hash_files, files, column == 'partial')] = task
+                while len(pending) >= max_pending and not self._cancelled:
+                    done, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                    collect(done)
+                now = time.monotonic()
+                if now - last_progress >= PROGRESS_INTERVAL:
+                    self.progress.emit(stage, done_count, total)
+                    last_progress = now
+            while pending:
+                if self._cancelled:
+                    for future in pending:
+                        future.cancel()
+                done, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                collect(done)
+                now = time.monotonic()
+                if now - last_progress >= PROGRESS_INTERVAL:
+                    self.progress.emit(stage, done_count, total)
+                    last_progress = now
+        finally:
+            # 出错退出时不再等待排队的任务
+            for future in pending:
+                future.cancel()
+        return digests
+
+    def run(self):
+        start = time.monotonic()
+        groups = []
+        error = ''
+        cache = None
+        try:
+            # 哈希缓存被锁定或损坏、进程池中断时结束扫描并报告错误
+            cache = HashCache()
+            entries = self.scan()
+            # 第一阶段：大小不同的文件不可能重复
+            candidates = [e for group in group_by(entries, lambda e: e[3]) for e in group]
+            # 第二阶段：比较开头和结尾的部分哈希
+            digests = {}
+            if not self._cancelled:
+                digests = self.compute(candidates, cache, 'partial', '正在比较文件头尾')
+            candidates = [e for group in group_by(digests, lambda e: (e[3], digests[e]))
+                          for e in group]
+            # 第三阶段：剩下的大文件再计算完整哈希，小文件的部分哈希就是完整哈希
+            large = [e for e in candidates if e[3] > SMALL_FILE]
+            full = {e: digests[e] for e in candidates if e[3] <= SMALL_FILE}
+            if not self._cancelled:
+                full.update(self.compute(large, cache, 'full', '正在计算完整哈希'))
+            if not self._cancelled:
+                for group in group_by(full, lambda e: (e[3], full[e])):
+                    group.sort()
+                    groups.append((group[0][3], [(e[0], e[4]) for e in group]))
+        except (sqlite3.Error, BrokenProcessPool) as e:
+            groups = []
+            error = str(e) or '后台进程意外退出'
+        finally:
+            if cache is not None:
+                cache.close()
+        groups.sort(key=lambda g: g[0] * (len(g[1]) - 1), reverse=True)
+        reclaimable = sum(size * (len(files) - 1) for size, files in groups)
+        self.dup_finished.emit(groups, reclaimable, error, time.monotonic() - start)
+
+
+class DuplicatesDialog(QDialog):
+    HEADERS = ['名称', '大小', '位置']
+
+    def __init__(self, roots, explorer):
+        super().__init__(explorer)
+        self.explorer = explorer
+        self.setWindowTitle('查找重复文件')
+        self.resize(850, 550)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel('查找范围: ' + '; '.join(roots)))
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(self.HEADERS)
+        self.tree.header().setSectionResizeMode(2, QHeaderView.Stretch)
+        self.tree.setColumnWidth(0, 260)
+        self.tree.itemChanged.connect(self.update_summary)
+        layout.addWidget(self.tree)
+
+        self.status_label = QLabel('正在扫描...')
+        layout.addWidget(self.status_label)
+
+        button_layout = QHBoxLayout()
+        self.action_buttons = []
+        buttons = [
+            ('删除选中', self.delete_checked),
+            ('替换为硬链接', self.link_checked),
+        ]
+        for text, slot in buttons:
+            button = QPushButton(text)
+            button.setEnabled(False)
+            button.clicked.connect(slot)
+            button_layout.addWidget(button)
+            self.action_buttons.append(button)
+        close_button = QPushButton('关闭')
+        close_button.clicked.connect(self.reject)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+        self.worker = DuplicateWorker(roots, self)
+        self.worker.progress.connect(self.on_progress)
+        self.worker.dup_finished.connect(self.on_finished)
+        self.worker.start()
+
+    def on_progress(self, stage, done, total):
+        if total:
+            self.status_label.setText(f'{stage}... {done} / {total}')
+        else:
+            self.status_label.setText(f'{stage}... 已找到 {done} 个文件')
+
+    def on_finished(self, groups, reclaimable, error, elapsed):
+        worker, self.worker = self.worker, None
+        if worker.is_cancelled():
+            return
+        if error:
+            self.status_label.setText(f'查找失败: {error}')
+            QMessageBox.warning(self, '错误', f'查找重复文件失败: {error}')
+            return
+        self.tree.blockSignals(True)
+        for size, files in groups:
+            group_item = QTreeWidgetItem([f'{len(files)} 个相同文件', format_size(size), ''])
+            for number, (path, mtime_ns) in enumerate(files):
+                item = QTreeWidgetItem([os.path.basename(path), format_size(size),
+                                        os.path.dirname(path)])
+                item.setData(0, Qt.UserRole, (path, mtime_ns, size))
+                # 默认保留每组第一个文件
+                item.setCheckState(0, Qt.Unchecked if number == 0 else Qt.Checked)
+                group_item.addChild(item)
+            self.tree.addTopLevelItem(group_item)
+        self.tree.blockSignals(False)
+        self.tree.expandAll()
+        for button in self.action_buttons:
+            button.setEnabled(bool(groups))
+        self.summary = (f'找到 {len(groups)} 组重复文件，最多可释放 {format_size(reclaimable)}'
+                        f'（用时 {elapsed:.1f} 秒，计算哈希 {worker.hashed} 次，'
+                        f'{worker.cache_hits} 次来自缓存）')
+        self.update_summary()
+
+    def update_summary(self):
+        if self.worker is not None:
+            return
+        selected = sum(data[2] for _, data in self.checked_items())
+        self.status_label.setText(f'{self.summary}\n已选中 {format_size(selected)}')
+
+    def checked_items(self):
+        items = []
+        for i in range(self.tree.topLevelItemCount()):
+            group_item = self.tree.topLevelItem(i)
+            for j in range(group_item.childCount()):
+                item = group_item.child(j)
+                if item.checkState(0) == Qt.Checked:
+                    items.append((item, item.data(0, Qt.UserRole)))
+        return items
+
+    def plan(self):
+        """ 返回 [(保留文件的数据, 选中项, 数据), ...]，有组被全部选中时返回 None
+
+        数据是 (路径, mtime_ns, 大小)。
+        """
+        plan = []
+        for i in range(self.tree.topLevelItemCount()):
+            group_item = self.tree.topLevelItem(i)
+            children = [group_item.child(j) for j in range(group_item.childCount())]
+            kept = [item for item in children if item.checkState(0) != Qt.Checked]
+            checked = [item for item in children if item.checkState(0) == Qt.Checked]
+            if not checked:
+                continue
+            if not kept:
+                return None
+            keep = kept[0].data(0, Qt.UserRole)
+            plan.extend((keep, item, item.data(0, Qt.UserRole)) for item in checked)
+        return plan
+
+    def confirmed_plan(self, question):
+        plan = self.plan()
+        if plan is None:
+            QMessageBox.warning(self, '错误', '每组至少要保留一个文件')
+            return None
+        if not plan:
+            return None
+        size = sum(data[2] for _, _, data in plan)
+        reply = QMessageBox.question(self, '确认', question.format(len(plan), format_size(size)),
+                                     QMessageBox.Yes | QMessageBox.No)
+        return plan if reply == QMessageBox.Yes else None
+
+    def delete_checked(self):
+        plan = self.confirmed_plan('确定要将选中的 {} 个文件（{}）移到回收站吗？')
+        if plan is None:
+            return
+        self.pending_items = {data[0]: item for _, item, data in plan}
+        scanned = {data[0]: data for _, _, data in plan}
+        trash_cache = {}
+        self.explorer.run_batch(
+            [data[0] for _, _, data in plan],
+            lambda path: trash_unchanged(path, scanned[path][2], scanned[path][1], trash_cache),
+            '移到回收站', lambda done, errors, cancelled: self.on_batch_finished(errors))
+
+    def link_checked(self):
+        plan = self.confirmed_plan('确定要把选中的 {} 个文件（{}）替换为指向保留文件的硬链接吗？')
+        if plan is None:
+            return
+        self.pending_items = {data[0]: item for _, item, data in plan}
+        self.explorer.run_batch(
+            [(keep[0], data[0], data[2], data[1], keep[1]) for keep, _, data in plan],
+            lambda args: replace_with_link(*args),
+            '替换为硬链接', lambda done, errors, cancelled: self.on_batch_finished(errors))
+
+    def on_batch_finished(self, errors):
+        failed = {item if isinstance(item, str) else item[1] for item, _ in errors}
+        # 成功处理的文件从列表中移除，只剩一个文件的组一并移除
+        self.tree.blockSignals(True)
+        for path, item in self.pending_items.items():
+            if path not in failed:
+                group_item = item.parent()
+                group_item.removeChild(item)
+                if group_item.childCount() < 2:
+                    self.tree.takeTopLevelItem(self.tree.indexOfTopLevelItem(group_item))
+        self.tree.blockSignals(False)
+        self.pending_items = {}
+        if errors:
+            details = '\n'.join(f'{os.path.basename(item if isinstance(item, str) else item[1])}: '
+                                f'{reason}' for item, reason in errors[:10])
+            QMessageBox.warning(self, '错误', f'{len(errors)} 个文件处理失败:\n{details}')
+        self.update_summary()
+
+    def done(self, result):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+        super().done(result)
@@ -1,17 +1,55 @@
 import os
+import re
 import sys
+import locale
 import shutil
+import stat
 import time
+import subprocess
+import tempfile
+import multiprocessing
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QTreeView, QFileSystemModel, QPushButton,
                             QInputDialog, QMessageBox, QLineEdit, QLabel, 
-                            QFileDialog, QMenu, QDialog, QTextEdit, QShortcut,
+                            QFileDialog, QMenu, QDialog, QShortcut,
                             QComboBox, QProgressDialog, QAbstractItemView,
                             QGroupBox, QFormLayout, QDialogButtonBox, QCheckBox,
-                            QGridLayout, QToolBar, QStatusBar, QFileIconProvider)
-from PyQt5.QtCore import QDir, Qt, QSize, QUrl
-from PyQt5.QtGui import QImage, QPixmap, QKeySequence, QIcon
+                            QGridLayout, QToolBar, QStatusBar)
+from PyQt5.QtCore import (QDir, Qt, QSize, QUrl, QTimer, QModelIndex, QPoint, QItemSelection,
+                          QItemSelectionModel, pyqtSignal)
+from PyQt5.QtGui import QPixmap, QKeySequence, QIcon
 from login_dialog import LoginDialog
+from utils import format_size, cache_dir, shutdown_process_pool
+from search_engine import SearchWorker, SearchResultsModel, SEARCH_MODES
+from dir_size import DirSizeWorker
+from disk_usage import DiskUsageDialog
+from copy_engine import (CopyWorker, MoveWorker, CopyProgressDialog, VerifyReportDialog,
+                         fast_copy_file, unique_name)
+from batch_ops import BatchWorker, BatchProgressDialog, ordered_by_location, plan_batch_rename
+from trash import move_to_trash, PurgeWorker, TrashDialog
+from content_search import ContentSearchWorker, ContentResultsModel
+from file_index import FileIndex, IndexWorker, IndexSearchWorker, IndexStatusDialog
+from thumbnails import shared_loader, is_image
+from thumbnail_view import ThumbnailView
+from icon_cache import CachedIconProvider
+from dir_model import DirModel, DirSnapshot, SnapshotCache, CountWorker, LARGE_DIR_THRESHOLD
+from dir_watch import DirWatcher
+from file_filter import (FileFilter, FileFilterProxy, TYPE_FILTERS, SIZE_RANGES,
+                         MODIFIED_RANGES)
+from text_viewer import TextViewerPanel
+from hex_viewer import HexViewerPanel
+from duplicates import DuplicatesDialog
+from sync import SyncDialog
+from archive import (CompressWorker, ExtractWorker, available_formats, archive_format,
+                     archive_stem)
+from archive_model import ArchiveModel, ArchiveCopyWorker, split_archive_path
+
+# 索引自动刷新间隔（毫秒）
+INDEX_REFRESH_INTERVAL = 10 * 60 * 1000
+# 预览图片的最大尺寸
+PREVIEW_SIZE = QSize(550, 350)
+# 返回目录时最多恢复的选中项目数
+MAX_RESTORED_SELECTION = 1000
 
 class PreviewDialog(QDialog):
     def __init__(self, file_path):
@@ -21,46 +59,91 @@ class PreviewDialog(QDialog):
         layout = QVBoxLayout(self)
         
         # 文本预览
-        self.text_preview = QTextEdit()
-        self.text_preview.setReadOnly(True)
+        self.text_preview = TextViewerPanel()
         
         # 图片预览
         self.image_label = QLabel()
         self.image_label.setAlignment(Qt.AlignCenter)
         
+        # 二进制文件的十六进制预览
+        self.hex_preview = HexViewerPanel()
+        
         layout.addWidget(self.text_preview)
         layout.addWidget(self.image_label)
+        layout.addWidget(self.hex_preview)
         
+        self.loader = None
         self.load_preview(file_path)
     
     def load_preview(self, file_path):
-        # 图片预览
-        if file_path.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp')):
-            image = QImage(file_path)
-            if not image.isNull():
-                pixmap = QPixmap.fromImage(image)
-                scaled_pixmap = pixmap.scaled(QSize(550, 350), Qt.KeepAspectRatio)
-                self.image_label.setPixmap(scaled_pixmap)
-                self.text_preview.hide()
-                return
+        # 图片预览：在后台线程按预览尺寸解码，结果进入缩略图缓存
+        if is_image(file_path):
+            self.file_path = file_path
+            self.loader = shared_loader()
+            self.text_preview.hide()
+            self.hex_preview.hide()
+            image = self.loader.request(file_path, PREVIEW_SIZE)
+            if image is not None:
+                self.show_image(image)
+            else:
+                self.image_label.setText('正在加载...')
+                self.loader.loaded.connect(self.on_image_loaded)
+            return
         
-        # 文本预览
+        # 文本预览：内存映射文件，只解码可见的行
+        self.image_label.hide()
+        self.hex_preview.hide()
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read(4000)  # 限制预览内容大小
-                self.text_preview.setText(content)
-                self.image_label.hide()
-        except:
-            self.text_preview.setText('无法预览此文件')
-            self.image_label.hide()
+            if self.text_preview.open_file(file_path):
+                self.resize(900, 600)
+                return
+            # 无法按文本解码时使用十六进制视图
+            self.text_preview.hide()
+            self.hex_preview.open_file(file_path)
+            self.hex_preview.show()
+            self.resize(900, 600)
+            return
+        except (OSError, ValueError):
+            pass
+        self.text_preview.hide()
+        self.hex_preview.hide()
+        self.image_label.setText('无法预览此文件')
+        self.image_label.show()
+
+    def on_image_loaded(self, path, size, image):
+        if path != self.file_path or size != (PREVIEW_SIZE.width(), PREVIEW_SIZE.height()):
+            return
+        self.loader.loaded.disconnect(self.on_image_loaded)
+        self.show_image(image)
+
+    def show_image(self, image):
+        if image.isNull():
+            self.image_label.setText('无法预览此文件')
+        else:
+            self.image_label.setPixmap(QPixmap.fromImage(image))
+
+    def done(self, result):
+        self.text_preview.close_file()
+        self.hex_preview.close_file()
+        if self.loader is not None:
+            self.loader.cancel(self.file_path, PREVIEW_SIZE)
+            try:
+                self.loader.loaded.disconnect(self.on_image_loaded)
+            except TypeError:
+                pass
+        super().done(result)
 
 class PropertiesDialog(QDialog):
-    def __init__(self, file_path, parent=None):
+    def __init__(self, file_path, parent=None, paths=None):
         super().__init__(parent)
         self.file_path = file_path
+        # 多选时统计所有选中项
+        self.paths = paths or [file_path]
+        self.size_worker = None
         self.setWindowTitle('文件属性')
         self.setGeometry(200, 200, 400, 500)
         self.setup_ui()
+        self.start_size_scan()
         
     def setup_ui(self):
         layout = QVBoxLayout(self)
@@ -69,16 +152,22 @@ class PropertiesDialog(QDialog):
         info_group = QGroupBox('基本信息')
         info_layout = QFormLayout()
         
-        self.name_edit = QLineEdit(os.path.basename(self.file_path))
+        multiple = len(self.paths) > 1
+        name = f'{len(self.paths)} 个项目' if multiple else os.path.basename(self.file_path)
+        self.name_edit = QLineEdit(name)
         self.name_edit.setReadOnly(True)
         info_layout.addRow('名称:', self.name_edit)
         
-        self.type_label = QLabel(self.get_file_type())
+        self.type_label = QLabel('多个项目' if multiple else self.get_file_type())
         info_layout.addRow('类型:', self.type_label)
         
-        self.size_label = QLabel(self.get_file_size())
+        # 大小在后台线程中逐步统计
+        self.size_label = QLabel('正在计算...')
         info_layout.addRow('大小:', self.size_label)
         
+        self.count_label = QLabel('')
+        info_layout.addRow('包含:', self.count_label)
+        
         self.location_edit = QLineEdit(os.path.dirname(self.file_path))
         self.location_edit.setReadOnly(True)
         info_layout.addRow('位置:', self.location_edit)
@@ -90,9 +179,14 @@ class PropertiesDialog(QDialog):
         time_group = QGroupBox('时间信息')
         time_layout = QFormLayout()
         
-        created = time.localtime(os.path.getctime(self.file_path))
-        modified = time.localtime(os.path.getmtime(self.file_path))
-        accessed = time.localtime(os.path.getatime(self.file_path))
+        # 失效的符号链接退回到链接本身的信息
+        try:
+            stat = os.stat(self.file_path)
+        except OSError:
+            stat = os.lstat(self.file_path)
+        created = time.localtime(stat.st_ctime)
+        modified = time.localtime(stat.st_mtime)
+        accessed = time.localtime(stat.st_atime)
         
         time_layout.addRow('创建时间:', QLabel(time.strftime('%Y-%m-%d %H:%M:%S', created)))
         time_layout.addRow('修改时间:', QLabel(time.strftime('%Y-%m-%d %H:%M:%S', modified)))
@@ -100,6 +194,7 @@ class PropertiesDialog(QDialog):
         
         time_group.setLayout(time_layout)
         layout.addWidget(time_group)
+        time_group.setVisible(not multiple)
         
         # 权限设置
         perm_group = QGroupBox('权限设置')
@@ -110,12 +205,15 @@ class PropertiesDialog(QDialog):
         self.exec_cb = QCheckBox('执行')
         
         # 获取当前权限
-        stat = os.stat(self.file_path)
         mode = stat.st_mode
         
         self.read_cb.setChecked(bool(mode & 0o444))
         self.write_cb.setChecked(bool(mode & 0o222))
         self.exec_cb.setChecked(bool(mode & 0o111))
+        # 多选时复选框只反映当前项，确定时只修改用户改动过的权限位
+        self.perm_boxes = [(self.read_cb, 0o444, self.read_cb.isChecked()),
+                           (self.write_cb, 0o222, self.write_cb.isChecked()),
+                           (self.exec_cb, 0o111, self.exec_cb.isChecked())]
         
         perm_layout.addWidget(self.read_cb, 0, 0)
         perm_layout.addWidget(self.write_cb, 0, 1)
@@ -147,33 +245,94 @@ class PropertiesDialog(QDialog):
         }
         return type_map.get(ext, f'{ext[1:].upper()}文件' if ext else '文件')
     
-    def get_file_size(self):
-        if os.path.isdir(self.file_path):
-            total_size = 0
-            for dirpath, dirnames, filenames in os.walk(self.file_path):
-                for f in filenames:
-                    fp = os.path.join(dirpath, f)
-                    total_size += os.path.getsize(fp)
-            return format_size(total_size)
-        return format_size(os.path.getsize(self.file_path))
+    def start_size_scan(self):
+        self.size_worker = DirSizeWorker(self.paths, self)
+        self.size_worker.progress.connect(self.update_size)
+        self.size_worker.size_finished.connect(self.on_size_finished)
+        self.size_worker.start()
+
+    def update_size(self, size, files, dirs):
+        self.size_label.setText(f'{format_size(size)} ({size:,} 字节)')
+        self.count_label.setText(f'{files} 个文件，{dirs} 个文件夹')
+
+    def on_size_finished(self, size, files, dirs, elapsed):
+        self.update_size(size, files, dirs)
+        self.size_worker = None
+
+    def done(self, result):
+        # 关闭对话框时停止统计线程
+        if self.size_worker is not None:
+            self.size_worker.cancel()
+            self.size_worker.wait()
+        super().done(result)
     
     def accept(self):
         try:
-            # 计算新的权限模式
-            mode = 0
-            if self.read_cb.isChecked():
-                mode |= 0o444
-            if self.write_cb.isChecked():
-                mode |= 0o222
-            if self.exec_cb.isChecked():
-                mode |= 0o111
+            # 只计算用户改动过的权限位
+            changed_mask = new_bits = 0
+            for box, bits, initial in self.perm_boxes:
+                if box.isChecked() != initial:
+                    changed_mask |= bits
+                    if box.isChecked():
+                        new_bits |= bits
                 
-            # 应用新的权限
-            os.chmod(self.file_path, mode)
+            # 其余权限位保持各项目原来的值
+            if changed_mask:
+                for path in self.paths:
+                    mode = stat.S_IMODE(os.stat(path).st_mode)
+                    os.chmod(path, (mode & ~changed_mask) | new_bits)
             super().accept()
         except Exception as e:
             QMessageBox.warning(self, '错误', f'无法修改权限: {str(e)}')
 
+class FileDropMixin:
+    """ 文件视图共用的拖放处理，子类需定义 files_dropped 信号 """
+
+    def drop_target(self, pos):
+        # 拖到文件夹上放入该文件夹，拖到文件或空白处放入当前目录
+        index = self.indexAt(pos)
+        if index.isValid():
+            path = self.model().filePath(index)
+            return path if os.path.isdir(path) else os.path.dirname(path)
+        return self.model().filePath(self.rootIndex())
+
+    def dragEnterEvent(self, event):
+        if event.mimeData().hasUrls():
+            event.acceptProposedAction()
+        else:
+            event.ignore()
+
+    def dragMoveEvent(self, event):
+        super().dragMoveEvent(event)  # 保留拖动时的自动滚动
+        if event.mimeData().hasUrls() and self.drop_target(event.pos()):
+            copy = event.keyboardModifiers() & Qt.ControlModifier
+            event.setDropAction(Qt.CopyAction if copy else Qt.MoveAction)
+            event.accept()
+        else:
+            event.ignore()
+
+    def dropEvent(self, event):
+        target = self.drop_target(event.pos())
+        paths = [url.toLocalFile() for url in event.mimeData().urls() if url.isLocalFile()]
+        if not target or not paths:
+            event.ignore()
+            return
+        copy = bool(event.keyboardModifiers() & Qt.ControlModifier)
+        # 移动由后台任务完成，对拖动源始终回应复制，避免源端再删除一次
+        event.setDropAction(Qt.CopyAction)
+        event.accept()
+        self.files_dropped.emit(paths, target, copy)
+
+
+class FileTreeView(FileDropMixin, QTreeView):
+    # 源路径列表, 目标目录, 是否复制
+    files_dropped = pyqtSignal(list, str, bool)
+
+
+class FileGridView(FileDropMixin, ThumbnailView):
+    files_dropped = pyqtSignal(list, str, bool)
+
+
 class FileExplorer(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -194,10 +353,44 @@ class FileExplorer(QMainWindow):
         self.move(x, y)
         
         # 保存剪贴板中的文件路径
-        self.clipboard_file = None
+        self.clipboard_files = []
+        # 复制后是否读回目标校验内容
+        self.verify_copies = False
+        
+        # 正在进行的后台复制和清理任务
+        self.copy_workers = []
+        self.purge_workers = []
+        self.batch_workers = []
+        
+        # 当前的后台搜索线程
+        self.search_worker = None
+        # 大目录模式下监视当前目录的线程
+        self.dir_watcher = None
+        # 统计当前目录条目数的线程
+        self.count_worker = None
+        
+        # 文件名索引，打不开时退回到遍历搜索
+        try:
+            self.file_index = FileIndex()
+        except Exception:
+            self.file_index = None
+        self.index_worker = None
         
         self.history = []
         self.current_index = -1
+        # 离开目录时保存的快照，返回/前进时立即显示
+        self.snapshots = SnapshotCache()
+        # 当前显示的目录，None 表示还没有显示过
+        self.shown_path = None
+        # 等目录加载完成后恢复的视图状态
+        self.pending_view = None
+        
+        # 是否以缩略图网格显示
+        self.grid_mode = False
+        # 手动指定是否使用大目录模式的目录
+        self.large_dir_overrides = {}
+        # 当前目录的筛选条件
+        self.file_filter = None
         
         # 添加撤销/重做栈
         self.undo_stack = []
@@ -210,6 +403,13 @@ class FileExplorer(QMainWindow):
         
         # 初始化时显示根目录（计算机）
         self.goto_root()
+        
+        # 定时按目录 mtime 增量更新索引
+        if self.file_index is not None:
+            self.index_timer = QTimer(self)
+            self.index_timer.timeout.connect(self.refresh_index)
+            self.index_timer.start(INDEX_REFRESH_INTERVAL)
+            QTimer.singleShot(5000, self.refresh_index)
 
     def setup_ui(self):
         # 创建主窗口部件
@@ -235,15 +435,27 @@ class FileExplorer(QMainWindow):
         self.search_input.setPlaceholderText('输入文件名搜索...')
         self.search_input.setClearButtonEnabled(True)
 
+        self.search_mode = QComboBox()
+        for text, mode in SEARCH_MODES:
+            self.search_mode.addItem(text, mode)
+
         self.search_subdirs = QCheckBox('搜索子目录')
+        self.search_contents = QCheckBox('搜索内容')
         search_button = QPushButton('搜索')
         search_button.clicked.connect(self.search_files)
         self.search_input.returnPressed.connect(self.search_files)
 
+        self.stop_search_button = QPushButton('停止')
+        self.stop_search_button.setEnabled(False)
+        self.stop_search_button.clicked.connect(self.stop_search)
+
         search_layout.addWidget(QLabel('搜索:'))
         search_layout.addWidget(self.search_input)
+        search_layout.addWidget(self.search_mode)
         search_layout.addWidget(self.search_subdirs)
+        search_layout.addWidget(self.search_contents)
         search_layout.addWidget(search_button)
+        search_layout.addWidget(self.stop_search_button)
         content_layout.addLayout(search_layout)
         
         # 创建导航栏
@@ -253,6 +465,11 @@ class FileExplorer(QMainWindow):
         # 创建文件系统模型和视图
         self.create_file_view()
         content_layout.addWidget(self.tree)
+        content_layout.addWidget(self.grid)
+        
+        # 创建搜索结果视图（搜索时替换文件视图）
+        self.create_search_view()
+        content_layout.addWidget(self.search_view)
         
         # 创建底部按钮栏
         button_layout = self.create_button_bar()
@@ -299,12 +516,32 @@ class FileExplorer(QMainWindow):
             ('前进', '→', self.go_forward),
             ('刷新', '↻', self.refresh_view),
             ('根目录', '⌂', self.goto_root),
+            ('文件索引', '⌕', self.show_index_status),
+            ('磁盘占用', '▦', self.show_disk_usage),
+            ('回收站', '♻', self.show_trash),
+            ('查找重复文件', '⧉', self.find_duplicates),
+            ('比较与同步', '⇄', self.show_sync),
         ]
         
         for name, icon, slot in toolbar_actions:
             action = toolbar.addAction(icon)
             action.setToolTip(name)
             action.triggered.connect(slot)
+        
+        view_action = toolbar.addAction('▣')
+        view_action.setToolTip('缩略图')
+        view_action.setCheckable(True)
+        view_action.toggled.connect(self.toggle_view_mode)
+        
+        self.large_dir_action = toolbar.addAction('☰')
+        self.large_dir_action.setToolTip('大目录模式')
+        self.large_dir_action.setCheckable(True)
+        self.large_dir_action.triggered.connect(self.toggle_large_dir)
+        
+        verify_action = toolbar.addAction('✓')
+        verify_action.setToolTip('复制后校验')
+        verify_action.setCheckable(True)
+        verify_action.toggled.connect(self.set_verify_copies)
 
     def show_context_menu(self, position):
         menu = QMenu()
@@ -316,6 +553,9 @@ class FileExplorer(QMainWindow):
             ('重命名', self.rename_file),
             ('预览', self.preview_file),
             (None, None),  # 添加分隔符
+            ('压缩...', self.compress_files),
+            ('解压', self.extract_archives),
+            (None, None),
             ('新建文件夹', self.create_new_folder),
             ('新建文件', self.create_new_file),
             ('属性', self.show_properties),
@@ -328,67 +568,221 @@ class FileExplorer(QMainWindow):
                 action = menu.addAction(text)
                 action.triggered.connect(slot)
         
-        menu.exec_(self.tree.viewport().mapToGlobal(position))
+        menu.exec_(self.active_file_view().viewport().mapToGlobal(position))
+
+    def get_current_dir(self):
+        model = self.file_model()
+        return model.filePath(self.tree.rootIndex()) or model.rootPath()
 
     def get_selected_path(self):
         index = self.tree.currentIndex()
         if not index.isValid():
             return None
-        return self.model.filePath(index)
+        return self.file_model().filePath(index)
+
+    def get_action_paths(self):
+        # 操作作用于整个选择；没有选择时退回到当前项
+        paths = self.get_selected_paths()
+        current = self.get_selected_path()
+        if not paths and current:
+            paths = [current]
+        return paths
+
+    def open_with_system(self, file_path):
+        """ 用系统默认程序打开文件，路径作为单独的参数传递，不经过 shell """
+        try:
+            if sys.platform == 'win32':
+                os.startfile(file_path)
+            else:
+                subprocess.Popen(['xdg-open', file_path], stdin=subprocess.DEVNULL,
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except OSError as e:
+            QMessageBox.warning(self, '错误', f'无法打开文件: {str(e)}')
 
     def open_file(self):
-        file_path = self.get_selected_path()
-        if file_path and os.path.isfile(file_path):
-            os.startfile(file_path) if sys.platform == 'win32' else os.system(f'xdg-open "{file_path}"')
+        files = [p for p in self.get_action_paths() if os.path.isfile(p)]
+        if len(files) > 10:
+            reply = QMessageBox.question(self, '确认打开', f'确定要打开 {len(files)} 个文件吗？',
+                                         QMessageBox.Yes | QMessageBox.No)
+            if reply != QMessageBox.Yes:
+                return
+        for file_path in files:
+            self.open_with_system(file_path)
 
     def copy_file(self):
-        self.clipboard_file = self.get_selected_path()
-        if self.clipboard_file:
-            QMessageBox.information(self, '复制', '文件已复制到剪贴板')
+        paths = self.get_action_paths()
+        if paths:
+            self.clipboard_files = paths
+            QMessageBox.information(self, '复制', f'已复制 {len(paths)} 个项目到剪贴板')
 
     def paste_file(self):
-        if not self.clipboard_file or not os.path.exists(self.clipboard_file):
+        if not self.check_writable():
+            return
+        sources = [p for p in self.clipboard_files if os.path.lexists(p)]
+        # 从压缩包中复制的项目只存在于压缩包内
+        members = [p for p in self.clipboard_files if p not in sources and split_archive_path(p)]
+        if not sources and not members:
             QMessageBox.warning(self, '错误', '剪贴板为空或源文件不存在')
             return
             
-        dest_path = self.get_selected_path() or QDir.rootPath()
+        dest_path = self.get_selected_path() or self.get_current_dir() or QDir.rootPath()
         if os.path.isfile(dest_path):
             dest_path = os.path.dirname(dest_path)
-            
-        try:
-            if os.path.isfile(self.clipboard_file):
-                shutil.copy2(self.clipboard_file, dest_path)
-            else:
-                shutil.copytree(self.clipboard_file, 
-                               os.path.join(dest_path, os.path.basename(self.clipboard_file)))
-            QMessageBox.information(self, '成功', '文件粘贴成功')
-        except Exception as e:
-            QMessageBox.warning(self, '错误', f'粘贴失败: {str(e)}')
+        
+        if sources:
+            self.start_copy(sources, dest_path)
+        if members:
+            self.run_copy_worker(ArchiveCopyWorker(members, dest_path, self), '从压缩包复制')
+
+    def start_copy(self, sources, dest_dir, move=False):
+        # 在后台线程中复制或移动，界面保持响应
+        title = '移动' if move else '粘贴'
+        worker = (MoveWorker if move else CopyWorker)(sources, dest_dir, self,
+                                                     verify_contents=self.verify_copies)
+        return self.run_copy_worker(worker, title)
+
+    def run_copy_worker(self, worker, title):
+        progress = CopyProgressDialog(worker, title, self)
+        worker.job_finished.connect(
+            lambda copied, errors, cancelled, elapsed:
+                self.on_copy_finished(worker, progress, title, copied, errors, cancelled))
+        self.copy_workers.append(worker)
+        worker.start()
+        return worker
+
+    def on_copy_finished(self, worker, progress, title, copied, errors, cancelled):
+        progress.close()
+        progress.deleteLater()
+        self.copy_workers.remove(worker)
+        worker.wait()
+        worker.deleteLater()
+        if worker.report:
+            dialog = VerifyReportDialog(worker.report, self)
+            dialog.setAttribute(Qt.WA_DeleteOnClose)
+            dialog.show()
+        if cancelled:
+            self.statusBar.showMessage(f'{title}已取消，已完成 {copied} 个文件', 5000)
+        elif errors:
+            details = '\n'.join(f'{os.path.basename(path)}: {reason}' for path, reason in errors[:10])
+            QMessageBox.warning(self, '错误', f'{title}完成，{len(errors)} 项失败:\n{details}')
+        else:
+            self.statusBar.showMessage(f'{title}成功，共 {copied} 个文件', 5000)
+
+    def compress_files(self):
+        paths = self.get_action_paths()
+        if not paths or not self.check_writable():
+            return
+        formats = available_formats()
+        text, ok = QInputDialog.getItem(self, '压缩', '压缩格式:', [f[0] for f in formats], 0, False)
+        if not ok:
+            return
+        _, fmt, suffix = next(f for f in formats if f[0] == text)
+        dest_dir = os.path.dirname(paths[0])
+        default = os.path.basename(paths[0]) if len(paths) == 1 else os.path.basename(dest_dir)
+        name, ok = QInputDialog.getText(self, '压缩', '压缩包名称:', text=default or '归档')
+        if not ok or not name.strip():
+            return
+        name = unique_name(dest_dir, name.strip() + suffix)
+        self.run_copy_worker(CompressWorker(paths, os.path.join(dest_dir, name), fmt, self), '压缩')
+
+    def extract_archives(self):
+        archives = [p for p in self.get_action_paths() if archive_format(p) and os.path.isfile(p)]
+        if not archives:
+            QMessageBox.warning(self, '错误', '请选择 zip 或 tar 压缩包')
+            return
+        taken = set()
+        for path in archives:
+            # 解压到压缩包旁边的同名文件夹；目标文件夹由后台任务创建，
+            # 同一批中已分配的名称也要避开
+            dest_dir = os.path.dirname(path)
+            name = unique_name(dest_dir, archive_stem(path), taken)
+            taken.add(name)
+            target = os.path.join(dest_dir, name)
+            self.run_copy_worker(ExtractWorker(path, target, self), '解压')
+
+    def set_verify_copies(self, checked):
+        self.verify_copies = checked
+
+    def on_files_dropped(self, paths, dest_dir, copy):
+        sources = [p for p in paths if os.path.lexists(p)]
+        if sources and os.path.isdir(dest_dir):
+            self.start_copy(sources, dest_dir, move=not copy)
 
     def delete_file(self):
-        file_path = self.get_selected_path()
-        if not file_path:
+        paths = self.get_action_paths()
+        if not paths or not self.check_writable():
             return
-            
+        
+        name = os.path.basename(paths[0]) if len(paths) == 1 else f'这 {len(paths)} 个项目'
         reply = QMessageBox.question(self, '确认删除', 
-                                   f'确定要删除 {os.path.basename(file_path)} 吗？',
+                                   f'确定要将 {name} 移到回收站吗？',
                                    QMessageBox.Yes | QMessageBox.No)
-                                   
-        if reply == QMessageBox.Yes:
-            try:
-                if os.path.isfile(file_path):
-                    os.remove(file_path)
-                else:
-                    shutil.rmtree(file_path)
-                QMessageBox.information(self, '成功', '删除成功')
-            except Exception as e:
-                QMessageBox.warning(self, '错误', f'删除失败: {str(e)}')
+        if reply != QMessageBox.Yes:
+            return
+        
+        # 移到同一文件系统的回收站只是一次重命名；按设备和目录排序，
+        # 同一设备的回收站位置只查找一次
+        trash_cache = {}
+        self.run_batch(ordered_by_location(paths), lambda path: move_to_trash(path, trash_cache),
+                       '移到回收站', self.on_trash_finished)
+
+    def on_trash_finished(self, done, errors, cancelled):
+        if errors:
+            details = '\n'.join(f'{os.path.basename(path)}: {reason}' for path, reason in errors[:10])
+            reply = QMessageBox.question(self, '无法移到回收站',
+                                         f'{len(errors)} 个项目无法移到回收站:\n{details}\n\n'
+                                         '是否永久删除这些项目？',
+                                         QMessageBox.Yes | QMessageBox.No)
+            if reply == QMessageBox.Yes:
+                self.start_purge([(path, None) for path, _ in errors])
+        self.statusBar.showMessage(f'已将 {done} 个项目移到回收站', 5000)
+
+    def run_batch(self, items, action, title, on_finished):
+        # 整个选择作为一个后台任务执行，只有一个进度窗口
+        worker = BatchWorker(items, action, self)
+        progress = BatchProgressDialog(worker, title, self)
+        
+        def finished(done, errors, cancelled):
+            progress.close()
+            progress.deleteLater()
+            self.batch_workers.remove(worker)
+            worker.wait()
+            worker.deleteLater()
+            on_finished(done, errors, cancelled)
+        
+        worker.batch_finished.connect(finished)
+        self.batch_workers.append(worker)
+        worker.start()
+        return worker
+
+    def show_trash(self):
+        dialog = TrashDialog(self)
+        dialog.exec_()
+
+    def start_purge(self, items):
+        # 在后台并行删除，释放磁盘空间
+        worker = PurgeWorker(items, self)
+        worker.purge_finished.connect(lambda removed, errors: self.on_purge_finished(worker, removed, errors))
+        self.purge_workers.append(worker)
+        worker.start()
+        return worker
+
+    def on_purge_finished(self, worker, removed, errors):
+        self.purge_workers.remove(worker)
+        worker.wait()
+        worker.deleteLater()
+        if errors:
+            self.statusBar.showMessage(f'删除完成，{len(errors)} 项失败', 5000)
 
     def rename_file(self):
-        file_path = self.get_selected_path()
-        if not file_path:
+        paths = self.get_action_paths()
+        if not paths or not self.check_writable():
+            return
+        if len(paths) > 1:
+            self.batch_rename(paths)
             return
             
+        file_path = paths[0]
         old_name = os.path.basename(file_path)
         new_name, ok = QInputDialog.getText(self, '重命名', 
                                           '输入新名称:', 
@@ -403,64 +797,219 @@ class FileExplorer(QMainWindow):
             except Exception as e:
                 QMessageBox.warning(self, '错误', f'重命名失败: {str(e)}')
 
+    def batch_rename(self, paths):
+        template, ok = QInputDialog.getText(self, '批量重命名',
+                                            f'为 {len(paths)} 个项目输入新名称，{{n}} 会替换为序号:',
+                                            QLineEdit.Normal, '文件_{n}')
+        if not ok or not template:
+            return
+        
+        renames, conflicts = plan_batch_rename(paths, template)
+        if conflicts:
+            details = '\n'.join(f'{os.path.basename(path)}: {reason}' for path, reason in conflicts[:10])
+            reply = QMessageBox.question(self, '名称冲突',
+                                         f'{len(conflicts)} 个项目无法重命名:\n{details}\n\n是否继续重命名其余项目？',
+                                         QMessageBox.Yes | QMessageBox.No)
+            if reply != QMessageBox.Yes:
+                return
+        self.run_batch(renames, lambda pair: os.rename(*pair), '批量重命名',
+                       self.on_batch_rename_finished)
+
+    def on_batch_rename_finished(self, done, errors, cancelled):
+        if errors:
+            details = '\n'.join(f'{os.path.basename(old)}: {reason}' for (old, _), reason in errors[:10])
+            QMessageBox.warning(self, '错误', f'{len(errors)} 个项目重命名失败:\n{details}')
+        self.statusBar.showMessage(f'已重命名 {done} 个项目', 5000)
+
     def search_files(self):
-        search_text = self.search_input.text().lower()
-        current_path = self.model.rootPath() or QDir.rootPath()
+        search_text = self.search_input.text()
+        self.stop_search()
         
         if not search_text:
-            # 清除过滤器，显示所有文件
-            self.model.setNameFilters([])
-            self.tree.clearSelection()
-            self.statusBar.showMessage('就绪')
+            self.clear_search()
+            return
+        
+        current_path = self.get_local_dir() or QDir.rootPath()
+        recursive = self.search_subdirs.isChecked()
+        mode = self.search_mode.currentData()
+        if self.search_contents.isChecked():
+            try:
+                worker = ContentSearchWorker(current_path, search_text, mode=mode,
+                                             recursive=recursive, parent=self)
+            except Exception as e:
+                self.statusBar.showMessage(f'搜索出错: {str(e)}')
+                return
+            worker.progress.connect(self.on_content_search_progress)
+            worker.search_failed.connect(self.on_content_search_failed)
+            self.start_search_worker(worker, self.content_model)
             return
         
+        if self.search_index(current_path, search_text, mode, recursive):
+            return
+        self.start_walk_search(current_path, search_text, mode, recursive)
+
+    def start_walk_search(self, current_path, search_text, mode, recursive):
         try:
-            # 设置状态栏
-            self.statusBar.showMessage('正在搜索...')
-            QApplication.processEvents()  # 让界面保持响应
-            
-            # 使用 QDir 进行快速搜索
-            dir = QDir(current_path)
-            dir.setNameFilters([f'*{search_text}*'])
-            dir.setFilter(QDir.AllEntries | QDir.NoDotAndDotDot | QDir.AllDirs)
-            
-            # 获取匹配的文件
-            matched_files = []
-            for file_info in dir.entryInfoList():
-                if search_text in file_info.fileName().lower():
-                    matched_files.append(file_info.filePath())
-                    
-                    # 获取文件的索引并选中
-                    index = self.model.index(file_info.filePath())
-                    self.tree.selectionModel().select(
-                        index, self.tree.selectionModel().Select)
-                    
-                    # 每找到10个文件就更新一次界面
-                    if len(matched_files) % 10 == 0:
-                        self.statusBar.showMessage(f'已找到 {len(matched_files)} 个匹配项...')
-                        QApplication.processEvents()
-            
-            # 如果有匹配项，选中第一个
-            if matched_files:
-                first_match = self.model.index(matched_files[0])
-                self.tree.setCurrentIndex(first_match)
-                self.tree.scrollTo(first_match)
-                
-            # 更新状态栏
-            self.statusBar.showMessage(f'找到 {len(matched_files)} 个匹配项')
-            
+            worker = SearchWorker(current_path, search_text, mode=mode,
+                                  recursive=recursive, parent=self)
         except Exception as e:
             self.statusBar.showMessage(f'搜索出错: {str(e)}')
+            return
+        worker.progress.connect(self.on_search_progress)
+        self.start_search_worker(worker, self.search_model)
+
+    def start_search_worker(self, worker, model):
+        worker.results_found.connect(self.on_search_results)
+        worker.search_finished.connect(self.on_search_finished)
+        worker.finished.connect(worker.deleteLater)
+        self.search_worker = worker
+        
+        # 显示搜索结果视图
+        self.show_search_results(model)
+        self.stop_search_button.setEnabled(True)
+        self.statusBar.showMessage('正在搜索...')
+        worker.start()
+
+    def show_search_results(self, model):
+        model.clear()
+        self.search_view.setModel(model)
+        self.tree.hide()
+        self.grid.hide()
+        self.search_view.show()
+
+    def search_index(self, current_path, search_text, mode, recursive):
+        # 当前目录在已索引的根目录内时在后台查询索引，结果和遍历搜索一样分批显示；
+        # 正则无法利用索引
+        if mode == 'regex' or self.file_index is None:
+            return False
+        if not self.file_index.covering_root(current_path):
+            return False
+        worker = IndexSearchWorker(current_path, search_text, mode=mode, recursive=recursive,
+                                   db_path=self.file_index.db_path, parent=self)
+        worker.progress.connect(self.on_search_progress)
+        worker.search_failed.connect(self.on_index_search_failed)
+        self.start_search_worker(worker, self.search_model)
+        return True
+
+    def on_index_search_failed(self, message):
+        worker = self.sender()
+        if worker is not self.search_worker:
+            return
+        # 索引不可用（例如数据库被锁定）时改为遍历搜索
+        self.start_walk_search(worker.root, worker.pattern, worker.mode, worker.recursive)
+
+    def stop_search(self):
+        if self.search_worker is not None:
+            self.search_worker.cancel()
+
+    def clear_search(self):
+        self.stop_search()
+        self.search_worker = None
+        self.search_view.model().clear()
+        self.search_view.hide()
+        self.active_file_view().show()
+        self.stop_search_button.setEnabled(False)
+        self.statusBar.showMessage('就绪')
+
+    def on_search_results(self, batch):
+        # 忽略已被取代的旧搜索发来的结果
+        if self.sender() is not self.search_worker:
+            return
+        self.search_view.model().append_results(batch)
+
+    def on_search_progress(self, scanned, rate):
+        if self.sender() is not self.search_worker:
+            return
+        self.statusBar.showMessage(
+            f'正在搜索... 已找到 {self.search_model.rowCount()} 个匹配项，'
+            f'已扫描 {scanned} 项 ({rate:.0f} 项/秒)')
+
+    def on_content_search_progress(self, scanned, rate):
+        if self.sender() is not self.search_worker:
+            return
+        self.statusBar.showMessage(
+            f'正在搜索内容... 已找到 {self.content_model.rowCount()} 处匹配，'
+            f'已扫描 {scanned} 个文件 ({format_size(rate)}/秒)')
+
+    def on_content_search_failed(self, message):
+        if self.sender() is self.search_worker:
+            QMessageBox.warning(self, '错误', f'内容搜索中断，结果可能不完整: {message}')
+
+    def on_search_finished(self, matched, scanned, elapsed):
+        worker = self.sender()
+        if worker is not self.search_worker:
+            return
+        self.search_worker = None
+        self.stop_search_button.setEnabled(False)
+        rate = scanned / elapsed if elapsed > 0 else 0
+        state = '搜索已停止' if worker.is_cancelled() else '搜索完成'
+        self.statusBar.showMessage(
+            f'{state}: 找到 {matched} 个匹配项，扫描 {scanned} 项，'
+            f'用时 {elapsed:.1f} 秒 ({rate:.0f} 项/秒)')
+
+    def on_search_result_double_click(self, index):
+        file_path = self.search_view.model().file_path(index)
+        if not file_path:
+            return
+        if os.path.isdir(file_path):
+            self.clear_search()
+            self.navigate_to_path(file_path)
+        else:
+            self.open_with_system(file_path)
 
     def preview_file(self):
         file_path = self.get_selected_path()
+        if file_path and self.in_archive():
+            if not self.archive_model.isDir(self.tree.currentIndex()):
+                self.preview_member(file_path)
+            return
         if not file_path or not os.path.isfile(file_path):
             return
             
         dialog = PreviewDialog(file_path)
         dialog.exec_()
 
+    def preview_member(self, file_path):
+        """ 把单个成员从压缩包流式取到临时目录后预览，预览关闭后删除 """
+        temp_dir = tempfile.mkdtemp(dir=cache_dir('previews'))
+        worker = ArchiveCopyWorker([file_path], temp_dir, self)
+        worker.job_finished.connect(
+            lambda copied, errors, cancelled, elapsed:
+                self.on_member_extracted(temp_dir, copied, cancelled))
+        self.run_copy_worker(worker, '读取')
+
+    def on_member_extracted(self, temp_dir, copied, cancelled):
+        if not copied or cancelled:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            return
+        # 等进度窗口关闭后再打开预览
+        QTimer.singleShot(0, lambda: self.show_member_preview(temp_dir))
+
+    def show_member_preview(self, temp_dir):
+        names = os.listdir(temp_dir)
+        if names:
+            dialog = PreviewDialog(os.path.join(temp_dir, names[0]))
+            dialog.exec_()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def in_archive(self):
+        return self.file_model() is self.archive_model
+
+    def check_writable(self):
+        if self.in_archive():
+            QMessageBox.warning(self, '错误', '压缩包是只读的，请先解压')
+            return False
+        return True
+
+    def get_local_dir(self):
+        # 浏览压缩包时，需要真实目录的功能使用压缩包所在的目录
+        if self.in_archive():
+            return os.path.dirname(self.archive_model.archive_path)
+        return self.get_current_dir()
+
     def create_new_folder(self):
+        if not self.check_writable():
+            return
         current_path = self.get_selected_path() or QDir.rootPath()
         if os.path.isfile(current_path):
             current_path = os.path.dirname(current_path)
@@ -476,6 +1025,8 @@ class FileExplorer(QMainWindow):
                 QMessageBox.warning(self, '错误', f'创建失败: {str(e)}')
 
     def create_new_file(self):
+        if not self.check_writable():
+            return
         current_path = self.get_selected_path() or QDir.rootPath()
         if os.path.isfile(current_path):
             current_path = os.path.dirname(current_path)
@@ -492,42 +1043,82 @@ class FileExplorer(QMainWindow):
                 QMessageBox.warning(self, '错误', f'创建失败: {str(e)}')
 
     def show_properties(self):
-        file_path = self.get_selected_path()
-        if not file_path:
+        paths = self.get_action_paths()
+        if not paths or self.in_archive():
             return
         
-        dialog = PropertiesDialog(file_path, self)
+        # 当前项放在最前面，单独显示它的时间和权限
+        file_path = self.get_selected_path()
+        if file_path not in paths:
+            file_path = paths[0]
+        dialog = PropertiesDialog(file_path, self, paths=paths)
         dialog.exec_()
 
     def refresh_view(self):
-        self.model.setRootPath(self.model.rootPath())
+        if self.file_model() is self.dir_model:
+            self.dir_model.reload()
+        elif self.in_archive():
+            self.archive_model.reload()
+        else:
+            self.model.setRootPath(self.model.rootPath())
         self.update_path_display()
 
-    def apply_filter(self, filter_text):
-        if '所有文件' in filter_text:
-            self.model.setNameFilters(['*'])
+    def apply_filter(self, *args):
+        _, type_patterns, dirs_only = TYPE_FILTERS[self.filter_combo.currentIndex()]
+        _, min_size, max_size = SIZE_RANGES[self.size_combo.currentIndex()]
+        try:
+            file_filter = FileFilter(self.filter_input.text(), self.filter_mode.currentData(),
+                                     type_patterns, dirs_only, min_size, max_size,
+                                     MODIFIED_RANGES[self.modified_combo.currentIndex()][1],
+                                     self.hidden_check.isChecked())
+        except re.error:
+            self.statusBar.showMessage('正则表达式无效')
+            return
+        self.file_filter = file_filter
+        start = time.monotonic()
+        if self.file_model() is self.dir_model:
+            self.dir_model.set_file_filter(file_filter)
+        elif self.in_archive():
+            self.archive_model.set_file_filter(file_filter)
         else:
-            # 提取号中的过滤器
-            filters = filter_text[filter_text.find('(')+1:filter_text.find(')')].split()
-            self.model.setNameFilters(filters)
+            self.model.setFilter(self.fs_filter_flags(self.get_current_dir()))
+            self.fs_proxy.set_file_filter(file_filter, self.tree.model().mapToSource(self.tree.rootIndex()))
+        elapsed = (time.monotonic() - start) * 1000
+        count = self.file_model().rowCount(self.tree.rootIndex())
+        self.statusBar.showMessage(f'筛选后显示 {count} 个项目，用时 {elapsed:.0f} 毫秒')
+
+    def fs_filter_flags(self, path):
+        flags = QDir.AllEntries | QDir.NoDotAndDotDot | QDir.AllDirs
+        if not path:
+            flags = self.initial_filter
+        if self.file_filter is not None and self.file_filter.show_hidden:
+            flags |= QDir.Hidden
+        return flags
 
     def copy_with_progress(self, src, dst):
         size = os.path.getsize(src)
-        progress = QProgressDialog("复制文件中...", "取消", 0, size, self)
+        # 进度按千分比显示，超过 2 GB 的文件也不会溢出
+        progress = QProgressDialog("复制文件中...", "取消", 0, 1000, self)
         progress.setWindowModality(Qt.WindowModal)
+        copied = 0
         
-        with open(src, 'rb') as fsrc:
-            with open(dst, 'wb') as fdst:
-                copied = 0
-                while True:
-                    buf = fsrc.read(1024*1024)
-                    if not buf:
-                        break
-                    fdst.write(buf)
-                    copied += len(buf)
-                    progress.setValue(copied)
-                    if progress.wasCanceled():
-                        break
+        def on_progress(count):
+            nonlocal copied
+            copied += count
+            if size:
+                progress.setValue(int(copied * 1000 / size))
+        
+        try:
+            fast_copy_file(src, dst, on_progress, progress.wasCanceled)
+            shutil.copystat(src, dst)
+        except BaseException:
+            # 取消或出错时不留下不完整的目标文件
+            if os.path.lexists(dst):
+                os.remove(dst)
+            if not progress.wasCanceled():
+                raise
+        finally:
+            progress.close()
 
     def add_to_history(self, path):
         self.current_index += 1
@@ -538,14 +1129,14 @@ class FileExplorer(QMainWindow):
     def go_back(self):
         if self.current_index > 0:
             self.current_index -= 1
-            self.tree.setRootIndex(self.model.index(self.history[self.current_index]))
+            self.show_directory(self.history[self.current_index], restore=True)
             self.update_path_display()
             self.update_navigation_buttons()
         
     def go_forward(self):
         if self.current_index < len(self.history) - 1:
             self.current_index += 1
-            self.tree.setRootIndex(self.model.index(self.history[self.current_index]))
+            self.show_directory(self.history[self.current_index], restore=True)
             self.update_path_display()
             self.update_navigation_buttons()
 
@@ -564,39 +1155,32 @@ class FileExplorer(QMainWindow):
 
     def get_selected_paths(self):
         paths = []
+        model = self.file_model()
         for index in self.tree.selectedIndexes():
             if index.column() == 0:  # 只处理第一列
-                paths.append(self.model.filePath(index))
+                paths.append(model.filePath(index))
         return paths
 
     def on_double_click(self, index):
-        file_path = self.model.filePath(index)
-        if os.path.isfile(file_path):
-            os.startfile(file_path) if sys.platform == 'win32' else os.system(f'xdg-open "{file_path}"')
+        file_path = self.file_model().filePath(index)
+        if self.in_archive() and not self.archive_model.isDir(index):
+            self.preview_member(file_path)
+        elif os.path.isfile(file_path) and not archive_format(file_path):
+            self.open_with_system(file_path)
         else:
-            # 如果是文件夹或驱动器，进入该目录
-            if file_path:  # 如果是驱动器或文件夹
-                self.model.setFilter(QDir.AllEntries | QDir.NoDotAndDotDot | QDir.AllDirs)
-                self.model.setRootPath(file_path)
-                self.tree.setRootIndex(self.model.index(file_path))
-            else:  # 如果是根目录
-                self.model.setFilter(self.initial_filter)
-                self.model.setRootPath('')
-                self.tree.setRootIndex(self.model.index(''))
+            # 如果是文件夹、驱动器或压缩包，进入该目录
+            self.show_directory(file_path)
             self.add_to_history(file_path)
             self.update_path_display()
 
     def goto_root(self):
-        # 重置模型
-        self.model.setFilter(self.initial_filter)
-        # 设置为空字符显示所有驱动器
-        self.model.setRootPath('')
-        self.tree.setRootIndex(self.model.index(''))
+        # 空路径显示所有驱动器
+        self.show_directory('')
         self.update_path_display()
         self.add_to_history('')
 
     def update_path_display(self):
-        current_path = self.model.filePath(self.tree.rootIndex())
+        current_path = self.file_model().filePath(self.tree.rootIndex())
         if not current_path:  # 如果是根目录
             self.path_edit.setText('计算机')
         else:
@@ -614,15 +1198,9 @@ class FileExplorer(QMainWindow):
         if path == '计算机':
             path = ''
         
-        if path == '' or os.path.exists(path):  # 允许空路径（根目录）
-            if path:  # 如果不是根目录
-                self.model.setFilter(QDir.AllEntries | QDir.NoDotAndDotDot | QDir.AllDirs)
-                self.model.setRootPath(path)
-                self.tree.setRootIndex(self.model.index(path))
-            else:  # 如果是根目录
-                self.model.setFilter(self.initial_filter)
-                self.model.setRootPath('')
-                self.tree.setRootIndex(self.model.index(''))
+        # 允许空路径（根目录）和压缩包内的路径
+        if path == '' or os.path.exists(path) or split_archive_path(path):
+            self.show_directory(path)
             self.add_to_history(path)
             self.update_path_display()
         else:
@@ -658,12 +1236,31 @@ class FileExplorer(QMainWindow):
         # 创建文件系统模型
         self.model = QFileSystemModel()
         self.model.setRootPath(QDir.rootPath())
-        self.model.setIconProvider(QFileIconProvider())  # 添加文件图标支持
+        # 按扩展名缓存图标，避免逐个文件解析
+        self.icon_provider = CachedIconProvider()
+        self.model.setIconProvider(self.icon_provider)
+        self.model.directoryLoaded.connect(self.on_directory_loaded)
+        
+        # 超大目录改用分批加载的扁平模型
+        self.dir_model = DirModel(self.icon_provider, self)
+        self.dir_model.load_finished.connect(self.on_dir_model_loaded)
+        self.dir_model.sort_started.connect(lambda: self.statusBar.showMessage('正在后台排序...'))
+        self.dir_model.sort_done.connect(
+            lambda elapsed: self.statusBar.showMessage(f'排序完成，用时 {elapsed:.2f} 秒'))
+        
+        # 压缩包以只读的虚拟目录显示
+        self.archive_model = ArchiveModel(self.icon_provider, self)
+        self.archive_model.load_finished.connect(self.on_archive_loaded)
+        self.archive_model.load_failed.connect(self.on_archive_failed)
+        
+        # 筛选通过代理完成，不修改模型本身
+        self.fs_proxy = FileFilterProxy(self)
+        self.fs_proxy.setSourceModel(self.model)
         
         # 创建树状视图
-        self.tree = QTreeView()
-        self.tree.setModel(self.model)
-        self.tree.setRootIndex(self.model.index(QDir.rootPath()))
+        self.tree = FileTreeView()
+        self.tree.setModel(self.fs_proxy)
+        self.tree.setRootIndex(self.fs_proxy.path_index(QDir.rootPath()))
         self.tree.setContextMenuPolicy(Qt.CustomContextMenu)
         self.tree.customContextMenuRequested.connect(self.show_context_menu)
         self.tree.doubleClicked.connect(self.on_double_click)
@@ -682,12 +1279,252 @@ class FileExplorer(QMainWindow):
         self.tree.setDragEnabled(True)
         self.tree.setAcceptDrops(True)
         self.tree.setDropIndicatorShown(True)
+        self.tree.files_dropped.connect(self.on_files_dropped)
         
         # 设置多选模式
         self.tree.setSelectionMode(QAbstractItemView.ExtendedSelection)
         
         # 设置图标大小
         self.tree.setIconSize(QSize(16, 16))
+        # 行高一致，大目录下不必逐行计算布局
+        self.tree.setUniformRowHeights(True)
+
+        # 缩略图网格：与列表共用模型和选择，只为可见项目生成缩略图
+        self.grid = FileGridView(shared_loader())
+        self.grid.setModel(self.fs_proxy)
+        self.grid.setSelectionModel(self.tree.selectionModel())
+        self.grid.setRootIndex(self.tree.rootIndex())
+        self.grid.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.grid.customContextMenuRequested.connect(self.show_context_menu)
+        self.grid.doubleClicked.connect(self.on_double_click)
+        self.grid.setDragEnabled(True)
+        self.grid.setAcceptDrops(True)
+        self.grid.setDropIndicatorShown(True)
+        self.grid.files_dropped.connect(self.on_files_dropped)
+        self.grid.hide()
+
+    def on_directory_loaded(self, path):
+        if self.file_model() is not self.fs_proxy or path != self.get_current_dir():
+            return
+        self.apply_view_state()
+        count = self.fs_proxy.rowCount(self.tree.rootIndex())
+        hits, misses, uncached = self.icon_provider.stats()
+        self.statusBar.showMessage(f'{count} 个项目    图标缓存: 命中 {hits}，'
+                                   f'按类型解析 {misses}，逐个解析 {uncached}')
+
+    def on_dir_model_loaded(self, path, count, elapsed):
+        self.apply_view_state()
+        self.statusBar.showMessage(f'{count} 个项目，用时 {elapsed:.2f} 秒（大目录模式）')
+
+    def on_archive_loaded(self, path, count, elapsed):
+        self.apply_view_state()
+        self.statusBar.showMessage(f'{count} 个项目，读取压缩包目录用时 {elapsed:.2f} 秒（只读）')
+
+    def on_archive_failed(self, path, error):
+        QMessageBox.warning(self, '错误', f'无法打开压缩包 {os.path.basename(path)}: {error}')
+
+    def file_model(self):
+        return self.tree.model()
+
+    def start_count(self, path):
+        # 条目数在后台统计，超过阈值再切换到大目录模式，界面线程不等待
+        worker = CountWorker(path, self)
+        worker.count_finished.connect(self.on_count_finished)
+        worker.finished.connect(worker.deleteLater)
+        self.count_worker = worker
+        worker.start()
+
+    def on_count_finished(self, path, count):
+        if self.sender() is not self.count_worker:
+            return
+        self.count_worker = None
+        if (count >= LARGE_DIR_THRESHOLD and path == self.shown_path and
+                self.file_model() is self.fs_proxy):
+            self.show_large_directory(path)
+
+    def show_directory(self, path, restore=False):
+        """ 在文件视图中显示 path，空路径表示根目录（计算机）
+
+        restore 为 True 时（返回/前进）使用离开该目录时保存的快照。
+        """
+        self.save_snapshot()
+        snapshot = self.snapshots.get(path) if restore else None
+        self.shown_path = path
+        self.count_worker = None
+        self.pending_view = snapshot.view if snapshot is not None else None
+        location = split_archive_path(path) if path else None
+        if location is not None:
+            self.stop_watching()
+            self.dir_model.stop()
+            self.large_dir_action.setChecked(False)
+            self.set_view_model(self.archive_model)
+            self.archive_model.file_filter = self.file_filter
+            self.archive_model.open(*location)
+            self.set_root_index(QModelIndex())
+            return
+        self.archive_model.stop()
+        # 有快照时沿用当时的模式；手动指定过的目录按指定的模式
+        if snapshot is not None:
+            large = snapshot.large
+        else:
+            large = self.large_dir_overrides.get(path, False)
+        if large:
+            self.show_large_directory(path, snapshot)
+            return
+        self.large_dir_action.setChecked(False)
+        # QFileSystemModel 自带目录监视，按行更新
+        self.stop_watching()
+        self.dir_model.stop()
+        self.set_view_model(self.fs_proxy)
+        self.model.setFilter(self.fs_filter_flags(path))
+        self.model.setRootPath(path)
+        self.fs_proxy.set_file_filter(self.file_filter, self.model.index(path))
+        self.set_root_index(self.fs_proxy.path_index(path))
+        # QFileSystemModel 保留访问过的目录，已加载时不会再发出 directoryLoaded
+        if self.pending_view is not None and self.fs_proxy.rowCount(self.tree.rootIndex()):
+            self.apply_view_state()
+        if path and snapshot is None and path not in self.large_dir_overrides:
+            self.start_count(path)
+
+    def show_large_directory(self, path, snapshot=None):
+        self.large_dir_action.setChecked(True)
+        self.set_view_model(self.dir_model)
+        self.dir_model.file_filter = self.file_filter
+        # 先开始监视再列目录，列目录期间的变化不会漏掉
+        self.watch_directory(path)
+        if snapshot is not None and snapshot.entries is not None:
+            self.dir_model.restore(snapshot, self.file_filter)
+            self.set_root_index(QModelIndex())
+            self.apply_view_state()
+            return
+        self.dir_model.load(path)
+        self.set_root_index(QModelIndex())
+
+    def view_state(self):
+        """ 当前视图的状态: (排序列, 排序顺序, 首个可见项目, 当前项目, 选中的项目) """
+        model = self.file_model()
+        header = self.tree.header()
+        top = self.active_file_view().indexAt(QPoint(1, 1))
+        return (header.sortIndicatorSection(), header.sortIndicatorOrder(),
+                model.filePath(top) if top.isValid() else None,
+                self.get_selected_path(),
+                self.get_selected_paths()[:MAX_RESTORED_SELECTION])
+
+    def save_snapshot(self):
+        if self.shown_path is None or self.search_view.isVisible():
+            return
+        view = self.view_state()
+        if self.file_model() is self.dir_model:
+            snapshot = self.dir_model.snapshot(view)
+        else:
+            snapshot = DirSnapshot(self.shown_path, view)
+        self.snapshots.put(snapshot)
+
+    def indexes_for_paths(self, paths):
+        paths = [path for path in paths if path]
+        model = self.file_model()
+        if model is self.fs_proxy:
+            indexes = [self.fs_proxy.path_index(path) for path in paths]
+            return [index for index in indexes if index.isValid()]
+        return model.path_indexes(paths)
+
+    def apply_view_state(self):
+        """ 恢复快照中的排序、选择和滚动位置 """
+        if self.pending_view is None:
+            return
+        sort_column, sort_order, top, current, selected = self.pending_view
+        self.pending_view = None
+        header = self.tree.header()
+        if (sort_column, sort_order) != (header.sortIndicatorSection(), header.sortIndicatorOrder()):
+            if self.file_model() is self.dir_model:
+                # 快照里已经是排好序的结果，只更新表头的排序标记
+                header.blockSignals(True)
+                header.setSortIndicator(sort_column, sort_order)
+                header.blockSignals(False)
+            else:
+                self.tree.sortByColumn(sort_column, sort_order)
+        # 大目录里查找路径要遍历所有行，一次找齐
+        model = self.file_model()
+        found = {model.filePath(index): index
+                 for index in self.indexes_for_paths(selected + [current, top])}
+        selection = QItemSelection()
+        for path in selected:
+            if path in found:
+                selection.select(found[path], found[path])
+        self.tree.selectionModel().select(
+            selection, QItemSelectionModel.ClearAndSelect | QItemSelectionModel.Rows)
+        if current in found:
+            self.tree.selectionModel().setCurrentIndex(found[current], QItemSelectionModel.NoUpdate)
+        if top in found:
+            self.active_file_view().scrollTo(found[top], QAbstractItemView.PositionAtTop)
+
+    def watch_directory(self, path):
+        self.stop_watching()
+        watcher = DirWatcher(path)
+        watcher.changes_found.connect(self.on_dir_changes)
+        watcher.rescan_needed.connect(self.on_dir_rescan)
+        watcher.finished.connect(watcher.deleteLater)
+        self.dir_watcher = watcher
+        watcher.start()
+
+    def stop_watching(self):
+        if self.dir_watcher is not None:
+            self.dir_watcher.cancel()
+            self.dir_watcher.wait()
+            self.dir_watcher = None
+
+    def on_dir_changes(self, changes):
+        if self.sender() is self.dir_watcher:
+            self.dir_model.apply_changes(changes)
+
+    def on_dir_rescan(self):
+        # 事件队列溢出，或者目录本身被删除、移走
+        if self.sender() is not self.dir_watcher:
+            return
+        path = self.dir_model.rootPath()
+        self.watch_directory(path)
+        self.dir_model.load(path)
+
+    def set_view_model(self, model):
+        if self.tree.model() is model:
+            return
+        self.tree.setModel(model)
+        self.grid.setModel(model)
+        # 换模型后选择模型也随之更换，网格继续与列表共用
+        self.grid.setSelectionModel(self.tree.selectionModel())
+
+    def toggle_large_dir(self, checked):
+        path = self.get_current_dir()
+        if not path or self.in_archive() or checked == (self.file_model() is self.dir_model):
+            return
+        self.large_dir_overrides[path] = checked
+        self.show_directory(path)
+
+    def set_root_index(self, index):
+        self.tree.setRootIndex(index)
+        self.grid.setRootIndex(index)
+
+    def active_file_view(self):
+        return self.grid if self.grid_mode else self.tree
+
+    def toggle_view_mode(self, checked):
+        self.grid_mode = checked
+        if self.search_view.isVisible():
+            return
+        self.tree.setVisible(not checked)
+        self.grid.setVisible(checked)
+
+    def create_search_view(self):
+        self.search_model = SearchResultsModel(self)
+        self.content_model = ContentResultsModel(self)
+        self.search_view = QTreeView()
+        self.search_view.setModel(self.search_model)
+        self.search_view.setRootIsDecorated(False)
+        self.search_view.setUniformRowHeights(True)  # 大量结果时加快布局
+        self.search_view.setColumnWidth(0, 250)
+        self.search_view.setColumnWidth(1, 350)
+        self.search_view.doubleClicked.connect(self.on_search_result_double_click)
+        self.search_view.hide()
 
     def create_button_bar(self):
         button_layout = QHBoxLayout()
@@ -714,27 +1551,124 @@ class FileExplorer(QMainWindow):
 
     def create_filter_bar(self):
         filter_layout = QHBoxLayout()
+        # 输入时即时筛选当前目录
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText('筛选当前目录...')
+        self.filter_input.setClearButtonEnabled(True)
+        self.filter_input.textChanged.connect(self.apply_filter)
+        self.filter_mode = QComboBox()
+        for text, mode in SEARCH_MODES:
+            self.filter_mode.addItem(text, mode)
         self.filter_combo = QComboBox()
-        self.filter_combo.addItems(['所有文件 (*.*)', '图片文件 (*.jpg *.png)', '文本文件 (*.txt)'])
-        self.filter_combo.currentTextChanged.connect(self.apply_filter)
+        self.filter_combo.addItems([text for text, _, _ in TYPE_FILTERS])
+        self.size_combo = QComboBox()
+        self.size_combo.addItems([text for text, _, _ in SIZE_RANGES])
+        self.modified_combo = QComboBox()
+        self.modified_combo.addItems([text for text, _ in MODIFIED_RANGES])
+        self.hidden_check = QCheckBox('显示隐藏文件')
+        for combo in (self.filter_mode, self.filter_combo, self.size_combo, self.modified_combo):
+            combo.currentIndexChanged.connect(self.apply_filter)
+        self.hidden_check.toggled.connect(self.apply_filter)
+
+        filter_layout.addWidget(QLabel('筛选:'))
+        filter_layout.addWidget(self.filter_input)
+        filter_layout.addWidget(self.filter_mode)
         filter_layout.addWidget(QLabel('文件类型:'))
         filter_layout.addWidget(self.filter_combo)
+        filter_layout.addWidget(QLabel('大小:'))
+        filter_layout.addWidget(self.size_combo)
+        filter_layout.addWidget(QLabel('修改时间:'))
+        filter_layout.addWidget(self.modified_combo)
+        filter_layout.addWidget(self.hidden_check)
         return filter_layout
 
+    def show_index_status(self):
+        if self.file_index is None:
+            QMessageBox.warning(self, '错误', '无法打开文件索引')
+            return
+        dialog = IndexStatusDialog(self)
+        dialog.exec_()
+
+    def show_disk_usage(self):
+        root = self.get_local_dir() or QDir.rootPath()
+        dialog = DiskUsageDialog(root, self)
+        dialog.setAttribute(Qt.WA_DeleteOnClose)
+        dialog.show()
+
+    def find_duplicates(self):
+        # 在选中的项目中查找，没有选择时查找当前目录
+        roots = [p for p in self.get_selected_paths() if os.path.lexists(p)]
+        roots = roots or [self.get_local_dir() or QDir.rootPath()]
+        dialog = DuplicatesDialog(roots, self)
+        dialog.exec_()
+
+    def show_sync(self):
+        dialog = SyncDialog(self.get_local_dir() or QDir.rootPath(), self)
+        dialog.exec_()
+
+    def refresh_index(self):
+        roots = [path for path, *_ in self.file_index.roots()]
+        if roots:
+            self.start_indexing(roots)
+
+    def start_indexing(self, roots):
+        if self.index_worker is not None:
+            return None
+        worker = IndexWorker(roots, self.file_index.db_path, parent=self)
+        worker.root_finished.connect(self.on_index_root_finished)
+        worker.index_failed.connect(self.on_index_failed)
+        worker.finished.connect(self.on_indexing_finished)
+        self.index_worker = worker
+        worker.start()
+        return worker
+
+    def on_index_root_finished(self, root, count, elapsed):
+        self.statusBar.showMessage(f'索引已更新: {root} ({count} 项，用时 {elapsed:.1f} 秒)', 5000)
+
+    def on_index_failed(self, message):
+        # 定时的后台更新失败时不弹窗，下次更新会再试
+        self.statusBar.showMessage(f'索引更新失败: {message}', 5000)
+
+    def on_indexing_finished(self):
+        self.index_worker.deleteLater()
+        self.index_worker = None
+
+    def closeEvent(self, event):
+        # 退出前停止所有后台任务
+        workers = [self.search_worker, self.index_worker]
+        workers += self.copy_workers + self.purge_workers + self.batch_workers
+        for worker in workers:
+            if worker is not None:
+                worker.cancel()
+                worker.wait()
+        self.stop_watching()
+        for worker in self.findChildren(CountWorker):
+            worker.wait()
+        # 非模态的磁盘占用窗口会随主窗口一起销毁，先让它们停止扫描
+        for dialog in self.findChildren(DiskUsageDialog):
+            dialog.reject()
+        self.dir_model.stop()
+        self.archive_model.stop()
+        loader = shared_loader()
+        loader.cancel_all()
+        loader.pool.waitForDone()
+        shutdown_process_pool()
+        super().closeEvent(event)
+
     def resource_path(self, relative_path):
         """ 获取资源的绝对路径 """
         if hasattr(sys, '_MEIPASS'):
             return os.path.join(sys._MEIPASS, relative_path)
         return os.path.join(os.path.abspath("."), relative_path)
 
-def format_size(size):
-    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-        if size < 1024:
-            return f"{size:.1f} {unit}"
-        size /= 1024
-    return f"{size:.1f} PB"
-
 def main():
+    # 打包后进程池的子进程需要
+    multiprocessing.freeze_support()
+    # 文件名排序按系统区域设置的规则比较
+    try:
+        locale.setlocale(locale.LC_COLLATE, '')
+    except locale.Error:
+        pass
     app = QApplication(sys.argv)
     # 显示登录窗口
     login_dialog = LoginDialog()
@@ -0,0 +1,153 @@
+import time
+import fnmatch
+from PyQt5.QtCore import QSortFilterProxyModel, QPersistentModelIndex
+from search_engine import build_matcher
+
+# 大小筛选: (显示文本, 最小字节, 最大字节)
+SIZE_RANGES = [
+    ('任意大小', None, None),
+    ('小于 1 MB', None, 1024 ** 2),
+    ('1 MB - 100 MB', 1024 ** 2, 100 * 1024 ** 2),
+    ('大于 100 MB', 100 * 1024 ** 2, None),
+    ('大于 1 GB', 1024 ** 3, None),
+]
+# 修改时间筛选: (显示文本, 秒数)
+MODIFIED_RANGES = [
+    ('任意时间', None),
+    ('一天内', 86400),
+    ('一周内', 7 * 86400),
+    ('一个月内', 30 * 86400),
+    ('一年内', 365 * 86400),
+]
+# 类型筛选: (显示文本, 扩展名通配符, 仅文件夹)
+TYPE_FILTERS = [
+    ('所有文件 (*.*)', None, False),
+    ('图片文件 (*.jpg *.png)', ['*.jpg', '*.jpeg', '*.png', '*.gif', '*.bmp', '*.webp'], False),
+    ('文本文件 (*.txt)', ['*.txt', '*.log', '*.md'], False),
+    ('文件夹', None, True),
+]
+
+
+class FileFilter:
+    """ 名称匹配加属性条件的筛选器，条件都基于已缓存的属性，不访问磁盘 """
+
+    def __init__(self, pattern='', mode='substring', type_patterns=None, dirs_only=False,
+                 min_size=None, max_size=None, modified_within=None, show_hidden=False):
+        self.pattern = pattern
+        self.mode = mode
+        # 正则写错时抛出 re.error，由调用方提示
+        self.matcher = build_matcher(pattern, mode) if pattern else None
+        self.type_patterns = type_patterns
+        self.type_matcher = None
+        if type_patterns:
+            regex = '|'.join(fnmatch.translate(p) for p in type_patterns)
+            self.type_matcher = build_matcher(regex, 'regex')
+        self.dirs_only = dirs_only
+        self.min_size = min_size
+        self.max_size = max_size
+        self.modified_within = modified_within
+        self.show_hidden = show_hidden
+        self.min_mtime = time.time() - modified_within if modified_within else None
+
+    def is_empty(self):
+        return (self.matcher is None and self.type_matcher is None and not self.dirs_only and
+                self.min_size is None and self.max_size is None and
+                self.modified_within is None)
+
+    def name_only(self):
+        """ 是否只有名称和隐藏文件条件，此时可以走更快的批量筛选 """
+        return (self.type_matcher is None and not self.dirs_only and self.min_size is None and
+                self.max_size is None and self.min_mtime is None)
+
+    def accepts(self, name, is_dir, size, mtime, hidden):
+        if hidden and not self.show_hidden:
+            return False
+        if self.dirs_only and not is_dir:
+            return False
+        if self.matcher is not None and not self.matcher(name):
+            return False
+        # 类型、大小和修改时间条件只作用于文件，文件夹始终保留以便继续浏览
+        if not is_dir:
+            if self.type_matcher is not None and not self.type_matcher(name):
+                return False
+            if self.min_size is not None and size < self.min_size:
+                return False
+            if self.max_size is not None and size >= self.max_size:
+                return False
+            if self.min_mtime is not None and mtime < self.min_mtime:
+                return False
+        return True
+
+    def narrows(self, other):
+        """ 本筛选器接受的条目是否一定也被 other 接受
+
+        成立时只需在 other 筛选后的结果里再筛一遍，例如输入时在原有文字后追加字符。
+        """
+        if other is None:
+            # 没有筛选器时默认隐藏隐藏文件
+            return not self.show_hidden
+        if self.show_hidden and not other.show_hidden:
+            return False
+        if other.dirs_only and not self.dirs_only:
+            return False
+        if other.matcher is not None:
+            if self.mode != other.mode or self.mode == 'regex':
+                if (self.mode, self.pattern) != (other.mode, other.pattern):
+                    return False
+            elif self.mode == 'substring':
+                if other.pattern.lower() not in self.pattern.lower():
+                    return False
+            elif self.pattern != other.pattern:
+                return False
+        if other.type_patterns is not None:
+            if self.type_patterns is None or not set(self.type_patterns) <= set(other.type_patterns):
+                return False
+        if other.min_size is not None and (self.min_size is None or self.min_size < other.min_size):
+            return False
+        if other.max_size is not None and (self.max_size is None or self.max_size > other.max_size):
+            return False
+        if other.min_mtime is not None and (self.min_mtime is None or self.min_mtime < other.min_mtime):
+            return False
+        return True
+
+
+class FileFilterProxy(QSortFilterProxyModel):
+    """ 套在 QFileSystemModel 外的筛选代理
+
+    条件读取模型节点中已缓存的名称、大小和修改时间。排序仍交给
+    QFileSystemModel 自己完成，代理保持源模型的顺序。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.file_filter = None
+        self.filter_root = QPersistentModelIndex()
+
+    def set_file_filter(self, file_filter, root):
+        """ 只筛选 root 目录下的直接条目，展开的子目录不受影响 """
+        self.file_filter = None if file_filter is None or file_filter.is_empty() else file_filter
+        self.filter_root = QPersistentModelIndex(root)
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, row, parent):
+        if self.file_filter is None or parent != self.filter_root:
+            return True
+        model = self.sourceModel()
+        index = model.index(row, 0, parent)
+        name = model.fileName(index)
+        mtime = model.lastModified(index).toSecsSinceEpoch()
+        return self.file_filter.accepts(name, model.isDir(index), model.size(index), mtime,
+                                        name.startswith('.'))
+
+    def sort(self, column, order):
+        self.sourceModel().sort(column, order)
+        super().sort(-1, order)
+
+    def filePath(self, index):
+        return self.sourceModel().filePath(self.mapToSource(index))
+
+    def rootPath(self):
+        return self.sourceModel().rootPath()
+
+    def path_index(self, path):
+        return self.mapFromSource(self.sourceModel().index(path))
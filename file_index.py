@@ -0,0 +1,478 @@
+import os
+import re
+import time
+import sqlite3
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
+                             QTableWidget, QTableWidgetItem, QAbstractItemView,
+                             QHeaderView, QLabel, QFileDialog)
+from PyQt5.QtCore import QThread, pyqtSignal
+from search_engine import build_matcher, BATCH_SIZE, BATCH_INTERVAL
+from utils import config_dir
+
+# 每插入多少条记录提交一次，让读取方尽快看到新数据
+COMMIT_EVERY = 20000
+PROGRESS_INTERVAL = 0.25
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS roots (
+    path TEXT PRIMARY KEY,
+    entry_count INTEGER NOT NULL DEFAULT 0,
+    last_refresh REAL NOT NULL DEFAULT 0,
+    build_seconds REAL NOT NULL DEFAULT 0,
+    build_rate REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS dirs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime REAL NOT NULL,
+    entry_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    dir_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    is_dir INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_dir ON entries(dir_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS entry_names USING fts5(
+    name, content='entries', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entry_names(rowid, name) VALUES (new.id, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+    INSERT INTO entry_names(entry_names, rowid, name) VALUES ('delete', old.id, old.name);
+END;
+'''
+
+
+def default_index_path():
+    return os.path.join(config_dir(), 'file_index.db')
+
+
+def _path_range(path):
+    """ 返回 path 下所有子路径的字典序范围 [low, high) """
+    prefix = path.rstrip(os.sep) + os.sep
+    return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+
+def _literal_part(pattern, mode):
+    """ 取出通配符模式中最长的普通字符片段，用于索引预筛选 """
+    if mode == 'substring':
+        return pattern
+    parts = re.split(r'[*?]|\[[^\]]*\]', pattern)
+    return max(parts, key=len) if parts else ''
+
+
+def _escape_like(text):
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class FileIndex:
+    """ 基于 SQLite FTS5 trigram 的文件名索引
+
+    目录的 mtime 只在其直接条目增删改名时变化，所以刷新时对 mtime
+    未变的目录只做一次 stat，不重新列出内容。
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or default_index_path()
+        self.conn = sqlite3.connect(self.db_path, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # ---- 根目录管理 ----
+
+    def roots(self):
+        cursor = self.conn.execute(
+            'SELECT path, entry_count, last_refresh, build_seconds, build_rate '
+            'FROM roots ORDER BY path')
+        return cursor.fetchall()
+
+    def add_root(self, path):
+        path = os.path.abspath(path)
+        with self.conn:
+            self.conn.execute('INSERT OR IGNORE INTO roots(path) VALUES (?)', (path,))
+        return path
+
+    def remove_root(self, path):
+        others = [p for p, *_ in self.roots() if p != path]
+        with self.conn:
+            self.conn.execute('DELETE FROM roots WHERE path = ?', (path,))
+            # 仍被其他根目录覆盖的部分保留
+            if not any(self._contains(other, path) for other in others):
+                nested = [p for p in others if self._contains(path, p)]
+                self._delete_subtree(path, keep=nested)
+
+    def covering_root(self, path):
+        """ 返回已建好索引且包含 path 的根目录 """
+        path = os.path.abspath(path)
+        for root, _, last_refresh, _, _ in self.roots():
+            if last_refresh and self._contains(root, path):
+                return root
+        return None
+
+    @staticmethod
+    def _contains(root, path):
+        return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+    def _delete_subtree(self, path, keep=()):
+        low, high = _path_range(path)
+        where = '(path = ? OR (path >= ? AND path < ?))'
+        params = [path, low, high]
+        for kept in keep:
+            k_low, k_high = _path_range(kept)
+            where += ' AND NOT (path = ? OR (path >= ? AND path < ?))'
+            params += [kept, k_low, k_high]
+        self.conn.execute(
+            f'DELETE FROM entries WHERE dir_id IN (SELECT id FROM dirs WHERE {where})',
+            params)
+        self.conn.execute(f'DELETE FROM dirs WHERE {where}', params)
+
+    # ---- 建立和增量刷新 ----
+
+    def refresh(self, root, progress=None, is_cancelled=None):
+        """ 增量刷新一个根目录，返回 (条目数, 耗时) """
+        root = os.path.abspath(root)
+        conn = self.conn
+        start = last_progress = time.monotonic()
+        total = 0
+        pending = 0
+        stack = [root]
+
+        while stack:
+            if is_cancelled and is_cancelled():
+                break
+            path = stack.pop()
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                self._delete_subtree(path)
+                continue
+
+            row = conn.execute('SELECT id, mtime, entry_count FROM dirs WHERE path = ?',
+                               (path,)).fetchone()
+            if row and row[1] == mtime:
+                # 目录未变化，直接沿用索引中的子目录
+                dir_id, _, count = row
+                total += count
+                for (name,) in conn.execute(
+                        'SELECT name FROM entries WHERE dir_id = ? AND is_dir = 1', (dir_id,)):
+                    stack.append(os.path.join(path, name))
+            else:
+                new_entries = []
+                try:
+                    with os.scandir(path) as it:
+                        for entry in it:
+                            try:
+                                is_dir = entry.is_dir(follow_symlinks=False)
+                                st = entry.stat(follow_symlinks=False)
+                                size, entry_mtime = st.st_size, st.st_mtime
+                            except OSError:
+                                is_dir, size, entry_mtime = False, 0, 0
+                            new_entries.append((entry.name, is_dir, size, entry_mtime))
+                except OSError:
+                    continue
+
+                if row:
+                    dir_id = row[0]
+                    new_dirs = {name for name, is_dir, _, _ in new_entries if is_dir}
+                    for (name,) in conn.execute(
+                            'SELECT name FROM entries WHERE dir_id = ? AND is_dir = 1',
+                            (dir_id,)).fetchall():
+                        if name not in new_dirs:
+                            self._delete_subtree(os.path.join(path, name))
+                    conn.execute('DELETE FROM entries WHERE dir_id = ?', (dir_id,))
+                    conn.execute('UPDATE dirs SET mtime = ?, entry_count = ? WHERE id = ?',
+                                 (mtime, len(new_entries), dir_id))
+                else:
+                    dir_id = conn.execute(
+                        'INSERT INTO dirs(path, mtime, entry_count) VALUES (?, ?, ?)',
+                        (path, mtime, len(new_entries))).lastrowid
+                conn.executemany(
+                    'INSERT INTO entries(dir_id, name, is_dir, size, mtime) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    [(dir_id, name, int(is_dir), size, entry_mtime)
+                     for name, is_dir, size, entry_mtime in new_entries])
+                total += len(new_entries)
+                pending += len(new_entries)
+                stack.extend(os.path.join(path, name)
+                             for name, is_dir, _, _ in new_entries if is_dir)
+
+            if pending >= COMMIT_EVERY:
+                conn.commit()
+                pending = 0
+            now = time.monotonic()
+            if progress and now - last_progress >= PROGRESS_INTERVAL:
+                progress(total, total / (now - start))
+                last_progress = now
+
+        elapsed = time.monotonic() - start
+        if not (is_cancelled and is_cancelled()):
+            conn.execute(
+                'UPDATE roots SET entry_count = ?, last_refresh = ?, build_seconds = ?, '
+                'build_rate = ? WHERE path = ?',
+                (total, time.time(), elapsed, total / elapsed if elapsed > 0 else 0, root))
+        conn.commit()
+        return total, elapsed
+
+    # ---- 查询 ----
+
+    def query(self, path, pattern, mode='substring', recursive=True, case_sensitive=False):
+        """ 返回 (候选行迭代器, 匹配函数)，候选行为 (目录, 名称, 是否目录, 大小, 修改时间)
+
+        LIKE 只做预筛选，候选行还要用和遍历搜索相同的匹配函数判定。
+        正则模式无法利用索引，返回 None 由调用方改为遍历搜索。
+        """
+        if mode == 'regex':
+            return None
+        path = os.path.abspath(path)
+        matcher = build_matcher(pattern, mode, case_sensitive)
+        literal = _literal_part(pattern, mode)
+        if not case_sensitive and not literal.isascii():
+            # SQLite 的 LIKE 只对 ASCII 字母忽略大小写，含其他文字时不能用来预筛选，
+            # 否则会漏掉遍历搜索（按 str.lower 比较）能找到的结果
+            literal = ''
+
+        if recursive:
+            low, high = _path_range(path)
+            scope = '(d.path = ? OR (d.path >= ? AND d.path < ?))'
+            params = [path, low, high]
+        else:
+            scope = 'd.path = ?'
+            params = [path]
+
+        if literal:
+            sql = ('SELECT d.path, e.name, e.is_dir, e.size, e.mtime FROM entry_names f '
+                   'JOIN entries e ON e.id = f.rowid JOIN dirs d ON d.id = e.dir_id '
+                   f"WHERE f.name LIKE ? ESCAPE '\\' AND {scope}")
+            params.insert(0, f'%{_escape_like(literal)}%')
+        else:
+            sql = ('SELECT d.path, e.name, e.is_dir, e.size, e.mtime FROM entries e '
+                   f'JOIN dirs d ON d.id = e.dir_id WHERE {scope}')
+        return self.conn.execute(sql, params), matcher
+
+    def search(self, path, pattern, mode='substring', recursive=True,
+               case_sensitive=False, limit=200000):
+        """ 在索引中搜索，返回 [(路径, 是否目录, 大小, 修改时间), ...]，正则模式返回 None """
+        query = self.query(path, pattern, mode, recursive, case_sensitive)
+        if query is None:
+            return None
+        rows, matcher = query
+        results = []
+        for dir_path, name, is_dir, size, mtime in rows:
+            if matcher(name):
+                results.append((os.path.join(dir_path, name), bool(is_dir), size, mtime))
+                if len(results) >= limit:
+                    break
+        return results
+
+
+class IndexSearchWorker(QThread):
+    """ 在工作线程中查询索引，和 SearchWorker 一样分批送出结果 """
+
+    # 一批匹配结果: [(路径, 是否目录, 大小, 修改时间), ...]
+    results_found = pyqtSignal(list)
+    # 已检查条目数, 每秒检查条目数
+    progress = pyqtSignal(int, float)
+    # 匹配数, 检查数, 耗时
+    search_finished = pyqtSignal(int, int, float)
+    # 查询失败时的错误信息，调用方改为遍历搜索
+    search_failed = pyqtSignal(str)
+
+    def __init__(self, root, pattern, mode='substring', recursive=True,
+                 case_sensitive=False, db_path=None, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.pattern = pattern
+        self.mode = mode
+        self.recursive = recursive
+        self.case_sensitive = case_sensitive
+        self.db_path = db_path
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        batch = []
+        scanned = matched = 0
+        start = time.monotonic()
+        last_flush = last_progress = start
+        index = None
+        try:
+            index = FileIndex(self.db_path)
+            rows, matcher = index.query(self.root, self.pattern, self.mode,
+                                        self.recursive, self.case_sensitive)
+            for dir_path, name, is_dir, size, mtime in rows:
+                if self._cancelled:
+                    break
+                scanned += 1
+                if matcher(name):
+                    batch.append((os.path.join(dir_path, name), bool(is_dir), size, mtime))
+                    matched += 1
+                if scanned & 0xff == 0:
+                    now = time.monotonic()
+                    if batch and (len(batch) >= BATCH_SIZE or now - last_flush >= BATCH_INTERVAL):
+                        self.results_found.emit(batch)
+                        batch = []
+                        last_flush = now
+                    if now - last_progress >= PROGRESS_INTERVAL:
+                        self.progress.emit(scanned, scanned / (now - start))
+                        last_progress = now
+        except sqlite3.Error as e:
+            self.search_failed.emit(str(e))
+            return
+        finally:
+            if index is not None:
+                index.close()
+        if batch:
+            self.results_found.emit(batch)
+        self.search_finished.emit(matched, scanned, time.monotonic() - start)
+
+
+class IndexWorker(QThread):
+    # 根目录, 已索引条目数, 每秒条目数
+    progress = pyqtSignal(str, int, float)
+    # 根目录, 条目数, 耗时
+    root_finished = pyqtSignal(str, int, float)
+    # 数据库被锁定或损坏等导致更新中断时的错误信息
+    index_failed = pyqtSignal(str)
+
+    def __init__(self, roots, db_path=None, parent=None):
+        super().__init__(parent)
+        self.roots = list(roots)
+        self.db_path = db_path
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        # SQLite 连接不能跨线程使用，工作线程单独打开一个
+        index = None
+        try:
+            index = FileIndex(self.db_path)
+            for root in self.roots:
+                if self._cancelled:
+                    break
+                total, elapsed = index.refresh(
+                    root,
+                    progress=lambda count, rate, r=root: self.progress.emit(r, count, rate),
+                    is_cancelled=self.is_cancelled)
+                self.root_finished.emit(root, total, elapsed)
+        except sqlite3.Error as e:
+            self.index_failed.emit(str(e))
+        finally:
+            if index is not None:
+                index.close()
+
+
+class IndexStatusDialog(QDialog):
+    HEADERS = ['根目录', '条目数', '上次更新', '耗时', '速度']
+
+    def __init__(self, explorer):
+        super().__init__(explorer)
+        self.explorer = explorer
+        self.setWindowTitle('文件索引')
+        self.resize(700, 350)
+
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget(0, len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        layout.addWidget(self.table)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        button_layout = QHBoxLayout()
+        buttons = [
+            ('添加当前目录', self.add_current),
+            ('添加目录...', self.add_directory),
+            ('移除', self.remove_selected),
+            ('立即更新', self.refresh_all),
+            ('关闭', self.accept),
+        ]
+        for text, slot in buttons:
+            button = QPushButton(text)
+            button.clicked.connect(slot)
+            button_layout.addWidget(button)
+        layout.addLayout(button_layout)
+
+        self.load_roots()
+        if explorer.index_worker is not None:
+            self.watch_worker(explorer.index_worker)
+
+    def load_roots(self):
+        roots = self.explorer.file_index.roots()
+        self.table.setRowCount(len(roots))
+        for row, (path, count, last_refresh, seconds, rate) in enumerate(roots):
+            refreshed = (time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last_refresh))
+                         if last_refresh else '尚未建立')
+            values = [path, str(count), refreshed, f'{seconds:.1f} 秒', f'{rate:.0f} 项/秒']
+            for column, value in enumerate(values):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+
+    def watch_worker(self, worker):
+        worker.progress.connect(self.on_progress)
+        worker.root_finished.connect(lambda *args: self.load_roots())
+        worker.finished.connect(self.on_worker_finished)
+        worker.index_failed.connect(self.on_failed)
+        self.failed = False
+
+    def on_worker_finished(self):
+        if not self.failed:
+            self.status_label.setText('索引已是最新')
+
+    def on_failed(self, message):
+        self.failed = True
+        self.status_label.setText(f'索引更新失败: {message}')
+
+    def on_progress(self, root, count, rate):
+        self.status_label.setText(f'正在索引 {root}: {count} 项 ({rate:.0f} 项/秒)')
+
+    def add_current(self):
+        path = self.explorer.get_current_dir()
+        if path:
+            self.add_root(path)
+
+    def add_directory(self):
+        path = QFileDialog.getExistingDirectory(self, '选择要索引的目录')
+        if path:
+            self.add_root(path)
+
+    def add_root(self, path):
+        root = self.explorer.file_index.add_root(path)
+        self.load_roots()
+        self.start([root])
+
+    def remove_selected(self):
+        rows = sorted({index.row() for index in self.table.selectedIndexes()})
+        for row in rows:
+            self.explorer.file_index.remove_root(self.table.item(row, 0).text())
+        self.load_roots()
+
+    def refresh_all(self):
+        self.start([path for path, *_ in self.explorer.file_index.roots()])
+
+    def start(self, roots):
+        worker = self.explorer.start_indexing(roots)
+        if worker is None:
+            self.status_label.setText('索引正在更新，请稍候')
+        else:
+            self.watch_worker(worker)
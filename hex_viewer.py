@@ -0,0 +1,280 @@
+import os
+import mmap
+import time
+from PyQt5.QtWidgets import (QWidget, QAbstractScrollArea, QVBoxLayout, QHBoxLayout,
+                             QComboBox, QLineEdit, QPushButton, QLabel)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtGui import QPainter, QFontDatabase, QPalette
+
+BYTES_PER_ROW = 16
+# 查找时每次扫描的块大小
+SEARCH_CHUNK = 16 * 1024 * 1024
+PROGRESS_INTERVAL = 0.1
+# 滚动条范围是 int32，超大文件时每个滚动单位对应多行
+MAX_SCROLL_ROWS = 1 << 30
+
+
+def parse_pattern(text, mode):
+    """ 把输入转换为要查找的字节串，mode 为 'hex' 或 'text' """
+    if mode == 'hex':
+        return bytes.fromhex(text.replace('0x', '').replace(',', ' '))
+    return text.encode('utf-8')
+
+
+class PatternSearchWorker(QThread):
+    # 已扫描字节数
+    progress = pyqtSignal(object)
+    # 匹配偏移（未找到为 -1）, 耗时
+    search_finished = pyqtSignal(object, float)
+
+    def __init__(self, path, pattern, start, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.pattern = pattern
+        self.start_offset = start
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def find(self, mm, start, end, scanned):
+        """ 分块查找，块之间重叠 len(pattern)-1 字节以免漏掉跨块的匹配 """
+        overlap = len(self.pattern) - 1
+        last_progress = time.monotonic()
+        pos = start
+        while pos < end and not self._cancelled:
+            chunk_end = min(pos + SEARCH_CHUNK, end)
+            found = mm.find(self.pattern, pos, min(chunk_end + overlap, len(mm)))
+            if found >= 0:
+                return found, scanned
+            scanned += chunk_end - pos
+            pos = chunk_end
+            now = time.monotonic()
+            if now - last_progress >= PROGRESS_INTERVAL:
+                self.progress.emit(scanned)
+                last_progress = now
+        return -1, scanned
+
+    def run(self):
+        started = time.monotonic()
+        found = -1
+        try:
+            with open(self.path, 'rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                # 从当前位置找到文件末尾，再从头绕回
+                found, scanned = self.find(mm, self.start_offset, len(mm), 0)
+                if found < 0 and not self._cancelled:
+                    found, _ = self.find(mm, 0, self.start_offset, scanned)
+            finally:
+                mm.close()
+        except (OSError, ValueError):
+            pass
+        self.search_finished.emit(found, time.monotonic() - started)
+
+
+class HexView(QAbstractScrollArea):
+    """ 虚拟化十六进制视图：只读取和绘制屏幕上可见的行 """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.mm = None
+        self.size = 0
+        self.row_step = 1
+        self.selection = (0, 0)
+        self.verticalScrollBar().valueChanged.connect(self.viewport().update)
+
+    def open_file(self, path):
+        self.close_file()
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size:
+                self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self.size = len(self.mm)
+        rows = self.row_count()
+        self.row_step = -(-rows // MAX_SCROLL_ROWS) if rows > MAX_SCROLL_ROWS else 1
+        self.update_scrollbars()
+        self.viewport().update()
+
+    def close_file(self):
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+        self.size = 0
+
+    def row_count(self):
+        return -(-self.size // BYTES_PER_ROW)
+
+    def visible_rows(self):
+        return max(1, self.viewport().height() // self.fontMetrics().lineSpacing())
+
+    def first_row(self):
+        return self.verticalScrollBar().value() * self.row_step
+
+    def update_scrollbars(self):
+        rows = self.visible_rows()
+        vbar = self.verticalScrollBar()
+        vbar.setRange(0, max(0, (self.row_count() - rows) // self.row_step))
+        vbar.setPageStep(max(1, rows // self.row_step))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scrollbars()
+
+    def goto_offset(self, offset, length=1):
+        """ 滚动到 offset 并选中 length 个字节 """
+        if offset < 0 or offset >= self.size:
+            return False
+        self.selection = (offset, offset + length)
+        row = offset // BYTES_PER_ROW
+        self.verticalScrollBar().setValue(max(0, row - self.visible_rows() // 3) // self.row_step)
+        self.viewport().update()
+        return True
+
+    def current_offset(self):
+        return self.first_row() * BYTES_PER_ROW
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        palette = self.palette()
+        painter.fillRect(self.viewport().rect(), palette.color(QPalette.Base))
+        if self.mm is None:
+            return
+
+        metrics = self.fontMetrics()
+        line_height = metrics.lineSpacing()
+        char_width = metrics.horizontalAdvance('0')
+        digits = max(8, len(f'{self.size:x}'))
+        hex_x = (digits + 2) * char_width
+        ascii_x = hex_x + (BYTES_PER_ROW * 3 + 2) * char_width
+        highlight = palette.color(QPalette.Highlight).lighter(160)
+        sel_start, sel_end = self.selection
+
+        first = self.first_row()
+        for row in range(self.visible_rows() + 1):
+            offset = (first + row) * BYTES_PER_ROW
+            if offset >= self.size:
+                break
+            data = self.mm[offset:offset + BYTES_PER_ROW]
+            y = row * line_height
+            # 选中的字节加背景色
+            for i in range(len(data)):
+                if sel_start <= offset + i < sel_end:
+                    painter.fillRect(hex_x + i * 3 * char_width, y, 2 * char_width,
+                                     line_height, highlight)
+                    painter.fillRect(ascii_x + i * char_width, y, char_width,
+                                     line_height, highlight)
+            baseline = y + metrics.ascent()
+            painter.setPen(palette.color(QPalette.Mid))
+            painter.drawText(0, baseline, f'{offset:0{digits}x}')
+            painter.setPen(palette.color(QPalette.Text))
+            painter.drawText(hex_x, baseline, ' '.join(f'{b:02x}' for b in data))
+            painter.drawText(ascii_x, baseline,
+                             ''.join(chr(b) if 32 <= b < 127 else '.' for b in data))
+
+
+class HexViewerPanel(QWidget):
+    """ 十六进制视图加跳转和字节查找控件 """
+
+    SEARCH_MODES = [('十六进制', 'hex'), ('文本', 'text')]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.path = None
+        self.search_worker = None
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        tool_layout = QHBoxLayout()
+        self.goto_input = QLineEdit()
+        self.goto_input.setPlaceholderText('跳转到偏移（支持 0x 十六进制）')
+        self.goto_input.returnPressed.connect(self.goto)
+        self.search_mode = QComboBox()
+        for text, _ in self.SEARCH_MODES:
+            self.search_mode.addItem(text)
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText('查找字节，如 DE AD BE EF')
+        self.search_input.returnPressed.connect(self.find_next)
+        self.search_button = QPushButton('查找下一个')
+        self.search_button.clicked.connect(self.find_next)
+        tool_layout.addWidget(self.goto_input)
+        tool_layout.addWidget(self.search_mode)
+        tool_layout.addWidget(self.search_input)
+        tool_layout.addWidget(self.search_button)
+        layout.addLayout(tool_layout)
+
+        self.view = HexView()
+        layout.addWidget(self.view)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+    def open_file(self, path):
+        self.path = path
+        self.view.open_file(path)
+        self.status_label.setText(f'大小: {self.view.size:,} 字节')
+
+    def close_file(self):
+        self.stop_search()
+        self.view.close_file()
+
+    def goto(self):
+        try:
+            offset = int(self.goto_input.text().strip(), 0)
+        except ValueError:
+            self.status_label.setText('请输入有效的偏移')
+            return
+        if not self.view.goto_offset(offset):
+            self.status_label.setText('偏移超出文件范围')
+
+    def stop_search(self):
+        if self.search_worker is not None:
+            self.search_worker.cancel()
+            self.search_worker.wait()
+            self.search_worker = None
+        self.search_button.setText('查找下一个')
+
+    def find_next(self):
+        if self.search_worker is not None:
+            self.stop_search()
+            return
+        mode = self.SEARCH_MODES[self.search_mode.currentIndex()][1]
+        try:
+            pattern = parse_pattern(self.search_input.text().strip(), mode)
+        except ValueError:
+            self.status_label.setText('十六进制格式不正确')
+            return
+        if not pattern or self.path is None:
+            return
+        # 从当前选中位置之后开始查找
+        sel_start, sel_end = self.view.selection
+        start = sel_start + 1 if sel_end > sel_start else self.view.current_offset()
+        if start >= self.view.size:
+            start = 0
+        self.pattern_length = len(pattern)
+        worker = PatternSearchWorker(self.path, pattern, start)
+        worker.progress.connect(self.on_search_progress)
+        worker.search_finished.connect(self.on_search_finished)
+        worker.finished.connect(worker.deleteLater)
+        self.search_worker = worker
+        self.search_button.setText('停止')
+        worker.start()
+
+    def on_search_progress(self, scanned):
+        if self.sender() is not self.search_worker or not self.view.size:
+            return
+        self.status_label.setText(f'正在查找... {scanned * 100 // self.view.size}%')
+
+    def on_search_finished(self, found, elapsed):
+        if self.sender() is not self.search_worker:
+            return
+        self.search_worker = None
+        self.search_button.setText('查找下一个')
+        if found < 0:
+            self.status_label.setText(f'未找到 ({elapsed:.2f} 秒)')
+            return
+        self.view.goto_offset(found, self.pattern_length)
+        self.status_label.setText(f'在偏移 0x{found:x} ({found:,}) 处找到 ({elapsed:.2f} 秒)')
@@ -0,0 +1,74 @@
+import threading
+from PyQt5.QtWidgets import QFileIconProvider
+from PyQt5.QtCore import QFileInfo
+
+# 这些类型的图标因文件而异，需要逐个解析
+PER_FILE_SUFFIXES = {'desktop', 'exe', 'lnk', 'ico', 'url', 'appimage'}
+
+
+class CachedIconProvider(QFileIconProvider):
+    """ 按扩展名缓存图标的图标提供器
+
+    QFileSystemModel 在后台的信息收集线程里调用 icon()，
+    解析完成前视图显示默认的文件/文件夹图标作为占位。
+    同一扩展名只解析一次，可执行文件等图标各不相同的条目仍逐个解析。
+    """
+
+    def __init__(self):
+        super().__init__()
+        # 不读取每个目录里的 .directory 等自定义图标设置
+        self.setOptions(QFileIconProvider.DontUseCustomDirectoryIcons)
+        self.cache = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.uncached = 0
+
+    @staticmethod
+    def type_key(suffix):
+        """ 按扩展名的缓存键，图标因文件而异的类型返回 None """
+        if suffix in PER_FILE_SUFFIXES:
+            return None
+        return 'file:' + suffix
+
+    @classmethod
+    def cache_key(cls, info):
+        """ 返回缓存键，需要逐个文件解析时返回 None """
+        if info.isRoot() or info.isSymLink():
+            return None
+        if info.isDir():
+            return 'dir:'
+        suffix = info.suffix().lower()
+        if info.isExecutable() and not suffix:
+            return None
+        return cls.type_key(suffix)
+
+    def icon(self, arg):
+        if not isinstance(arg, QFileInfo):
+            return super().icon(arg)
+        return self.lookup(self.cache_key(arg), arg)
+
+    def lookup(self, key, info):
+        """ 按 key 取缓存的图标，未命中时用 info 解析；key 为 None 时不缓存 """
+        if key is None:
+            with self.lock:
+                self.uncached += 1
+            return super().icon(info)
+        with self.lock:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            self.misses += 1
+        icon = super().icon(info)
+        with self.lock:
+            self.cache[key] = icon
+        return icon
+
+    def stats(self):
+        with self.lock:
+            return self.hits, self.misses, self.uncached
+
+    def clear(self):
+        with self.lock:
+            self.cache.clear()
@@ -0,0 +1,163 @@
+import os
+import re
+import time
+import fnmatch
+from PyQt5.QtCore import (Qt, QThread, pyqtSignal, QAbstractTableModel,
+                          QModelIndex)
+from utils import format_size
+
+# 搜索模式
+SEARCH_MODES = [
+    ('包含', 'substring'),
+    ('通配符', 'glob'),
+    ('正则', 'regex'),
+]
+
+# 每批发送的结果数量和最长间隔（秒）
+BATCH_SIZE = 500
+BATCH_INTERVAL = 0.1
+# 状态刷新间隔（秒）
+PROGRESS_INTERVAL = 0.25
+
+
+def build_matcher(pattern, mode='substring', case_sensitive=False):
+    """ 根据搜索模式生成文件名匹配函数 """
+    flags = 0 if case_sensitive else re.IGNORECASE
+    if mode == 'regex':
+        return re.compile(pattern, flags).search
+    if mode == 'glob':
+        # 没有通配符时按包含处理，和原来的 *text* 行为一致
+        if not any(c in pattern for c in '*?['):
+            pattern = f'*{pattern}*'
+        return re.compile(fnmatch.translate(pattern), flags).match
+    if case_sensitive:
+        return lambda name: pattern in name
+    needle = pattern.lower()
+    return lambda name: needle in name.lower()
+
+
+class SearchWorker(QThread):
+    # 一批匹配结果: [(路径, 是否目录, 大小, 修改时间), ...]
+    results_found = pyqtSignal(list)
+    # 已扫描条目数, 每秒扫描条目数
+    progress = pyqtSignal(int, float)
+    # 匹配数, 扫描数, 耗时
+    search_finished = pyqtSignal(int, int, float)
+
+    def __init__(self, root, pattern, mode='substring', recursive=True,
+                 case_sensitive=False, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.recursive = recursive
+        self.matcher = build_matcher(pattern, mode, case_sensitive)
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        matcher = self.matcher
+        batch = []
+        scanned = 0
+        matched = 0
+        start = time.monotonic()
+        last_flush = last_progress = start
+        stack = [self.root]
+
+        while stack and not self._cancelled:
+            current = stack.pop()
+            try:
+                it = os.scandir(current)
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    if self._cancelled:
+                        break
+                    scanned += 1
+                    try:
+                        # 不跟随符号链接，避免循环
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        is_dir = False
+                    if is_dir and self.recursive:
+                        stack.append(entry.path)
+                    if matcher(entry.name):
+                        try:
+                            st = entry.stat(follow_symlinks=False)
+                            size, mtime = st.st_size, st.st_mtime
+                        except OSError:
+                            size, mtime = 0, 0
+                        batch.append((entry.path, is_dir, size, mtime))
+                        matched += 1
+
+                    if scanned & 0xff == 0:
+                        now = time.monotonic()
+                        if batch and (len(batch) >= BATCH_SIZE or
+                                      now - last_flush >= BATCH_INTERVAL):
+                            self.results_found.emit(batch)
+                            batch = []
+                            last_flush = now
+                        if now - last_progress >= PROGRESS_INTERVAL:
+                            self.progress.emit(scanned, scanned / (now - start))
+                            last_progress = now
+
+        if batch:
+            self.results_found.emit(batch)
+        self.search_finished.emit(matched, scanned, time.monotonic() - start)
+
+
+class SearchResultsModel(QAbstractTableModel):
+    HEADERS = ['名称', '位置', '大小', '修改时间']
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.results = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.results)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        path, is_dir, size, mtime = self.results[index.row()]
+        column = index.column()
+        if column == 0:
+            return os.path.basename(path)
+        if column == 1:
+            return os.path.dirname(path)
+        if column == 2:
+            return '' if is_dir else format_size(size)
+        if column == 3:
+            return time.strftime('%Y-%m-%d %H:%M', time.localtime(mtime)) if mtime else ''
+        return None
+
+    def append_results(self, batch):
+        if not batch:
+            return
+        first = len(self.results)
+        self.beginInsertRows(QModelIndex(), first, first + len(batch) - 1)
+        self.results.extend(batch)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.results = []
+        self.endResetModel()
+
+    def file_path(self, index):
+        if not index.isValid():
+            return None
+        return self.results[index.row()][0]
+
@@ -0,0 +1,446 @@
+import os
+import time
+import shutil
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel,
+                             QLineEdit, QPushButton, QComboBox, QCheckBox, QTableWidget,
+                             QTableWidgetItem, QAbstractItemView, QHeaderView, QFileDialog,
+                             QMessageBox)
+from PyQt5.QtCore import QThread, pyqtSignal
+from copy_engine import CopyWorker
+from duplicates import hash_files
+from utils import format_size, process_pool
+
+# 扫描线程数，两侧的目录同时在线程池中列出
+SCAN_THREADS = min(32, (os.cpu_count() or 1) * 4)
+# FAT 文件系统的修改时间精度为 2 秒
+MTIME_TOLERANCE_NS = 2 * 10 ** 9
+# 哈希比较时每个进程任务的字节数上限
+HASH_TASK_BYTES = 256 * 1024 * 1024
+PROGRESS_INTERVAL = 0.25
+# 差异列表最多显示的行数，摘要中的数量不受限制
+MAX_LIST_ROWS = 5000
+# 同步模式: (显示文本, 模式)
+SYNC_MODES = [
+    ('镜像（目标与源完全一致，删除多余项目）', 'mirror'),
+    ('更新（只复制新增和较新的文件，不删除）', 'update'),
+]
+
+
+def _list_dir(path):
+    """ 扫描线程任务：返回 {名称: (是否目录, 大小, mtime_ns)}，无法列出时返回 None """
+    entries = {}
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                entries[entry.name] = (is_dir, st.st_size, st.st_mtime_ns)
+    except OSError:
+        return None
+    return entries
+
+
+def _list_pair(src_dir, dst_dir):
+    return _list_dir(src_dir), _list_dir(dst_dir) if dst_dir is not None else {}
+
+
+def nested(a, b):
+    """ a 和 b 是否相同或互相包含 """
+    a = os.path.abspath(a).rstrip(os.sep) + os.sep
+    b = os.path.abspath(b).rstrip(os.sep) + os.sep
+    return a.startswith(b) or b.startswith(a)
+
+
+class TreeDiff:
+    """ 两棵目录树的差异，路径都相对于各自的根目录 """
+
+    def __init__(self, src_root, dst_root):
+        self.src_root = src_root
+        self.dst_root = dst_root
+        # 要新建的目录，父目录总在子目录之前
+        self.added_dirs = []
+        # 目标中没有的文件: [(相对路径, 大小), ...]
+        self.added = []
+        # 两侧都有但不同的文件: [(相对路径, 大小, 目标是否较新), ...]
+        self.changed = []
+        # 类型不同（文件/文件夹）需要先删除的目标项目
+        self.replaced = []
+        # 只在目标中存在的项目: [(相对路径, 是否目录), ...]
+        self.removed = []
+        self.unchanged = 0
+        # 无法列出的目录: [(路径, 原因), ...]
+        self.errors = []
+
+    def plan(self, mode):
+        """ 返回 (要删除的目标路径, 要创建的目录, 要复制的文件, 总字节数)
+
+        镜像模式复制所有差异并删除多余项目；更新模式跳过目标较新的文件，不删除。
+        """
+        join_src = lambda rel: os.path.join(self.src_root, rel)
+        join_dst = lambda rel: os.path.join(self.dst_root, rel)
+        remove = [join_dst(rel) for rel in self.replaced]
+        if mode == 'mirror':
+            remove += [join_dst(rel) for rel, _ in self.removed]
+        dirs = [(join_src(rel), join_dst(rel)) for rel in self.added_dirs]
+        files = [(join_src(rel), join_dst(rel), size) for rel, size in self.added]
+        files += [(join_src(rel), join_dst(rel), size) for rel, size, dst_newer in self.changed
+                  if mode == 'mirror' or not dst_newer]
+        return remove, dirs, files, sum(size for _, _, size in files)
+
+    def summary(self, mode):
+        _, _, files, total = self.plan(mode)
+        removed = len(self.removed) if mode == 'mirror' else 0
+        text = (f'新增 {len(self.added)} 个文件，修改 {len(self.changed)} 个，'
+                f'删除 {removed} 项，相同 {self.unchanged} 个；'
+                f'需要传输 {len(files)} 个文件（{format_size(total)}）')
+        if mode == 'update':
+            skipped = sum(1 for _, _, dst_newer in self.changed if dst_newer)
+            if skipped:
+                text += f'，跳过 {skipped} 个目标较新的文件'
+        if self.errors:
+            text += f'\n{len(self.errors)} 个目录无法读取，已跳过'
+        return text
+
+
+class CompareWorker(QThread):
+    # 已比较条目数
+    progress = pyqtSignal(int)
+    # TreeDiff（取消时为 None）, 耗时
+    compare_finished = pyqtSignal(object, float)
+
+    def __init__(self, src_root, dst_root, use_hash=False, parent=None):
+        super().__init__(parent)
+        self.src_root = src_root
+        self.dst_root = dst_root
+        self.use_hash = use_hash
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def walk(self, diff):
+        """ 同时遍历两棵树，只深入两侧都有的目录和源中新增的目录
+
+        只在目标中存在的目录整体记为删除，不再列出其内容。
+        返回大小相同、需要用哈希确认的文件 [(相对路径, 大小, 目标是否较新), ...]。
+        """
+        same_size = []
+        compared = 0
+        last_progress = time.monotonic()
+        with ThreadPoolExecutor(max_workers=SCAN_THREADS) as pool:
+            pending = {pool.submit(_list_pair, self.src_root, self.dst_root): ''}
+            while pending and not self._cancelled:
+                done, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in done:
+                    rel_dir = pending.pop(future)
+                    src_dir = os.path.join(self.src_root, rel_dir)
+                    if future.exception() is not None:
+                        diff.errors.append((src_dir, str(future.exception())))
+                        continue
+                    src_entries, dst_entries = future.result()
+                    if src_entries is None or dst_entries is None:
+                        # 读不到源目录时不能据此删除目标中的内容
+                        diff.errors.append((src_dir, '无法读取目录'))
+                        continue
+                    for name, (is_dir, size, mtime_ns) in src_entries.items():
+                        rel = os.path.join(rel_dir, name)
+                        dst = dst_entries.get(name)
+                        if dst is not None and dst[0] != is_dir:
+                            diff.replaced.append(rel)
+                            dst = None
+                        if is_dir:
+                            if dst is None:
+                                diff.added_dirs.append(rel)
+                            dst_dir = os.path.join(self.dst_root, rel) if dst is not None else None
+                            pending[pool.submit(_list_pair, os.path.join(src_dir, name),
+                                                dst_dir)] = rel
+                        elif dst is None:
+                            diff.added.append((rel, size))
+                        else:
+                            dst_newer = dst[2] > mtime_ns + MTIME_TOLERANCE_NS
+                            if dst[1] != size:
+                                diff.changed.append((rel, size, dst_newer))
+                            elif self.use_hash:
+                                same_size.append((rel, size, dst_newer))
+                            elif abs(dst[2] - mtime_ns) > MTIME_TOLERANCE_NS:
+                                diff.changed.append((rel, size, dst_newer))
+                            else:
+                                diff.unchanged += 1
+                    for name, (is_dir, _, _) in dst_entries.items():
+                        if name not in src_entries:
+                            diff.removed.append((os.path.join(rel_dir, name), is_dir))
+                    compared += len(src_entries) + len(dst_entries)
+                now = time.monotonic()
+                if now - last_progress >= PROGRESS_INTERVAL:
+                    self.progress.emit(compared)
+                    last_progress = now
+            for future in pending:
+                future.cancel()
+        return same_size
+
+    def compare_hashes(self, diff, candidates):
+        """ 在进程池中计算两侧文件的哈希，内容不同的记为修改 """
+        pool = process_pool()
+        pending = {}
+
+        def submit(task):
+            files = []
+            for rel, size, _ in task:
+                files.append((os.path.join(self.src_root, rel), size))
+                files.append((os.path.join(self.dst_root, rel), size))
+            try:
+                pending[pool.submit(hash_files, files, False)] = task
+            except RuntimeError:
+                # 进程池已中断（BrokenProcessPool）或已关闭，无法确认内容相同，按修改处理
+                diff.changed += task
+
+        task, task_bytes = [], 0
+        for candidate in candidates:
+            task.append(candidate)
+            task_bytes += candidate[1]
+            if task_bytes >= HASH_TASK_BYTES:
+                submit(task)
+                task, task_bytes = [], 0
+        if task:
+            submit(task)
+        while pending:
+            if self._cancelled:
+                for future in pending:
+                    future.cancel()
+            done, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = pending.pop(future)
+                if future.cancelled():
+                    continue
+                if future.exception() is not None:
+                    # 哈希任务失败（例如进程池中断）时无法确认内容相同，按修改处理
+                    diff.changed += task
+                    continue
+                digests = [digest for _, digest in future.result()]
+                for number, item in enumerate(task):
+                    src_digest, dst_digest = digests[2 * number:2 * number + 2]
+                    if src_digest is None or src_digest != dst_digest:
+                        diff.changed.append(item)
+                    else:
+                        diff.unchanged += 1
+
+    def run(self):
+        start = time.monotonic()
+        diff = TreeDiff(self.src_root, self.dst_root)
+        candidates = self.walk(diff)
+        if candidates and not self._cancelled:
+            self.compare_hashes(diff, candidates)
+        if self._cancelled:
+            diff = None
+        self.compare_finished.emit(diff, time.monotonic() - start)
+
+
+class SyncWorker(CopyWorker):
+    """ 按 TreeDiff 的计划删除多余项目并复制差异文件 """
+
+    def __init__(self, diff, mode, parent=None, verify_contents=False):
+        super().__init__([diff.src_root], diff.dst_root, parent, verify_contents)
+        self.remove, self.dirs, self.files, self.bytes_total = diff.plan(mode)
+
+    def copy_one(self, src, dst, size):
+        if not os.path.lexists(dst):
+            return super().copy_one(src, dst, size)
+        # 已存在的文件先复制到临时文件再替换，复制失败时旧文件保持不变
+        tmp_path = os.path.join(os.path.dirname(dst), f'.{os.path.basename(dst)}.sync')
+        super().copy_one(src, tmp_path, size)
+        os.replace(tmp_path, dst)
+
+    def run(self):
+        self.started_at = self.last_progress = time.monotonic()
+        self.files_total = len(self.files)
+        errors = []
+        # 先删除，释放目标上的空间
+        for path in self.remove:
+            if self._cancelled:
+                break
+            try:
+                if os.path.isdir(path) and not os.path.islink(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+            except OSError as e:
+                errors.append((path, str(e)))
+        if not self._cancelled:
+            errors += self.copy_tree(self.dirs, self.files)
+        self.job_finished.emit(self.files_done, errors, self._cancelled,
+                               time.monotonic() - self.started_at)
+
+
+class SyncDialog(QDialog):
+    HEADERS = ['状态', '路径', '大小']
+
+    def __init__(self, src_root, explorer):
+        super().__init__(explorer)
+        self.explorer = explorer
+        self.worker = None
+        self.diff = None
+        self.setWindowTitle('比较与同步文件夹')
+        self.resize(850, 550)
+
+        layout = QVBoxLayout(self)
+        grid = QGridLayout()
+        self.src_input = QLineEdit(src_root)
+        self.dst_input = QLineEdit()
+        for row, (text, line_edit) in enumerate([('源文件夹:', self.src_input),
+                                                 ('目标文件夹:', self.dst_input)]):
+            browse_button = QPushButton('浏览...')
+            browse_button.clicked.connect(lambda _, edit=line_edit: self.browse(edit))
+            line_edit.textChanged.connect(self.reset)
+            grid.addWidget(QLabel(text), row, 0)
+            grid.addWidget(line_edit, row, 1)
+            grid.addWidget(browse_button, row, 2)
+        layout.addLayout(grid)
+
+        option_layout = QHBoxLayout()
+        self.mode_combo = QComboBox()
+        for text, _ in SYNC_MODES:
+            self.mode_combo.addItem(text)
+        self.mode_combo.currentIndexChanged.connect(self.show_diff)
+        self.hash_check = QCheckBox('比较文件内容（较慢）')
+        self.hash_check.toggled.connect(self.reset)
+        option_layout.addWidget(QLabel('模式:'))
+        option_layout.addWidget(self.mode_combo, 1)
+        option_layout.addWidget(self.hash_check)
+        layout.addLayout(option_layout)
+
+        self.table = QTableWidget(0, len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        layout.addWidget(self.table)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        button_layout = QHBoxLayout()
+        self.compare_button = QPushButton('比较')
+        self.compare_button.clicked.connect(self.compare)
+        self.sync_button = QPushButton('同步')
+        self.sync_button.setEnabled(False)
+        self.sync_button.clicked.connect(self.sync)
+        close_button = QPushButton('关闭')
+        close_button.clicked.connect(self.reject)
+        button_layout.addStretch()
+        button_layout.addWidget(self.compare_button)
+        button_layout.addWidget(self.sync_button)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+    def browse(self, line_edit):
+        path = QFileDialog.getExistingDirectory(self, '选择文件夹', line_edit.text())
+        if path:
+            line_edit.setText(path)
+
+    def mode(self):
+        return SYNC_MODES[self.mode_combo.currentIndex()][1]
+
+    def reset(self):
+        """ 路径或选项改变后，之前的比较结果作废 """
+        self.stop_compare()
+        self.diff = None
+        self.table.setRowCount(0)
+        self.sync_button.setEnabled(False)
+        self.status_label.clear()
+
+    def stop_compare(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+            self.worker = None
+        self.compare_button.setText('比较')
+
+    def compare(self):
+        if self.worker is not None:
+            self.stop_compare()
+            return
+        src = self.src_input.text().strip()
+        dst = self.dst_input.text().strip()
+        if not os.path.isdir(src) or not os.path.isdir(dst):
+            QMessageBox.warning(self, '错误', '请选择存在的源文件夹和目标文件夹')
+            return
+        if nested(src, dst):
+            QMessageBox.warning(self, '错误', '源文件夹和目标文件夹不能相同或互相包含')
+            return
+        self.reset()
+        worker = CompareWorker(src, dst, self.hash_check.isChecked(), self)
+        worker.progress.connect(self.on_progress)
+        worker.compare_finished.connect(self.on_compare_finished)
+        worker.finished.connect(worker.deleteLater)
+        self.worker = worker
+        self.compare_button.setText('停止')
+        self.status_label.setText('正在比较...')
+        worker.start()
+
+    def on_progress(self, compared):
+        if self.sender() is self.worker:
+            self.status_label.setText(f'正在比较... 已比较 {compared} 项')
+
+    def on_compare_finished(self, diff, elapsed):
+        if self.sender() is not self.worker:
+            return
+        self.worker = None
+        self.compare_button.setText('比较')
+        if diff is None:
+            self.status_label.setText('比较已取消')
+            return
+        self.diff = diff
+        self.elapsed = elapsed
+        self.show_diff()
+
+    def show_diff(self):
+        if self.diff is None:
+            return
+        mode = self.mode()
+        diff = self.diff
+        rows = [('新增', rel, format_size(size)) for rel, size in diff.added]
+        rows += [('修改' if mode == 'mirror' or not dst_newer else '跳过（目标较新）',
+                  rel, format_size(size)) for rel, size, dst_newer in diff.changed]
+        rows += [('替换', rel, '') for rel in diff.replaced]
+        if mode == 'mirror':
+            rows += [('删除', rel + (os.sep if is_dir else ''), '') for rel, is_dir in diff.removed]
+        rows += [('无法读取', path, '') for path, _ in diff.errors]
+        shown = rows[:MAX_LIST_ROWS]
+        self.table.setRowCount(len(shown))
+        for row, values in enumerate(shown):
+            for column, value in enumerate(values):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+        text = diff.summary(mode) + f'（比较用时 {self.elapsed:.1f} 秒）'
+        if len(rows) > len(shown):
+            text += f'\n列表只显示前 {len(shown)} 项'
+        self.status_label.setText(text)
+        remove, _, files, _ = diff.plan(mode)
+        self.sync_button.setEnabled(bool(remove or files))
+
+    def sync(self):
+        if self.diff is None:
+            return
+        mode = self.mode()
+        remove, _, _, _ = self.diff.plan(mode)
+        if remove:
+            reply = QMessageBox.question(
+                self, '确认同步',
+                f'同步将永久删除目标文件夹中的 {len(remove)} 个项目，确定继续吗？',
+                QMessageBox.Yes | QMessageBox.No)
+            if reply != QMessageBox.Yes:
+                return
+        worker = SyncWorker(self.diff, mode, self.explorer,
+                            verify_contents=self.explorer.verify_copies)
+        self.explorer.run_copy_worker(worker, '同步')
+        self.accept()
+
+    def done(self, result):
+        self.stop_compare()
+        super().done(result)
@@ -0,0 +1,61 @@
+import tarfile
+from archive_model import ArchiveIndex, load_index, SYMLINK, UNSUPPORTED
+
+
+def test_add_fills_in_missing_parent_directories():
+    index = ArchiveIndex('x.zip', 'zip')
+    index.add('a/b/c.txt', False, 3, 0, 'a/b/c.txt')
+    assert index.listing('') == {'a': (True, 0, 0, None)}
+    assert index.entry('a/b') == (True, 0, 0, None)
+    assert index.entry('a/b/c.txt') == (False, 3, 0, 'a/b/c.txt')
+
+
+def test_add_ignores_unsafe_names():
+    index = ArchiveIndex('x.zip', 'zip')
+    index.add('../evil', False, 1, 0, '../evil')
+    index.add('./', True, 0, 0, './')
+    assert index.listing('') == {}
+
+
+def test_add_turns_file_into_directory_when_members_nest_under_it():
+    index = ArchiveIndex('x.tar', 'tar')
+    index.add('a', False, 2, 0, ('a', 512))
+    index.add('a/b', False, 2, 0, ('a/b', 1536))
+    assert index.entry('a')[0] is True
+    assert index.entry('a/b') == (False, 2, 0, ('a/b', 1536))
+    # 目录上再出现的同名文件被忽略
+    index.add('a', False, 2, 0, ('a', 2560))
+    assert index.entry('a')[0] is True
+
+
+def test_walk_lists_subtree():
+    index = ArchiveIndex('x.zip', 'zip')
+    index.add('d/', True, 0, 0, 'd/')
+    index.add('d/e/f', False, 1, 0, 'd/e/f')
+    paths = sorted(path for path, *_ in index.walk('d'))
+    assert paths == ['d', 'd/e', 'd/e/f']
+    assert index.walk('missing') == []
+
+
+def test_tar_links_resolve_to_target_data(tmp_path):
+    src = tmp_path / 'a.txt'
+    src.write_bytes(b'x' * 100)
+    path = tmp_path / 't.tar'
+    with tarfile.open(path, 'w') as tar:
+        tar.add(src, 'a.txt')
+        link = tarfile.TarInfo('hl.txt')
+        link.type = tarfile.LNKTYPE
+        link.linkname = 'a.txt'
+        tar.addfile(link)
+        symlink = tarfile.TarInfo('sl.txt')
+        symlink.type = tarfile.SYMTYPE
+        symlink.linkname = 'a.txt'
+        tar.addfile(symlink)
+        fifo = tarfile.TarInfo('ff')
+        fifo.type = tarfile.FIFOTYPE
+        tar.addfile(fifo)
+    index = load_index(str(path))
+    assert index.entry('hl.txt')[1] == 100
+    assert index.entry('hl.txt')[3] == index.entry('a.txt')[3]
+    assert index.entry('sl.txt')[3] == ('sl.txt', SYMLINK, 'a.txt')
+    assert index.entry('ff')[3] == ('ff', UNSUPPORTED, '')
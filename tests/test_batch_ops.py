@@ -0,0 +1,55 @@
+import os
+from batch_ops import plan_batch_rename, order_renames
+
+
+def make_files(directory, names):
+    for name in names:
+        (directory / name).write_text(name)
+
+
+def apply(renames):
+    for old, new in renames:
+        assert not os.path.lexists(new)
+        os.rename(old, new)
+
+
+def contents(directory):
+    return {path.name: path.read_text() for path in directory.iterdir()}
+
+
+def test_numbers_names_and_keeps_extension(tmp_path):
+    make_files(tmp_path, ['b.txt', 'a.jpg'])
+    renames, errors = plan_batch_rename([str(tmp_path / 'a.jpg'), str(tmp_path / 'b.txt')], 'img')
+    assert errors == []
+    apply(renames)
+    assert contents(tmp_path) == {'img_1.jpg': 'a.jpg', 'img_2.txt': 'b.txt'}
+
+
+def test_selected_old_names_are_not_conflicts(tmp_path):
+    make_files(tmp_path, ['b', 'x_1'])
+    renames, errors = plan_batch_rename([str(tmp_path / 'b'), str(tmp_path / 'x_1')], 'x_{n}')
+    assert errors == []
+    apply(renames)
+    assert contents(tmp_path) == {'x_1': 'b', 'x_2': 'x_1'}
+
+
+def test_unselected_name_blocks_and_propagates(tmp_path):
+    make_files(tmp_path, ['a', 'x_1', 'x_2'])
+    renames, errors = plan_batch_rename([str(tmp_path / 'a'), str(tmp_path / 'x_1')], 'x_{n}')
+    assert renames == []
+    assert sorted(os.path.basename(path) for path, _ in errors) == ['a', 'x_1']
+
+
+def test_unchanged_names_are_skipped(tmp_path):
+    make_files(tmp_path, ['x_1', 'x_2'])
+    renames, errors = plan_batch_rename([str(tmp_path / 'x_1'), str(tmp_path / 'x_2')], 'x_{n}')
+    assert renames == [] and errors == []
+
+
+def test_order_renames_handles_chains_and_cycles():
+    pending = {'a': 'b', 'b': 'a', 'c': 'd', 'd': 'e'}
+    state = {name: name for name in 'abcd'}
+    for old, new in order_renames(pending, set(state) | {'e'}):
+        assert new not in state
+        state[new] = state.pop(old)
+    assert state == {'b': 'a', 'a': 'b', 'd': 'c', 'e': 'd'}
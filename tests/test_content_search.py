@@ -0,0 +1,36 @@
+from content_search import compile_pattern, scan_file
+
+
+def test_substring_is_literal():
+    pattern = compile_pattern('a.b')
+    assert pattern.search(b'xa.bx')
+    assert not pattern.search(b'axb')
+
+
+def test_anchors_match_per_line():
+    pattern = compile_pattern('^x', 'regex')
+    assert pattern.search(b'first\nx second')
+
+
+def test_glob_matches_inside_line_but_not_across_lines():
+    pattern = compile_pattern('fo*ar', 'glob')
+    assert pattern.search(b'a foobar b')
+    assert not pattern.search(b'fo\nar')
+
+
+def test_case_sensitivity():
+    assert compile_pattern('Hello').search(b'hello')
+    assert not compile_pattern('Hello', case_sensitive=True).search(b'hello')
+
+
+def test_scan_file_reports_line_numbers(tmp_path):
+    path = tmp_path / 'a.txt'
+    path.write_bytes(b'one\ntwo needle\nthree\nneedle needle\n')
+    assert scan_file(str(path), compile_pattern('needle')) == [
+        (2, 'two needle'), (4, 'needle needle')]
+
+
+def test_scan_file_skips_binary_files(tmp_path):
+    path = tmp_path / 'a.bin'
+    path.write_bytes(b'needle\0')
+    assert scan_file(str(path), compile_pattern('needle')) == []
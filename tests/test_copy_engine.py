@@ -0,0 +1,76 @@
+import os
+from copy_engine import plan_copy, unique_name
+
+
+def test_unique_name_keeps_free_name(tmp_path):
+    assert unique_name(str(tmp_path), 'a.txt') == 'a.txt'
+
+
+def test_unique_name_adds_copy_suffix(tmp_path):
+    (tmp_path / 'a.txt').write_text('')
+    (tmp_path / 'a - 副本.txt').write_text('')
+    assert unique_name(str(tmp_path), 'a.txt') == 'a - 副本 (2).txt'
+
+
+def test_unique_name_respects_taken(tmp_path):
+    assert unique_name(str(tmp_path), 'a.txt', {'a.txt'}) == 'a - 副本.txt'
+
+
+def test_plan_copy_separates_same_named_sources(tmp_path):
+    for folder in ('one', 'two'):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / 'x.txt').write_text(folder)
+    dest = tmp_path / 'dest'
+    dest.mkdir()
+    dirs, files, total = plan_copy([str(tmp_path / 'one' / 'x.txt'),
+                                    str(tmp_path / 'two' / 'x.txt')], str(dest))
+    assert dirs == []
+    assert [os.path.basename(target) for _, target, _ in files] == ['x.txt', 'x - 副本.txt']
+    assert total == 6
+
+
+def test_plan_copy_expands_directories(tmp_path):
+    src = tmp_path / 'src'
+    (src / 'sub').mkdir(parents=True)
+    (src / 'sub' / 'f').write_bytes(b'12345')
+    dest = tmp_path / 'dest'
+    dest.mkdir()
+    dirs, files, total = plan_copy([str(src)], str(dest))
+    assert [target for _, target in dirs] == [str(dest / 'src'), str(dest / 'src' / 'sub')]
+    assert files == [(str(src / 'sub' / 'f'), str(dest / 'src' / 'sub' / 'f'), 5)]
+    assert total == 5
+
+
+def test_plan_copy_rejects_copy_into_itself(tmp_path):
+    errors = []
+    plan_copy([str(tmp_path)], str(tmp_path / 'inside'), errors=errors)
+    assert len(errors) == 1
+
+
+def test_plan_copy_records_unreadable_entries(tmp_path, monkeypatch):
+    src = tmp_path / 'src'
+    (src / 'locked').mkdir(parents=True)
+    (src / 'ok').write_text('ok')
+    real_scandir = os.scandir
+
+    def scandir(path):
+        if os.path.basename(path) == 'locked':
+            raise PermissionError(13, 'Permission denied', path)
+        return real_scandir(path)
+
+    monkeypatch.setattr(os, 'scandir', scandir)
+    errors = []
+    _, files, _ = plan_copy([str(src)], str(tmp_path / 'dest'), errors=errors)
+    assert [os.path.basename(source) for source, _, _ in files] == ['ok']
+    assert [os.path.basename(path) for path, _ in errors] == ['locked']
+
+
+def test_plan_copy_without_rename_reports_conflict(tmp_path):
+    (tmp_path / 'a').write_text('')
+    dest = tmp_path / 'dest'
+    dest.mkdir()
+    (dest / 'a').write_text('')
+    errors = []
+    _, files, _ = plan_copy([str(tmp_path / 'a')], str(dest), rename_conflicts=False,
+                            errors=errors)
+    assert files == [] and len(errors) == 1
@@ -0,0 +1,42 @@
+import os
+import pytest
+from duplicates import group_by, replace_with_link
+
+
+def test_group_by_drops_single_entries():
+    groups = group_by([1, 2, 3, 4, 5], lambda n: n % 2)
+    assert sorted(map(sorted, groups)) == [[1, 3, 5], [2, 4]]
+    assert group_by([1, 2], lambda n: n) == []
+
+
+def write(path, text):
+    path.write_text(text)
+    os.chmod(path, 0o644)
+    return os.stat(path)
+
+
+def test_replace_with_link(tmp_path):
+    keep_st = write(tmp_path / 'keep', 'same')
+    st = write(tmp_path / 'dup', 'same')
+    replace_with_link(str(tmp_path / 'keep'), str(tmp_path / 'dup'), 4,
+                      st.st_mtime_ns, keep_st.st_mtime_ns)
+    assert os.stat(tmp_path / 'dup').st_ino == keep_st.st_ino
+
+
+def test_replace_with_link_refuses_changed_keep(tmp_path):
+    keep_st = write(tmp_path / 'keep', 'same')
+    st = write(tmp_path / 'dup', 'same')
+    os.utime(tmp_path / 'keep', ns=(0, keep_st.st_mtime_ns + 10 ** 9))
+    with pytest.raises(OSError):
+        replace_with_link(str(tmp_path / 'keep'), str(tmp_path / 'dup'), 4,
+                          st.st_mtime_ns, keep_st.st_mtime_ns)
+    assert os.stat(tmp_path / 'dup').st_ino == st.st_ino
+
+
+def test_replace_with_link_refuses_different_mode(tmp_path):
+    keep_st = write(tmp_path / 'keep', 'same')
+    st = write(tmp_path / 'dup', 'same')
+    os.chmod(tmp_path / 'dup', 0o600)
+    with pytest.raises(OSError):
+        replace_with_link(str(tmp_path / 'keep'), str(tmp_path / 'dup'), 4,
+                          st.st_mtime_ns, keep_st.st_mtime_ns)
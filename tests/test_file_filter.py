@@ -0,0 +1,48 @@
+import time
+from file_filter import FileFilter
+
+NOW = time.time()
+
+
+def test_empty_filter_hides_only_hidden_entries():
+    file_filter = FileFilter()
+    assert file_filter.is_empty()
+    assert file_filter.accepts('a', False, 1, NOW, False)
+    assert not file_filter.accepts('.a', False, 1, NOW, True)
+    assert FileFilter(show_hidden=True).accepts('.a', False, 1, NOW, True)
+
+
+def test_name_pattern_applies_to_folders_and_files():
+    file_filter = FileFilter('rep')
+    assert file_filter.accepts('Report.txt', False, 1, NOW, False)
+    assert not file_filter.accepts('docs', True, 0, NOW, False)
+
+
+def test_attribute_conditions_keep_folders():
+    file_filter = FileFilter(type_patterns=['*.txt'], min_size=10, modified_within=86400)
+    old = NOW - 10 * 86400
+    assert file_filter.accepts('old folder', True, 0, old, False)
+    assert file_filter.accepts('a.txt', False, 10, NOW, False)
+    assert not file_filter.accepts('a.jpg', False, 10, NOW, False)
+    assert not file_filter.accepts('a.txt', False, 9, NOW, False)
+    assert not file_filter.accepts('a.txt', False, 10, old, False)
+
+
+def test_dirs_only():
+    file_filter = FileFilter(dirs_only=True)
+    assert file_filter.accepts('d', True, 0, NOW, False)
+    assert not file_filter.accepts('f', False, 0, NOW, False)
+
+
+def test_narrows_when_substring_is_extended():
+    assert FileFilter('abc').narrows(FileFilter('ab'))
+    assert not FileFilter('ab').narrows(FileFilter('abc'))
+    assert not FileFilter('abc', 'regex').narrows(FileFilter('ab', 'regex'))
+
+
+def test_narrows_with_attribute_ranges():
+    assert FileFilter(min_size=100).narrows(FileFilter(min_size=10))
+    assert not FileFilter(min_size=10).narrows(FileFilter(min_size=100))
+    assert FileFilter(type_patterns=['*.txt']).narrows(FileFilter(type_patterns=['*.txt', '*.md']))
+    assert not FileFilter(show_hidden=True).narrows(FileFilter())
+    assert FileFilter('a').narrows(None)
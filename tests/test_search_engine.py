@@ -0,0 +1,28 @@
+from search_engine import build_matcher
+
+
+def test_substring_ignores_case_by_default():
+    matcher = build_matcher('Rep')
+    assert matcher('my_report.txt')
+    assert not matcher('other')
+    assert not build_matcher('Rep', case_sensitive=True)('my_report.txt')
+
+
+def test_substring_folds_non_ascii_case():
+    assert build_matcher('äpfel')('ÄPFEL.txt')
+
+
+def test_glob_without_wildcards_matches_anywhere():
+    assert build_matcher('port', 'glob')('report.txt')
+
+
+def test_glob_matches_whole_name():
+    matcher = build_matcher('*.txt', 'glob')
+    assert matcher('a.TXT')
+    assert not matcher('a.txt.bak')
+
+
+def test_regex_searches():
+    matcher = build_matcher(r'\d{3}', 'regex')
+    assert matcher('img_123.png')
+    assert not matcher('img_12.png')
@@ -0,0 +1,38 @@
+import os
+from sync import TreeDiff, nested
+
+
+def j(*parts):
+    return os.path.join(*parts)
+
+
+def make_diff():
+    diff = TreeDiff('/src', '/dst')
+    diff.added_dirs = ['new']
+    diff.added = [(j('new', 'a'), 10)]
+    diff.changed = [('older', 20, False), ('newer', 30, True)]
+    diff.replaced = ['was_dir']
+    diff.removed = [('extra', False)]
+    return diff
+
+
+def test_mirror_plan_copies_all_changes_and_removes_extras():
+    remove, dirs, files, total = make_diff().plan('mirror')
+    assert remove == [j('/dst', 'was_dir'), j('/dst', 'extra')]
+    assert dirs == [(j('/src', 'new'), j('/dst', 'new'))]
+    assert [src for src, _, _ in files] == [j('/src', 'new', 'a'), j('/src', 'older'),
+                                           j('/src', 'newer')]
+    assert total == 60
+
+
+def test_update_plan_keeps_newer_targets_and_extras():
+    remove, _, files, total = make_diff().plan('update')
+    assert remove == [j('/dst', 'was_dir')]
+    assert [src for src, _, _ in files] == [j('/src', 'new', 'a'), j('/src', 'older')]
+    assert total == 30
+
+
+def test_nested():
+    assert nested('/a', '/a/b')
+    assert nested('/a/b', '/a')
+    assert not nested('/a', '/ab')
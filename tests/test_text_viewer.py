@@ -0,0 +1,72 @@
+import codecs
+import text_viewer
+from text_viewer import (LineIndex, LineIndexWorker, PagedFile, detect_encoding,
+                         find_newline, newline_bytes)
+
+
+def build_index(path, newline=b'\n', start=0):
+    index = LineIndex(start)
+    worker = LineIndexWorker(str(path), newline, index, path.stat().st_size)
+    worker.progress.connect(index.add)
+    worker.run()
+    return index
+
+
+def test_detect_encoding():
+    assert detect_encoding(codecs.BOM_UTF8 + b'abc') == ('utf-8-sig', 3)
+    assert detect_encoding('中文'.encode('utf-8')) == ('utf-8', 0)
+    assert detect_encoding('中文'.encode('gb18030')) == ('gb18030', 0)
+    assert detect_encoding(b'a\0b') == (None, 0)
+
+
+def test_find_newline_respects_character_width():
+    # U+0A41 U+4E00 的编码中间出现了未对齐的 0A 00
+    data = '\u0a41\u4e00\n'.encode('utf-16-le')
+    newline = newline_bytes('utf-16-le')
+    assert data.find(newline) == 1
+    assert find_newline(data, newline, 0, len(data)) == 4
+
+
+def test_line_index_counts_lines_and_places_checkpoints(tmp_path, monkeypatch):
+    monkeypatch.setattr(text_viewer, 'INDEX_BLOCK', 64)
+    monkeypatch.setattr(text_viewer, 'INDEX_CHUNK', 256)
+    lines = [f'line {number}\n' for number in range(200)]
+    path = tmp_path / 'a.log'
+    path.write_text(''.join(lines))
+    index = build_index(path)
+    assert index.line_count() == 201
+    assert index.indexed == path.stat().st_size
+    assert len(index.lines) > 1
+    data = path.read_bytes()
+    for line in (0, 57, 199):
+        checkpoint_line, offset = index.checkpoint(line)
+        assert checkpoint_line <= line
+        assert data[:offset].count(b'\n') == checkpoint_line
+    checkpoint_line, offset = index.checkpoint_for_offset(1000)
+    assert offset <= 1000 and data[:offset].count(b'\n') == checkpoint_line
+
+
+def test_line_index_stops_at_truncated_end(tmp_path):
+    path = tmp_path / 'a.log'
+    path.write_bytes(b'a\nb\n')
+    index = LineIndex()
+    worker = LineIndexWorker(str(path), b'\n', index, 1000)
+    worker.progress.connect(index.add)
+    worker.run()
+    assert index.indexed == 4 and index.line_count() == 3
+
+
+def test_paged_file_reads_across_pages(tmp_path, monkeypatch):
+    monkeypatch.setattr(text_viewer, 'PAGE_SIZE', 16)
+    data = bytes(range(256)) * 2
+    path = tmp_path / 'a.bin'
+    path.write_bytes(data)
+    reader = PagedFile(str(path))
+    try:
+        assert reader[10:50] == data[10:50]
+        assert reader[500:600] == data[500:]
+        assert reader.find(bytes([15, 16, 17]), 0, len(data)) == 15
+        assert reader.find(b'\xff\x00', 300, len(data)) == data.find(b'\xff\x00', 300)
+        assert reader.find(b'missing', 0, len(data)) == -1
+    finally:
+        reader.close()
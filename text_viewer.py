@@ -0,0 +1,536 @@
+import os
+import codecs
+from array import array
+from collections import OrderedDict
+from bisect import bisect_right
+from PyQt5.QtWidgets import (QWidget, QAbstractScrollArea, QVBoxLayout, QHBoxLayout,
+                             QComboBox, QLineEdit, QPushButton, QCheckBox, QLabel)
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
+from PyQt5.QtGui import QPainter, QFontDatabase, QPalette
+
+# 用于判断编码的样本大小
+SAMPLE_BYTES = 64 * 1024
+# 建索引时每次读取的块大小
+INDEX_CHUNK = 4 * 1024 * 1024
+# 大约每隔这么多字节记录一个行首检查点
+INDEX_BLOCK = 16 * 1024
+# 单行最多显示的字节数，超长的行截断显示
+MAX_LINE_BYTES = 16 * 1024
+# 检查文件是否增长的间隔（毫秒）
+TAIL_INTERVAL = 1000
+# 界面读取文件的页大小和缓存的页数
+PAGE_SIZE = 64 * 1024
+CACHED_PAGES = 64
+# 比较这么多字节的文件开头，判断文件是否被截断后重新写入
+HEAD_BYTES = 4096
+
+BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+]
+
+
+def detect_encoding(sample):
+    """ 根据文件开头的样本判断编码，返回 (编码, BOM 长度)；二进制文件返回 (None, 0) """
+    for bom, encoding in BOMS:
+        if sample.startswith(bom):
+            return encoding, len(bom)
+    if b'\0' in sample:
+        return None, 0
+    for encoding in ('utf-8', 'gb18030'):
+        try:
+            sample.decode(encoding)
+            return encoding, 0
+        except UnicodeDecodeError as e:
+            # 样本末尾可能截断了一个多字节字符
+            if e.start >= len(sample) - 3 and len(sample) == SAMPLE_BYTES:
+                return encoding, 0
+    return 'latin-1', 0
+
+
+def newline_bytes(encoding):
+    return '\n'.encode(encoding.replace('-sig', ''))
+
+
+def find_newline(buffer, newline, start, end):
+    """ 在 buffer[start:end] 中查找换行，多字节编码时要求按字符对齐 """
+    width = len(newline)
+    while True:
+        pos = buffer.find(newline, start, end)
+        if pos < 0 or pos % width == 0:
+            return pos
+        start = pos + 1
+
+
+def read_at(fd, size, offset):
+    if hasattr(os, 'pread'):
+        return os.pread(fd, size, offset)
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.read(fd, size)
+
+
+class PagedFile:
+    """ 按页读取并缓存文件内容，接口与 find、切片兼容
+
+    不使用 mmap：跟踪中的日志被原地截断（logrotate copytruncate）后，访问
+    映射中超出新末尾的页面会让进程收到 SIGBUS；按偏移读取只会返回较少的数据。
+    """
+
+    def __init__(self, path):
+        self.fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        self.pages = OrderedDict()
+
+    def close(self):
+        os.close(self.fd)
+
+    def stat(self):
+        return os.fstat(self.fd)
+
+    def clear(self):
+        self.pages.clear()
+
+    def page(self, number):
+        data = self.pages.get(number)
+        if data is None:
+            data = read_at(self.fd, PAGE_SIZE, number * PAGE_SIZE)
+            self.pages[number] = data
+            if len(self.pages) > CACHED_PAGES:
+                self.pages.popitem(last=False)
+        else:
+            self.pages.move_to_end(number)
+        return data
+
+    def __getitem__(self, key):
+        start, stop = key.start or 0, key.stop
+        if stop <= start:
+            return b''
+        first, last = start // PAGE_SIZE, (stop - 1) // PAGE_SIZE
+        data = b''.join(self.page(number) for number in range(first, last + 1))
+        return data[start - first * PAGE_SIZE:stop - first * PAGE_SIZE]
+
+    def find(self, sub, start, end):
+        while start < end:
+            stop = min(start + PAGE_SIZE, end)
+            # 多读 len(sub) - 1 字节，找到跨页的匹配
+            data = self[start:min(stop + len(sub) - 1, end)]
+            pos = data.find(sub)
+            if pos >= 0:
+                return start + pos
+            if len(data) < stop - start:
+                break
+            start = stop
+        return -1
+
+
+class LineIndex:
+    """ 稀疏行索引
+
+    只在大约每 INDEX_BLOCK 字节处记录一个行首的 (行号, 偏移)，定位某一行时
+    从最近的检查点向后查找换行，内存占用与文件大小成正比但很小。
+    """
+
+    def __init__(self, start=0):
+        self.lines = array('Q', [0])
+        self.offsets = array('Q', [start])
+        self.newlines = 0
+        self.indexed = start
+
+    def add(self, lines, offsets, newlines, indexed):
+        self.lines.extend(lines)
+        self.offsets.extend(offsets)
+        self.newlines = newlines
+        self.indexed = indexed
+
+    def line_count(self):
+        return self.newlines + 1
+
+    def next_block(self):
+        return self.offsets[-1] + INDEX_BLOCK
+
+    def checkpoint(self, line):
+        i = bisect_right(self.lines, line) - 1
+        return self.lines[i], self.offsets[i]
+
+    def checkpoint_for_offset(self, offset):
+        i = bisect_right(self.offsets, offset) - 1
+        return self.lines[i], self.offsets[i]
+
+
+class LineIndexWorker(QThread):
+    # 新检查点行号, 新检查点偏移, 已索引的换行数, 已索引字节数
+    progress = pyqtSignal(object, object, object, object)
+    index_finished = pyqtSignal()
+
+    def __init__(self, path, newline, index, end, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.newline = newline
+        self.newlines = index.newlines
+        self.start_pos = index.indexed
+        self.next_block = index.next_block()
+        self.end = end
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        try:
+            f = open(self.path, 'rb')
+        except OSError:
+            self.index_finished.emit()
+            return
+
+        newline = self.newline
+        width = len(newline)
+        newlines = self.newlines
+        next_block = self.next_block
+        pos = self.start_pos
+        end = self.end
+        try:
+            f.seek(pos)
+            while pos < end and not self._cancelled:
+                # 按字符宽度对齐块边界，避免多字节换行被切开
+                chunk_end = min(pos + INDEX_CHUNK, end)
+                chunk_end -= (chunk_end - pos) % width
+                if chunk_end <= pos:
+                    break
+                chunk = f.read(chunk_end - pos)
+                # 文件在索引期间被截断时读到的数据变少
+                chunk = chunk[:len(chunk) - len(chunk) % width]
+                if not chunk:
+                    break
+                chunk_end = pos + len(chunk)
+                lines = []
+                offsets = []
+                counted = 0
+                while next_block < chunk_end:
+                    found = find_newline(chunk, newline, max(next_block - pos, 0), len(chunk))
+                    if found < 0:
+                        break
+                    newlines += chunk.count(newline, counted, found + width)
+                    counted = found + width
+                    line_start = pos + counted
+                    lines.append(newlines)
+                    offsets.append(line_start)
+                    next_block = line_start + INDEX_BLOCK
+                newlines += chunk.count(newline, counted)
+                pos = chunk_end
+                self.progress.emit(lines, offsets, newlines, pos)
+        except OSError:
+            pass
+        finally:
+            f.close()
+        self.index_finished.emit()
+
+
+class TextViewer(QAbstractScrollArea):
+    """ 虚拟化文本视图：只解码和绘制当前可见的行 """
+
+    index_changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.path = None
+        self.reader = None
+        self.size = 0
+        # 打开的文件的 (设备, inode) 和开头的内容，用于发现文件被替换或截断
+        self.identity = None
+        self.head = b''
+        self.bom = 0
+        self.encoding = None
+        self.newline = b'\n'
+        self.index = LineIndex()
+        self.index_worker = None
+        self.follow = False
+        self.max_columns = 0
+        self.highlight_line = -1
+        self.verticalScrollBar().valueChanged.connect(self.viewport().update)
+        self.horizontalScrollBar().valueChanged.connect(self.viewport().update)
+
+        self.tail_timer = QTimer(self)
+        self.tail_timer.timeout.connect(self.check_growth)
+
+    def open_file(self, path):
+        """ 打开文件并开始建索引，二进制文件返回 False """
+        with open(path, 'rb') as f:
+            sample = f.read(SAMPLE_BYTES)
+        encoding, bom = detect_encoding(sample)
+        if encoding is None:
+            return False
+        self.path = path
+        self.encoding = encoding
+        self.bom = bom
+        self.newline = newline_bytes(encoding)
+        self.index = LineIndex(bom)
+        self.open_reader()
+        self.start_indexing()
+        self.tail_timer.start(TAIL_INTERVAL)
+        return True
+
+    def open_reader(self):
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+        self.reader = PagedFile(self.path)
+        st = self.reader.stat()
+        self.identity = (st.st_dev, st.st_ino)
+        self.size = st.st_size
+        self.head = self.reader[0:HEAD_BYTES]
+
+    def start_indexing(self):
+        if self.index_worker is not None or self.index.indexed >= self.size:
+            return
+        worker = LineIndexWorker(self.path, self.newline, self.index, self.size)
+        worker.progress.connect(self.on_index_progress)
+        worker.index_finished.connect(self.on_index_finished)
+        worker.finished.connect(worker.deleteLater)
+        self.index_worker = worker
+        worker.start()
+
+    def on_index_progress(self, lines, offsets, newlines, indexed):
+        if self.sender() is not self.index_worker:
+            return
+        self.index.add(lines, offsets, newlines, indexed)
+        self.update_scrollbars()
+        if self.follow:
+            self.scroll_to_end()
+        self.viewport().update()
+        self.index_changed.emit()
+
+    def on_index_finished(self):
+        if self.sender() is not self.index_worker:
+            return
+        self.index_worker = None
+        self.index_changed.emit()
+        # 索引期间文件可能又增长了
+        self.start_indexing()
+
+    def indexing(self):
+        return self.index_worker is not None
+
+    def check_growth(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return
+        # 轮转时路径换成了新文件；原地截断后又写入时大小可能没有变小，
+        # 但开头的内容变了
+        replaced = (st.st_dev, st.st_ino) != self.identity
+        self.reader.clear()
+        known = min(len(self.head), st.st_size)
+        try:
+            rewritten = replaced or self.reader[0:known] != self.head[:known]
+        except OSError:
+            rewritten = True
+        if not rewritten and st.st_size == self.size:
+            return
+        if self.index_worker is not None:
+            self.index_worker.cancel()
+            self.index_worker.wait()
+            self.index_worker = None
+        if rewritten or st.st_size < self.index.indexed:
+            # 文件被截断或轮转，重新建索引
+            self.index = LineIndex(self.bom)
+            self.max_columns = 0
+        try:
+            self.open_reader()
+        except OSError:
+            return
+        self.start_indexing()
+        self.update_scrollbars()
+        self.viewport().update()
+
+    def close_file(self):
+        self.tail_timer.stop()
+        if self.index_worker is not None:
+            self.index_worker.cancel()
+            self.index_worker.wait()
+            self.index_worker = None
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+
+    def line_count(self):
+        return self.index.line_count() if self.size else 1
+
+    def line_start(self, line):
+        """ 从最近的检查点向后查找第 line 行的起始偏移 """
+        line = min(line, self.index.newlines)
+        checkpoint_line, offset = self.index.checkpoint(line)
+        for _ in range(line - checkpoint_line):
+            found = find_newline(self.reader, self.newline, offset, self.size)
+            if found < 0:
+                break
+            offset = found + len(self.newline)
+        return offset
+
+    def read_line(self, offset):
+        """ 返回 (行文本, 下一行偏移) """
+        limit = min(offset + MAX_LINE_BYTES, self.size)
+        found = find_newline(self.reader, self.newline, offset, limit)
+        if found < 0:
+            end = limit
+            next_offset = find_newline(self.reader, self.newline, limit, self.size)
+            next_offset = self.size if next_offset < 0 else next_offset + len(self.newline)
+        else:
+            end = found
+            next_offset = found + len(self.newline)
+        text = self.reader[offset:end].decode(self.encoding, errors='replace')
+        return text.rstrip('\r').expandtabs(4), next_offset
+
+    def visible_rows(self):
+        return max(1, self.viewport().height() // self.fontMetrics().lineSpacing())
+
+    def gutter_width(self):
+        digits = len(str(self.line_count()))
+        return self.fontMetrics().horizontalAdvance('9') * (digits + 2)
+
+    def update_scrollbars(self):
+        rows = self.visible_rows()
+        vbar = self.verticalScrollBar()
+        vbar.setRange(0, max(0, self.line_count() - rows))
+        vbar.setPageStep(rows)
+        hbar = self.horizontalScrollBar()
+        char_width = self.fontMetrics().horizontalAdvance('9')
+        columns = (self.viewport().width() - self.gutter_width()) // char_width
+        hbar.setRange(0, max(0, self.max_columns - columns))
+        hbar.setPageStep(max(1, columns))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scrollbars()
+
+    def scroll_to_end(self):
+        vbar = self.verticalScrollBar()
+        vbar.setValue(vbar.maximum())
+
+    def goto_line(self, line):
+        """ 跳转到第 line 行（从 0 开始），超出已索引范围时返回 False """
+        if line < 0 or line >= self.line_count():
+            return False
+        self.highlight_line = line
+        self.verticalScrollBar().setValue(max(0, line - self.visible_rows() // 3))
+        self.viewport().update()
+        return True
+
+    def line_at_offset(self, offset):
+        """ 字节偏移所在的行号，偏移尚未建立索引时返回 None """
+        if offset < 0 or offset > self.index.indexed or self.reader is None:
+            return None
+        checkpoint_line, start = self.index.checkpoint_for_offset(offset)
+        return checkpoint_line + self.reader[start:offset].count(self.newline)
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        palette = self.palette()
+        painter.fillRect(self.viewport().rect(), palette.color(QPalette.Base))
+        if not self.size:
+            return
+
+        metrics = self.fontMetrics()
+        line_height = metrics.lineSpacing()
+        char_width = metrics.horizontalAdvance('9')
+        gutter = self.gutter_width()
+        width = self.viewport().width()
+        first = self.verticalScrollBar().value()
+        skip = self.horizontalScrollBar().value()
+        columns = (width - gutter) // char_width + 1
+
+        painter.fillRect(0, 0, gutter - char_width // 2, self.viewport().height(),
+                         palette.color(QPalette.AlternateBase))
+        offset = self.line_start(first)
+        max_columns = self.max_columns
+        for row in range(self.visible_rows() + 1):
+            line = first + row
+            if line >= self.line_count() or offset > self.size:
+                break
+            text, next_offset = self.read_line(offset)
+            max_columns = max(max_columns, len(text))
+            y = row * line_height
+            if line == self.highlight_line:
+                painter.fillRect(gutter, y, width - gutter, line_height,
+                                 palette.color(QPalette.Highlight).lighter(170))
+            painter.setPen(palette.color(QPalette.Mid))
+            painter.drawText(0, y, gutter - char_width, line_height,
+                             Qt.AlignRight | Qt.AlignVCenter, str(line + 1))
+            painter.setPen(palette.color(QPalette.Text))
+            painter.drawText(gutter, y + metrics.ascent(), text[skip:skip + columns])
+            if next_offset >= self.size and line >= self.index.newlines:
+                break
+            offset = next_offset
+        if max_columns != self.max_columns:
+            self.max_columns = max_columns
+            self.update_scrollbars()
+
+
+class TextViewerPanel(QWidget):
+    """ 文本查看器加跳转、跟踪文件末尾等控件 """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        tool_layout = QHBoxLayout()
+        self.goto_mode = QComboBox()
+        self.goto_mode.addItems(['行号', '字节偏移'])
+        self.goto_input = QLineEdit()
+        self.goto_input.setPlaceholderText('输入行号或偏移（支持 0x 十六进制）')
+        self.goto_input.returnPressed.connect(self.goto)
+        goto_button = QPushButton('跳转')
+        goto_button.clicked.connect(self.goto)
+        self.follow_check = QCheckBox('跟踪文件末尾')
+        self.follow_check.toggled.connect(self.set_follow)
+        tool_layout.addWidget(self.goto_mode)
+        tool_layout.addWidget(self.goto_input)
+        tool_layout.addWidget(goto_button)
+        tool_layout.addWidget(self.follow_check)
+        layout.addLayout(tool_layout)
+
+        self.viewer = TextViewer()
+        self.viewer.index_changed.connect(self.update_status)
+        layout.addWidget(self.viewer)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+    def open_file(self, path):
+        if not self.viewer.open_file(path):
+            return False
+        self.update_status()
+        return True
+
+    def close_file(self):
+        self.viewer.close_file()
+
+    def set_follow(self, checked):
+        self.viewer.follow = checked
+        if checked:
+            self.viewer.scroll_to_end()
+
+    def goto(self):
+        text = self.goto_input.text().strip()
+        try:
+            value = int(text, 0)
+        except ValueError:
+            self.status_label.setText('请输入有效的数字')
+            return
+        if self.goto_mode.currentIndex() == 0:
+            line = value - 1
+        else:
+            line = self.viewer.line_at_offset(value)
+        if line is None or not self.viewer.goto_line(line):
+            self.status_label.setText('超出范围，或该位置尚未建立索引')
+
+    def update_status(self):
+        viewer = self.viewer
+        text = f'编码: {viewer.encoding}    行数: {viewer.line_count():,}'
+        if viewer.indexing() and viewer.size:
+            text += f'（正在建立索引 {viewer.index.indexed * 100 // viewer.size}%）'
+        self.status_label.setText(text)
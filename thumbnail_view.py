@@ -0,0 +1,178 @@
+from PyQt5.QtWidgets import QListView, QStyledItemDelegate, QAbstractItemView
+from PyQt5.QtCore import Qt, QSize, QPoint, QTimer, QModelIndex, QPersistentModelIndex
+from PyQt5.QtGui import QIcon, QPixmap, QPixmapCache
+from thumbnails import is_image
+
+THUMBNAIL_SIZE = QSize(128, 128)
+# 每个网格单元的大小（缩略图加两行文件名）
+GRID_SIZE = QSize(150, 175)
+# 视口上下额外预取的行数
+PREFETCH_ROWS = 2
+# 滚动停止多久后再调整加载队列（毫秒）
+PREFETCH_DELAY = 30
+# 转换好的 QPixmap 占用的缓存上限（KB）
+PIXMAP_CACHE_KB = 64 * 1024
+
+
+def pixmap_key(path):
+    return f'thumb:{THUMBNAIL_SIZE.width()}:{path}'
+
+
+class ThumbnailDelegate(QStyledItemDelegate):
+    """ 有缩略图时用缩略图替换图标，否则显示文件图标作为占位 """
+
+    def __init__(self, view):
+        super().__init__(view)
+        self.view = view
+
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+        pixmap = self.view.thumbnail(index)
+        if pixmap is not None:
+            option.icon = QIcon(pixmap)
+
+    def sizeHint(self, option, index):
+        return GRID_SIZE
+
+
+class ThumbnailView(QListView):
+    """ 与文件列表共用模型的缩略图网格
+
+    只为视口内及附近的项目请求缩略图，滚出范围的请求会被取消。
+    """
+
+    def __init__(self, loader, parent=None):
+        super().__init__(parent)
+        self.loader = loader
+        # 排队中的请求: 路径 -> 持久索引
+        self.requested = {}
+        # 解码失败的图片不再重复请求
+        self.failed = set()
+        QPixmapCache.setCacheLimit(max(QPixmapCache.cacheLimit(), PIXMAP_CACHE_KB))
+
+        self.setViewMode(QListView.IconMode)
+        self.setResizeMode(QListView.Adjust)
+        self.setMovement(QListView.Static)
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(1000)
+        self.setIconSize(THUMBNAIL_SIZE)
+        self.setGridSize(GRID_SIZE)
+        self.setWordWrap(True)
+        self.setTextElideMode(Qt.ElideMiddle)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setItemDelegate(ThumbnailDelegate(self))
+
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.timeout.connect(self.prefetch)
+        self.verticalScrollBar().valueChanged.connect(self.schedule_prefetch)
+        self.loader.loaded.connect(self.on_thumbnail_loaded)
+
+    def file_path(self, index):
+        return self.model().filePath(index)
+
+    def thumbnail(self, index):
+        """ 返回已缓存的缩略图，没有时排队加载并返回 None """
+        path = self.file_path(index)
+        if not is_image(path) or path in self.failed:
+            return None
+        pixmap = QPixmapCache.find(pixmap_key(path))
+        if pixmap is not None:
+            return pixmap
+        image = self.loader.request(path, THUMBNAIL_SIZE)
+        if image is None:
+            self.requested[path] = QPersistentModelIndex(index)
+            return None
+        if image.isNull():
+            self.failed.add(path)
+            return None
+        pixmap = QPixmap.fromImage(image)
+        QPixmapCache.insert(pixmap_key(path), pixmap)
+        return pixmap
+
+    def on_thumbnail_loaded(self, path, size, image):
+        if path not in self.requested or size != (THUMBNAIL_SIZE.width(), THUMBNAIL_SIZE.height()):
+            return
+        index = QModelIndex(self.requested.pop(path))
+        if image.isNull():
+            self.failed.add(path)
+            return
+        if not self.isVisible():
+            return
+        QPixmapCache.insert(pixmap_key(path), QPixmap.fromImage(image))
+        if index.isValid():
+            self.update(index)
+
+    def schedule_prefetch(self):
+        self.prefetch_timer.start(PREFETCH_DELAY)
+
+    def first_visible_row(self):
+        # 在第一行网格高度内探测，单元格之间的空白处会返回无效索引
+        grid = self.gridSize()
+        for y in range(0, grid.height() + 1, max(1, grid.height() // 4)):
+            index = self.indexAt(QPoint(grid.width() // 2, y))
+            if index.isValid():
+                return index.row()
+        return 0
+
+    def prefetch_range(self):
+        """ 视口内以及上下 PREFETCH_ROWS 行的第一项和最后一项 """
+        count = self.model().rowCount(self.rootIndex())
+        grid = self.gridSize()
+        columns = max(1, self.viewport().width() // grid.width())
+        rows = self.viewport().height() // grid.height() + 1
+        first = self.first_visible_row()
+        return (max(0, first - PREFETCH_ROWS * columns),
+                min(count - 1, first + (rows + PREFETCH_ROWS) * columns - 1))
+
+    def prefetch(self):
+        if not self.isVisible() or self.model() is None:
+            return
+        first, last = self.prefetch_range()
+        wanted = set()
+        root = self.rootIndex()
+        model = self.model()
+        for row in range(first, last + 1):
+            index = model.index(row, 0, root)
+            path = self.file_path(index)
+            if is_image(path):
+                wanted.add(path)
+                self.thumbnail(index)
+        # 取消已滚出范围的请求
+        for path in set(self.requested) - wanted:
+            self.loader.cancel(path, THUMBNAIL_SIZE)
+            del self.requested[path]
+
+    def cancel_requests(self):
+        for path in self.requested:
+            self.loader.cancel(path, THUMBNAIL_SIZE)
+        self.requested.clear()
+
+    def setModel(self, model):
+        self.cancel_requests()
+        if self.model() is not None:
+            self.model().rowsInserted.disconnect(self.schedule_prefetch)
+            self.model().layoutChanged.disconnect(self.schedule_prefetch)
+        super().setModel(model)
+        # QFileSystemModel 在后台线程加载目录，条目到达后再预取
+        model.rowsInserted.connect(self.schedule_prefetch)
+        model.layoutChanged.connect(self.schedule_prefetch)
+
+    def setRootIndex(self, index):
+        self.cancel_requests()
+        self.failed.clear()
+        super().setRootIndex(index)
+        self.schedule_prefetch()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.schedule_prefetch()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.schedule_prefetch()
+
+    def hideEvent(self, event):
+        self.cancel_requests()
+        super().hideEvent(event)
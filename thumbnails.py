@@ -0,0 +1,299 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, QSize, pyqtSignal
+from PyQt5.QtGui import QImage, QImageReader, QImageIOHandler, QTransform
+from utils import cache_dir
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp', '.tif', '.tiff')
+# 内存缓存上限（字节）
+MEMORY_CACHE_BYTES = 128 * 1024 * 1024
+# 磁盘缓存上限（字节），超出时删除最久未用的缩略图
+DISK_CACHE_BYTES = 512 * 1024 * 1024
+# 原图小于该像素数时直接解码，不写入磁盘缓存
+DISK_CACHE_MIN_PIXELS = 1024 * 1024
+# 读取 EXIF 时只看文件开头的这些字节
+EXIF_SCAN_BYTES = 128 * 1024
+
+
+def is_image(path):
+    return path.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def _exif_thumbnail(tiff):
+    """ 从 EXIF 的 TIFF 数据中取出 IFD1 缩略图，返回 (JPEG 数据, 方向) """
+    endian = {b'II': 'little', b'MM': 'big'}.get(tiff[:2])
+    if endian is None or len(tiff) < 8:
+        return None
+
+    def u16(offset):
+        return int.from_bytes(tiff[offset:offset + 2], endian)
+
+    def u32(offset):
+        return int.from_bytes(tiff[offset:offset + 4], endian)
+
+    ifd0 = u32(4)
+    if ifd0 + 2 > len(tiff):
+        return None
+    orientation = 1
+    count = u16(ifd0)
+    for i in range(count):
+        entry = ifd0 + 2 + i * 12
+        if u16(entry) == 0x0112:
+            orientation = u16(entry + 8)
+    ifd1 = u32(ifd0 + 2 + count * 12)
+    if not ifd1 or ifd1 + 2 > len(tiff):
+        return None
+    offset = length = 0
+    for i in range(u16(ifd1)):
+        entry = ifd1 + 2 + i * 12
+        tag = u16(entry)
+        if tag == 0x0201:
+            offset = u32(entry + 8)
+        elif tag == 0x0202:
+            length = u32(entry + 8)
+    if offset and length and offset + length <= len(tiff):
+        return tiff[offset:offset + length], orientation
+    return None
+
+
+def read_exif_thumbnail(path):
+    """ 读取 JPEG 中嵌入的 EXIF 缩略图，没有时返回 None """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read(EXIF_SCAN_BYTES)
+    except OSError:
+        return None
+    if data[:2] != b'\xff\xd8':
+        return None
+    pos = 2
+    while pos + 4 <= len(data) and data[pos] == 0xFF:
+        marker = data[pos + 1]
+        length = int.from_bytes(data[pos + 2:pos + 4], 'big')
+        if marker == 0xE1 and data[pos + 4:pos + 10] == b'Exif\0\0':
+            return _exif_thumbnail(data[pos + 10:pos + 2 + length])
+        if marker in (0xDA, 0xD9):  # 图像数据开始，后面不会再有 EXIF
+            break
+        pos += 2 + length
+    return None
+
+
+# EXIF 方向对应的旋转角度
+ORIENTATION_ROTATION = {3: 180, 6: 90, 8: 270}
+
+
+def decode_scaled(path, size):
+    """ 按目标尺寸解码图片，JPEG 等格式在解码阶段就完成缩小 """
+    exif = read_exif_thumbnail(path) if path.lower().endswith(('.jpg', '.jpeg')) else None
+    if exif is not None:
+        data, orientation = exif
+        image = QImage.fromData(data)
+        if orientation in ORIENTATION_ROTATION:
+            image = image.transformed(QTransform().rotate(ORIENTATION_ROTATION[orientation]))
+        # 嵌入的缩略图足够大时直接使用，不解码原图
+        if not image.isNull() and image.width() >= size.width() and \
+                image.height() >= size.height():
+            return image.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation), 0
+
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    original = reader.size()
+    pixels = 0
+    if original.isValid():
+        pixels = original.width() * original.height()
+        # 缩放发生在旋转之前，旋转 90 度的图片要按交换后的尺寸缩放
+        if reader.transformation() & QImageIOHandler.TransformationRotate90:
+            size = size.transposed()
+        if original.width() > size.width() or original.height() > size.height():
+            reader.setScaledSize(original.scaled(size, Qt.KeepAspectRatio))
+    return reader.read(), pixels
+
+
+class ThumbnailCache:
+    """ 两级缩略图缓存：内存 LRU 加磁盘缓存
+
+    键由路径、文件大小、修改时间和目标尺寸组成，文件变化后自动失效。
+    """
+
+    def __init__(self, directory=None, memory_bytes=MEMORY_CACHE_BYTES):
+        self.directory = directory or cache_dir('thumbnails')
+        self.memory_bytes = memory_bytes
+        self.memory = OrderedDict()
+        self.used = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def make_key(path, size):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        text = f'{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}|{size.width()}x{size.height()}'
+        return hashlib.sha1(text.encode('utf-8', 'surrogateescape')).hexdigest()
+
+    def get_memory(self, key):
+        with self.lock:
+            image = self.memory.get(key)
+            if image is not None:
+                self.memory.move_to_end(key)
+            return image
+
+    def put_memory(self, key, image):
+        with self.lock:
+            if key in self.memory:
+                return
+            self.memory[key] = image
+            self.used += image.sizeInBytes()
+            while self.used > self.memory_bytes and len(self.memory) > 1:
+                _, old = self.memory.popitem(last=False)
+                self.used -= old.sizeInBytes()
+
+    def disk_path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.png')
+
+    def load(self, path, size):
+        """ 依次查内存、磁盘缓存，最后解码原图；在工作线程中调用 """
+        key = self.make_key(path, size)
+        if key is None:
+            return QImage()
+        image = self.get_memory(key)
+        if image is not None:
+            return image
+
+        disk_path = self.disk_path(key)
+        image = QImage(disk_path) if os.path.exists(disk_path) else QImage()
+        if image.isNull():
+            image, pixels = decode_scaled(path, size)
+            if image.isNull():
+                return image
+            if pixels >= DISK_CACHE_MIN_PIXELS:
+                self.save_disk(disk_path, image)
+        else:
+            try:
+                os.utime(disk_path)  # 记录最近使用时间，清理时保留常用的
+            except OSError:
+                pass
+        self.put_memory(key, image)
+        return image
+
+    @staticmethod
+    def save_disk(disk_path, image):
+        try:
+            os.makedirs(os.path.dirname(disk_path), exist_ok=True)
+            # 先写临时文件再改名，避免其他线程读到一半的文件
+            tmp_path = f'{disk_path}.{threading.get_ident()}.tmp'
+            if not image.save(tmp_path, 'PNG'):
+                return
+            os.replace(tmp_path, disk_path)
+        except OSError:
+            pass
+
+    def prune(self, max_bytes=DISK_CACHE_BYTES):
+        files = []
+        total = 0
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        files.sort()
+        for _, size, path in files:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+class _LoaderSignals(QObject):
+    # 路径, (宽, 高), QImage
+    loaded = pyqtSignal(str, tuple, QImage)
+
+
+class _ThumbnailTask(QRunnable):
+    def __init__(self, loader, path, size):
+        super().__init__()
+        self.loader = loader
+        self.path = path
+        self.size = size
+
+    def run(self):
+        key = (self.path, self.size.width(), self.size.height())
+        if not self.loader.is_pending(key):
+            return
+        image = self.loader.cache.load(self.path, self.size)
+        self.loader.finish(key)
+        self.loader.signals.loaded.emit(self.path, (self.size.width(), self.size.height()), image)
+
+
+class ThumbnailLoader(QObject):
+    """ 在有限大小的线程池中异步生成缩略图，可取消尚未开始的请求 """
+
+    def __init__(self, cache=None, max_threads=4, parent=None):
+        super().__init__(parent)
+        self.cache = cache or ThumbnailCache()
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self.signals = _LoaderSignals()
+        self.loaded = self.signals.loaded
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def request(self, path, size):
+        """ 内存缓存命中时直接返回图片，否则排队加载并返回 None """
+        key = self.cache.make_key(path, size)
+        if key is not None:
+            image = self.cache.get_memory(key)
+            if image is not None:
+                return image
+        task_key = (path, size.width(), size.height())
+        with self.lock:
+            if task_key in self.pending:
+                return None
+            task = _ThumbnailTask(self, path, QSize(size))
+            task.setAutoDelete(False)
+            self.pending[task_key] = task
+        self.pool.start(task)
+        return None
+
+    def is_pending(self, key):
+        with self.lock:
+            return key in self.pending
+
+    def finish(self, key):
+        with self.lock:
+            self.pending.pop(key, None)
+
+    def cancel(self, path, size):
+        key = (path, size.width(), size.height())
+        with self.lock:
+            task = self.pending.pop(key, None)
+        if task is not None:
+            self.pool.tryTake(task)
+
+    def cancel_all(self):
+        with self.lock:
+            tasks = list(self.pending.values())
+            self.pending.clear()
+        for task in tasks:
+            self.pool.tryTake(task)
+
+
+_shared_loader = None
+
+
+def shared_loader():
+    """ 预览和缩略图视图共用的加载器 """
+    global _shared_loader
+    if _shared_loader is None:
+        _shared_loader = ThumbnailLoader()
+        # 启动后在后台清理一次磁盘缓存
+        threading.Thread(target=_shared_loader.cache.prune, daemon=True).start()
+    return _shared_loader
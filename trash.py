@@ -0,0 +1,354 @@
+import os
+import sys
+import stat
+import time
+from urllib.parse import quote, unquote
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
+                             QTableWidget, QTableWidgetItem, QAbstractItemView,
+                             QHeaderView, QLabel, QMessageBox)
+from PyQt5.QtCore import QThread, pyqtSignal
+
+# 后台清理时并行删除文件的线程数
+PURGE_THREADS = 8
+
+
+class TrashError(OSError):
+    pass
+
+
+def _uid():
+    return os.getuid() if hasattr(os, 'getuid') else 0
+
+
+def home_trash():
+    data_home = os.environ.get('XDG_DATA_HOME') or os.path.expanduser('~/.local/share')
+    return os.path.join(data_home, 'Trash')
+
+
+def _mount_point(path):
+    path = os.path.abspath(path)
+    dev = os.lstat(path).st_dev
+    while True:
+        parent = os.path.dirname(path)
+        if parent == path or os.lstat(parent).st_dev != dev:
+            return path
+        path = parent
+
+
+def _ensure_trash(trash_dir):
+    for sub in ('files', 'info'):
+        os.makedirs(os.path.join(trash_dir, sub), mode=0o700, exist_ok=True)
+    return trash_dir
+
+
+def trash_dir_for(path, cache=None):
+    """ 按 freedesktop 规范选择和 path 同一文件系统的回收站
+
+    返回 (回收站目录, 顶层目录)；顶层目录为 None 时表示家目录回收站，
+    trashinfo 中写绝对路径，否则写相对顶层目录的路径。
+    批量删除时传入 cache 字典，同一设备只查找一次。
+    """
+    dev = os.lstat(path).st_dev
+    if cache is not None and dev in cache:
+        return cache[dev]
+    result = _find_trash_dir(path, dev)
+    if cache is not None:
+        cache[dev] = result
+    return result
+
+
+def _find_trash_dir(path, dev):
+    home = home_trash()
+    try:
+        os.makedirs(home, mode=0o700, exist_ok=True)
+        if os.stat(home).st_dev == dev:
+            return _ensure_trash(home), None
+    except OSError:
+        pass
+
+    top = _mount_point(os.path.dirname(os.path.abspath(path)))
+    shared = os.path.join(top, '.Trash')
+    try:
+        st = os.lstat(shared)
+        # 共享回收站必须是设置了粘滞位的真实目录
+        if stat.S_ISDIR(st.st_mode) and st.st_mode & stat.S_ISVTX:
+            return _ensure_trash(os.path.join(shared, str(_uid()))), top
+    except OSError:
+        pass
+    return _ensure_trash(os.path.join(top, f'.Trash-{_uid()}')), top
+
+
+def move_to_trash(path, cache=None):
+    """ 把 path 重命名到回收站，返回 (回收站目录, 回收站中的名称)
+
+    同一文件系统内只是一次 rename，与文件夹大小无关。
+    """
+    path = os.path.abspath(path)
+    trash_dir, top = trash_dir_for(path, cache)
+    if path == trash_dir or path.startswith(trash_dir + os.sep):
+        raise TrashError(f'不能把回收站移到回收站: {path}')
+    original = os.path.relpath(path, top) if top else path
+    info = ('[Trash Info]\n'
+            f'Path={quote(original)}\n'
+            f'DeletionDate={time.strftime("%Y-%m-%dT%H:%M:%S")}\n')
+
+    # 先以 O_EXCL 创建 trashinfo 占住名称，再移动文件
+    base = os.path.basename(path)
+    name = base
+    counter = 2
+    while True:
+        info_path = os.path.join(trash_dir, 'info', name + '.trashinfo')
+        try:
+            fd = os.open(info_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            break
+        except FileExistsError:
+            name = f'{base}.{counter}'
+            counter += 1
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(info)
+    try:
+        os.rename(path, os.path.join(trash_dir, 'files', name))
+    except OSError:
+        os.remove(info_path)
+        raise
+    return trash_dir, name
+
+
+def _read_info(info_path):
+    original = deleted = ''
+    with open(info_path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            key, _, value = line.strip().partition('=')
+            if key == 'Path':
+                original = unquote(value)
+            elif key == 'DeletionDate':
+                deleted = value
+    return original, deleted
+
+
+def trash_dirs():
+    """ 已存在的回收站目录：家目录回收站和各挂载点下的回收站 """
+    dirs = [(home_trash(), None)]
+    if sys.platform.startswith('linux'):
+        try:
+            with open('/proc/mounts', encoding='utf-8', errors='replace') as f:
+                mounts = [line.split()[1].replace('\\040', ' ') for line in f]
+        except OSError:
+            mounts = []
+        for top in mounts:
+            for trash_dir in (os.path.join(top, '.Trash', str(_uid())),
+                              os.path.join(top, f'.Trash-{_uid()}')):
+                dirs.append((trash_dir, top))
+    return [(d, top) for d, top in dirs if os.path.isdir(os.path.join(d, 'info'))]
+
+
+def list_trash():
+    """ 返回 [(回收站目录, 名称, 原路径, 删除时间), ...] """
+    entries = []
+    for trash_dir, top in trash_dirs():
+        info_dir = os.path.join(trash_dir, 'info')
+        try:
+            names = os.listdir(info_dir)
+        except OSError:
+            continue
+        for info_name in names:
+            if not info_name.endswith('.trashinfo'):
+                continue
+            name = info_name[:-len('.trashinfo')]
+            if not os.path.lexists(os.path.join(trash_dir, 'files', name)):
+                continue
+            try:
+                original, deleted = _read_info(os.path.join(info_dir, info_name))
+            except OSError:
+                continue
+            if top and not os.path.isabs(original):
+                original = os.path.join(top, original)
+            entries.append((trash_dir, name, original, deleted))
+    return entries
+
+
+def restore(trash_dir, name, original):
+    if os.path.lexists(original):
+        raise TrashError(f'目标位置已存在同名项目: {original}')
+    os.makedirs(os.path.dirname(original), exist_ok=True)
+    os.rename(os.path.join(trash_dir, 'files', name), original)
+    try:
+        os.remove(os.path.join(trash_dir, 'info', name + '.trashinfo'))
+    except OSError:
+        pass
+
+
+def entry_paths(trash_dir, name):
+    """ 回收站项目的数据路径和 trashinfo 路径 """
+    return (os.path.join(trash_dir, 'files', name),
+            os.path.join(trash_dir, 'info', name + '.trashinfo'))
+
+
+def _unlink_files(directory):
+    """ 删除目录中的所有非目录条目，返回 (删除数, 子目录列表, 错误列表) """
+    removed = 0
+    subdirs = []
+    errors = []
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    else:
+                        os.unlink(entry.path)
+                        removed += 1
+                except OSError as e:
+                    errors.append((entry.path, str(e)))
+    except OSError as e:
+        errors.append((directory, str(e)))
+    return removed, subdirs, errors
+
+
+class PurgeWorker(QThread):
+    # 已删除条目数
+    progress = pyqtSignal(int)
+    # 删除条目数, 错误列表
+    purge_finished = pyqtSignal(int, list)
+
+    def __init__(self, items, parent=None):
+        """ items 为 [(要删除的路径, 删除后要移除的 trashinfo 或 None), ...] """
+        super().__init__(parent)
+        self.items = list(items)
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def remove_tree(self, pool, root):
+        # 按层并行删除文件，目录最后从深到浅删除
+        removed = 0
+        errors = []
+        dirs = []
+        level = [root]
+        while level and not self._cancelled:
+            dirs.extend(level)
+            next_level = []
+            for count, subdirs, errs in pool.map(_unlink_files, level):
+                removed += count
+                next_level.extend(subdirs)
+                errors.extend(errs)
+            self.progress.emit(removed)
+            level = next_level
+        if self._cancelled:
+            return removed, errors
+        for directory in reversed(dirs):
+            try:
+                os.rmdir(directory)
+                removed += 1
+            except OSError as e:
+                errors.append((directory, str(e)))
+        return removed, errors
+
+    def run(self):
+        removed = 0
+        errors = []
+        with ThreadPoolExecutor(max_workers=PURGE_THREADS) as pool:
+            for path, info_path in self.items:
+                if self._cancelled:
+                    break
+                try:
+                    if os.path.isdir(path) and not os.path.islink(path):
+                        count, errs = self.remove_tree(pool, path)
+                        removed += count
+                        errors.extend(errs)
+                        if errs:
+                            continue
+                    elif os.path.lexists(path):
+                        os.unlink(path)
+                        removed += 1
+                    if info_path:
+                        os.remove(info_path)
+                except OSError as e:
+                    errors.append((path, str(e)))
+        self.purge_finished.emit(removed, errors)
+
+
+class TrashDialog(QDialog):
+    HEADERS = ['名称', '原位置', '删除时间']
+
+    def __init__(self, explorer):
+        super().__init__(explorer)
+        self.explorer = explorer
+        self.setWindowTitle('回收站')
+        self.resize(750, 400)
+
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget(0, len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.table.setColumnWidth(0, 200)
+        layout.addWidget(self.table)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        button_layout = QHBoxLayout()
+        buttons = [
+            ('还原', self.restore_selected),
+            ('永久删除', self.purge_selected),
+            ('清空回收站', self.purge_all),
+            ('关闭', self.accept),
+        ]
+        for text, slot in buttons:
+            button = QPushButton(text)
+            button.clicked.connect(slot)
+            button_layout.addWidget(button)
+        layout.addLayout(button_layout)
+
+        self.load_entries()
+
+    def load_entries(self):
+        self.entries = sorted(list_trash(), key=lambda e: e[3], reverse=True)
+        self.table.setRowCount(len(self.entries))
+        for row, (trash_dir, name, original, deleted) in enumerate(self.entries):
+            values = [os.path.basename(original), os.path.dirname(original),
+                      deleted.replace('T', ' ')]
+            for column, value in enumerate(values):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+        self.status_label.setText(f'共 {len(self.entries)} 个项目')
+
+    def selected_entries(self):
+        rows = sorted({index.row() for index in self.table.selectedIndexes()})
+        return [self.entries[row] for row in rows]
+
+    def restore_selected(self):
+        errors = []
+        for trash_dir, name, original, deleted in self.selected_entries():
+            try:
+                restore(trash_dir, name, original)
+            except OSError as e:
+                errors.append(f'{os.path.basename(original)}: {str(e)}')
+        if errors:
+            QMessageBox.warning(self, '错误', '还原失败:\n' + '\n'.join(errors[:10]))
+        self.load_entries()
+
+    def purge_selected(self):
+        self.purge(self.selected_entries())
+
+    def purge_all(self):
+        self.purge(self.entries)
+
+    def purge(self, entries):
+        if not entries:
+            return
+        reply = QMessageBox.question(self, '确认删除',
+                                     f'确定要永久删除 {len(entries)} 个项目吗？此操作无法撤销。',
+                                     QMessageBox.Yes | QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return
+        items = [entry_paths(trash_dir, name) for trash_dir, name, _, _ in entries]
+        worker = self.explorer.start_purge(items)
+        self.status_label.setText('正在后台删除...')
+        worker.purge_finished.connect(lambda *args: self.load_entries())
@@ -0,0 +1,65 @@
+import os
+import sys
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def format_size(size):
+    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} PB"
+
+
+def config_dir():
+    """ 获取用户配置目录，不存在时自动创建 """
+    if sys.platform == 'win32':
+        base = os.environ.get('APPDATA') or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser('~/.config')
+    path = os.path.join(base, 'file_manager')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def cache_dir(name=''):
+    """ 获取用户缓存目录，不存在时自动创建 """
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    path = os.path.join(base, 'file_manager', name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def process_pool():
+    """ 全局共享的进程池，第一次使用时创建
+
+    子进程意外退出后进程池不能再提交任务，这时换一个新的进程池。
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None and getattr(_process_pool, '_broken', False):
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+            _process_pool = None
+        if _process_pool is None:
+            # Qt 程序中 fork 不安全，统一使用 spawn
+            context = multiprocessing.get_context('spawn')
+            _process_pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1,
+                                                mp_context=context)
+        return _process_pool
+
+
+def shutdown_process_pool():
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+            _process_pool = None